@@ -0,0 +1,112 @@
+"""
+Accuracy vs latency of the CPU inference backends in src/models/backends.py.
+Every backend runs on the same windows and is compared per frame against eager FP32:
+argmax agreement, max |logit diff|, latency at several (B, T) shapes and serialized size.
+
+Usage: python benchmarks/bench_backends.py [--checkpoint best_model.pth]
+           [--split-csv val.csv --frames-root stacked_frames --frame-store frame_store]
+Without a checkpoint the weights are random, so agreement only shows numerical drift.
+"""
+import io
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import torch
+
+from benchmarks.common import report
+from benchmarks.synthetic import synthetic_image
+from src.data.dataset import EmbryoSequenceDataset
+from src.data.transforms import normalize_window
+from src.models.backends import apply_backend
+from src.serving.loading import load_model
+
+DEFAULT_BACKENDS = ["eager", "channels_last", "dynamic_int8", "static_int8", "static_int8+dynamic_int8", "compile"]
+
+
+def synthetic_windows(num_windows, window_size=16, seed=0):
+    rng = np.random.default_rng(seed)
+    frames = np.stack([synthetic_image(rng).transpose(2, 0, 1) for _ in range(num_windows * window_size)])
+    frames = normalize_window(torch.from_numpy(frames)).view(num_windows, window_size, 3, 224, 224)
+    times = torch.arange(window_size, dtype=torch.float32).repeat(num_windows, 1) * 0.25
+    return frames, times
+
+
+def validation_windows(split_csv, frames_root, frame_store, num_windows):
+    ds = EmbryoSequenceDataset(split_csv, frames_root, frame_store=frame_store)
+    picks = np.linspace(0, len(ds) - 1, min(num_windows, len(ds))).astype(int)
+    frames, times, _ = zip(*(ds[i] for i in picks))
+    return torch.stack(frames), torch.stack(times)
+
+
+def model_size_mb(model):
+    buf = io.BytesIO()
+    torch.save(model.state_dict(), buf)
+    return buf.tell() / 2**20
+
+
+@torch.no_grad()
+def run_windows(model, frames, times, batch=4):
+    return torch.cat([model(f, t) for f, t in zip(frames.split(batch), times.split(batch))])
+
+
+@torch.no_grad()
+def latency_ms(model, b, t, repeats):
+    frames = torch.randn(b, t, 3, 224, 224)
+    times = torch.arange(t, dtype=torch.float32).repeat(b, 1)
+    model(frames, times)  # warmup (and compilation for this shape)
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model(frames, times)
+        samples.append(1000 * (time.perf_counter() - start))
+    return statistics.median(samples)
+
+
+def main(backends, shapes, repeats, num_windows, checkpoint=None, split_csv=None, frames_root=None,
+         frame_store=None, out=None):
+    torch.manual_seed(0)
+    reference = load_model(checkpoint=checkpoint, pretrained=False)
+
+    # Calibration windows are disjoint from every evaluation set
+    calibration = synthetic_windows(2, seed=1)[0].flatten(0, 1)
+    eval_sets = {"synthetic": synthetic_windows(num_windows)}
+    if split_csv:
+        eval_sets["validation"] = validation_windows(split_csv, frames_root, frame_store, num_windows)
+    expected = {name: run_windows(reference, *data) for name, data in eval_sets.items()}
+
+    results = []
+    for backend in backends:
+        start = time.perf_counter()
+        model = apply_backend(reference, backend, calibration)
+        row = {"backend": backend, "setup_s": time.perf_counter() - start, "size_mb": model_size_mb(model)}
+        for name, data in eval_sets.items():
+            logits = run_windows(model, *data)
+            row[f"{name}_agreement"] = (logits.argmax(-1) == expected[name].argmax(-1)).float().mean().item()
+            row[f"{name}_max_diff"] = (logits - expected[name]).abs().max().item()
+        for b, t in shapes:
+            row[f"ms_{b}x{t}"] = latency_ms(model, b, t, repeats)
+        results.append(row)
+    report("backends", results, out)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", nargs="+", default=DEFAULT_BACKENDS)
+    parser.add_argument("--shapes", nargs="+", default=["1x16", "4x16", "1x4"], help="BxT window shapes")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--windows", type=int, default=8, help="evaluation windows per set")
+    parser.add_argument("--checkpoint", default=None)
+    parser.add_argument("--split-csv", default=None)
+    parser.add_argument("--frames-root", default=None)
+    parser.add_argument("--frame-store", default=None)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+    shapes = [tuple(int(x) for x in s.split("x")) for s in args.shapes]
+    main(args.backends, shapes, args.repeats, args.windows, args.checkpoint, args.split_csv,
+         args.frames_root, args.frame_store, args.out)
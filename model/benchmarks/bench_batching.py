@@ -0,0 +1,54 @@
+"""
+Throughput and latency of the /fl/execute micro-batcher under concurrent
+clients, against batch size 1 (the old one-request-per-forward behaviour).
+Usage: python benchmarks/bench_batching.py [--clients 8] [--requests 4] [--frames 8]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import torch
+
+from benchmarks.common import report
+from src.models.hybrid_model import EmbryoGenModel
+from src.serving.batching import MicroBatcher
+
+
+async def load(batcher, clients, requests, frames):
+    async def client():
+        for _ in range(requests):
+            await batcher.submit(torch.randn(frames, 3, 224, 224), torch.arange(frames, dtype=torch.float32))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return time.perf_counter() - start
+
+
+def main(clients, requests, frames, max_batch, out=None):
+    torch.manual_seed(0)
+    model = EmbryoGenModel(num_classes=17, pretrained=False).eval()
+    results = []
+    for batch in (1, max_batch):
+        batcher = MicroBatcher(model, max_batch=batch, max_wait_ms=10)
+        seconds = asyncio.run(load(batcher, clients, requests, frames))
+        batcher.stop()
+        stats = batcher.stats()
+        results.append({"max_batch": batch, "clients": clients, "requests_per_sec": clients * requests / seconds,
+                        "mean_batch": sum(k * v for k, v in stats["batch_sizes"].items()) / stats["batches"],
+                        "p50_ms": stats["latency_ms_p50"], "p99_ms": stats["latency_ms_p99"]})
+    report("batching", results, out)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=4)
+    parser.add_argument("--frames", type=int, default=8)
+    parser.add_argument("--max-batch", type=int, default=8)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+    main(args.clients, args.requests, args.frames, args.max_batch, args.out)
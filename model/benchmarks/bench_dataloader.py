@@ -0,0 +1,78 @@
+"""
+EmbryoSequenceDataset windows/sec through a DataLoader (batch 4, shuffled as in
+training) at several num_workers: stacked JPEGs through the per-frame PIL transform,
+stacked JPEGs through the batched decode_jpeg + WindowTransform pipeline (plain and
+with training augmentation), and the packed frame store.
+Usage: python benchmarks/bench_dataloader.py [--embryos 8] [--frames 64] [--workers 0 2 4]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from torch.utils.data import DataLoader
+from torchvision import transforms
+
+from benchmarks.common import report
+from benchmarks.synthetic import make_labels, make_stacked_frames
+from src.data.dataset import EmbryoSequenceDataset
+from src.data.frame_store import convert_stacked_frames
+from src.data.transforms import IMAGENET_MEAN, IMAGENET_STD, WindowTransform
+
+
+def windows_per_sec(ds, num_workers, batch_size, epochs):
+    loader = DataLoader(ds, batch_size=batch_size, shuffle=True, num_workers=num_workers,
+                        persistent_workers=num_workers > 0)
+    next(iter(loader))  # worker startup is not part of steady-state throughput
+    start = time.perf_counter()
+    windows = 0
+    for _ in range(epochs):
+        for frames, _, _ in loader:
+            windows += len(frames)
+    return windows / (time.perf_counter() - start)
+
+
+def main(num_embryos, frames_per_embryo, workers, batch_size, epochs, out=None):
+    transform = transforms.Compose([
+        transforms.Resize((224, 224)),
+        transforms.ToTensor(),
+        transforms.Normalize(mean=IMAGENET_MEAN, std=IMAGENET_STD)
+    ])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        labels = make_labels(num_embryos, frames_per_embryo)
+        labels.to_csv(tmp / "labels.csv", index=False)
+        make_stacked_frames(tmp / "stacked_frames", labels)
+        convert_stacked_frames(tmp / "stacked_frames", tmp / "frame_store")
+
+        datasets = {
+            "jpeg": EmbryoSequenceDataset(tmp / "labels.csv", tmp / "stacked_frames", transform=transform),
+            "jpeg_window": EmbryoSequenceDataset(tmp / "labels.csv", tmp / "stacked_frames",
+                                                 window_transform=WindowTransform(224)),
+            "jpeg_window_aug": EmbryoSequenceDataset(tmp / "labels.csv", tmp / "stacked_frames",
+                                                     window_transform=WindowTransform(224, train=True)),
+            "packed": EmbryoSequenceDataset(tmp / "labels.csv", tmp / "stacked_frames", frame_store=tmp / "frame_store"),
+        }
+        results = []
+        for name, ds in datasets.items():
+            for num_workers in workers:
+                results.append({"source": name, "num_workers": num_workers, "windows": len(ds),
+                                 "windows_per_sec": windows_per_sec(ds, num_workers, batch_size, epochs)})
+        report("dataloader", results, out)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--embryos", type=int, default=8)
+    parser.add_argument("--frames", type=int, default=64)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 2, 4])
+    parser.add_argument("--batch", type=int, default=4)
+    parser.add_argument("--epochs", type=int, default=1)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+    main(args.embryos, args.frames, args.workers, args.batch, args.epochs, args.out)
@@ -0,0 +1,87 @@
+"""
+Data-parallel scaling of trainer.train: one training epoch on a synthetic
+frame store under torchrun at 1/2/4/8 processes (gloo), reported as
+windows/sec and scaling efficiency = throughput_N / (N * throughput_1).
+Usage: python benchmarks/bench_ddp.py [--procs 1 2 4 8] [--embryos 8] [--frames 48]
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.common import report
+from benchmarks.synthetic import make_labels, make_stacked_frames
+
+
+def worker(root, batch_size):
+    """Runs inside torchrun: one epoch of the real training loop on the synthetic dataset."""
+    os.chdir(root)
+    sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+    from training import trainer
+
+    trainer.EPOCHS = 1
+    trainer.BATCH_SIZE = batch_size
+    trainer.PRETRAINED = False
+    trainer.INSTRUMENT = True
+    trainer.FRAME_STORE = "data/processed/frame_store"
+    trainer.SAVE_DIR = Path(os.environ["BENCH_SAVE_DIR"])
+    trainer.train()
+
+
+def run(root, procs, batch_size):
+    save_dir = Path(root) / f"run_{procs}"
+    save_dir.mkdir()
+    env = {**os.environ, "BENCH_SAVE_DIR": str(save_dir),
+           "OMP_NUM_THREADS": str(max(1, (os.cpu_count() or 1) // procs))}
+    subprocess.run([sys.executable, "-m", "torch.distributed.run", "--standalone", f"--nproc_per_node={procs}",
+                    __file__, "--worker", "--root", str(root), "--batch", str(batch_size)],
+                   env=env, check=True, stdout=subprocess.DEVNULL)
+    records = [json.loads(line) for line in open(save_dir / "timing.jsonl")]
+    return next(r["seconds"] for r in records if r["phase"] == "train")
+
+
+def main(procs, num_embryos, frames_per_embryo, batch_size, out=None):
+    from src.data.dataset import EmbryoSequenceDataset
+    from src.data.frame_store import convert_stacked_frames
+
+    with tempfile.TemporaryDirectory() as root:
+        root = Path(root)
+        labels = make_labels(num_embryos, frames_per_embryo)
+        (root / "data" / "splits").mkdir(parents=True)
+        for split in ("train", "val"):
+            labels.to_csv(root / "data" / "splits" / f"{split}.csv", index=False)
+        make_stacked_frames(root / "data" / "processed" / "stacked_frames", labels)
+        convert_stacked_frames(root / "data" / "processed" / "stacked_frames", root / "data" / "processed" / "frame_store")
+        windows = len(EmbryoSequenceDataset(root / "data" / "splits" / "train.csv",
+                                            root / "data" / "processed" / "stacked_frames"))
+
+        results = []
+        for n in procs:
+            seconds = run(root, n, batch_size)
+            results.append({"procs": n, "windows": windows, "epoch_s": seconds, "windows_per_sec": windows / seconds})
+        base = results[0]["windows_per_sec"] / results[0]["procs"]
+        for row in results:
+            row["efficiency"] = row["windows_per_sec"] / (row["procs"] * base)
+    print(f"cpu_count={os.cpu_count()}, OMP threads per process = cpu_count // procs")
+    report("ddp", results, out)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--procs", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--embryos", type=int, default=8)
+    parser.add_argument("--frames", type=int, default=48)
+    parser.add_argument("--batch", type=int, default=2, help="per-process batch size")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--root", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+    if args.worker:
+        worker(args.root, args.batch)
+    else:
+        main(args.procs, args.embryos, args.frames, args.batch, args.out)
@@ -0,0 +1,122 @@
+"""
+Distilled lightweight backbones (src/training/distill.py) against the ResNet18
+teacher: CPU latency and throughput of one 16-frame window decoded at each
+model's input size (as fl_node and score.py do), the same window fed at 224 px
+(the in-model resize fallback), backbone size, and, after distilling each
+student for a few epochs on a training split, the accuracy gap to the teacher
+and per-frame agreement on the validation split.
+Runs on a synthetic split with a randomly initialized teacher by default, or
+on real data with --data-root (trainer.py layout) and --checkpoint.
+Usage: python benchmarks/bench_distill.py [--students mobilenet_v3_small:160:1.0 mobilenet_v3_small:128:0.75] [--epochs 3]
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+import tempfile
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import torch
+from torch.utils.data import DataLoader
+
+from benchmarks.common import report
+from benchmarks.synthetic import make_labels, make_timelapse_frames
+from src.data.dataset import EmbryoSequenceDataset
+from src.data.transforms import WindowTransform
+from src.models.hybrid_model import EmbryoGenModel
+from src.training.distill import build_student, distill_epoch, evaluate
+
+
+def parse_student(spec):
+    backbone, input_size, width_mult = spec.split(":")
+    return {"backbone": backbone, "input_size": int(input_size), "width_mult": float(width_mult)}
+
+
+@torch.no_grad()
+def latency(model, repeats, size=224, window=16):
+    """Median seconds per (1, window) forward pass on size x size frames."""
+    model.eval()
+    frames, times = torch.randn(1, window, 3, size, size), torch.arange(window, dtype=torch.float32).unsqueeze(0)
+    model(frames, times)
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model(frames, times)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def loaders(data_root, batch_size):
+    transform = WindowTransform(224)
+    train = EmbryoSequenceDataset(data_root / "data" / "splits" / "train.csv", data_root / "data" / "processed" / "stacked_frames",
+                                  window_transform=transform)
+    val = EmbryoSequenceDataset(data_root / "data" / "splits" / "val.csv", data_root / "data" / "processed" / "stacked_frames",
+                                window_transform=transform)
+    return DataLoader(train, batch_size=batch_size, shuffle=True), DataLoader(val, batch_size=batch_size)
+
+
+def main(students, epochs, repeats, num_embryos, frames_per_embryo, data_root=None, checkpoint=None, lr=1e-3,
+         batch_size=2, out=None):
+    torch.manual_seed(0)
+    teacher = EmbryoGenModel(num_classes=17, pretrained=False)
+    if checkpoint:
+        teacher.load_state_dict(torch.load(checkpoint, map_location="cpu", weights_only=True))
+    teacher.requires_grad_(False)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if data_root is None:
+            # Whole embryos go to either split, as create_splits does
+            data_root = Path(tmp)
+            labels = make_labels(num_embryos, frames_per_embryo)
+            make_timelapse_frames(data_root / "data" / "processed" / "stacked_frames", labels)
+            val_ids = labels["EmbryoID"].unique()[: max(1, num_embryos // 4)]
+            (data_root / "data" / "splits").mkdir(parents=True)
+            labels[~labels["EmbryoID"].isin(val_ids)].to_csv(data_root / "data" / "splits" / "train.csv", index=False)
+            labels[labels["EmbryoID"].isin(val_ids)].to_csv(data_root / "data" / "splits" / "val.csv", index=False)
+        train_loader, val_loader = loaders(Path(data_root), batch_size)
+
+        teacher_s = latency(teacher, repeats)
+        results = [{"model": "teacher:resnet18:224:1.0", "backbone_mparams": params(teacher), "window_ms": 1000 * teacher_s,
+                    "frames_per_sec": 16 / teacher_s, "speedup": 1.0, **evaluate(teacher, teacher, val_loader)}]
+        for spec in students:
+            torch.manual_seed(0)
+            student = build_student(teacher, parse_student(spec))
+            optimizer = torch.optim.AdamW([p for p in student.parameters() if p.requires_grad], lr=lr)
+            start = time.perf_counter()
+            for _ in range(epochs):
+                distill_epoch(teacher, student, train_loader, optimizer)
+            distill_s = time.perf_counter() - start
+            student_s = latency(student, repeats, student.input_size)
+            results.append({"model": spec, "backbone_mparams": params(student), "window_ms": 1000 * student_s,
+                            "window_ms_from_224": 1000 * latency(student, repeats),
+                            "frames_per_sec": 16 / student_s, "speedup": teacher_s / student_s,
+                            "distill_s": distill_s, **evaluate(teacher, student, val_loader)})
+    for row in results:
+        row["acc_gap"] = row["teacher_acc"] - row["student_acc"]
+    print(f"cpu_count={os.cpu_count()} threads={torch.get_num_threads()}")
+    report("distill", results, out)
+
+
+def params(model):
+    return f"{sum(p.numel() for p in model.feature_extractor.parameters()) / 1e6:.2f}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", nargs="+", default=["mobilenet_v3_small:224:1.0", "mobilenet_v3_small:160:1.0",
+                                                          "mobilenet_v3_small:128:0.75"],
+                        help="backbone:input_size:width_mult")
+    parser.add_argument("--epochs", type=int, default=3, help="distillation epochs per student")
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--embryos", type=int, default=4, help="synthetic split size")
+    parser.add_argument("--frames", type=int, default=48, help="frames per synthetic embryo")
+    parser.add_argument("--data-root", default=None, help="real data in the trainer.py layout (data/splits/*.csv)")
+    parser.add_argument("--checkpoint", default=None, help="trained teacher weights (random weights otherwise)")
+    parser.add_argument("--lr", type=float, default=1e-3)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+    main(args.students, args.epochs, args.repeats, args.embryos, args.frames, args.data_root, args.checkpoint,
+         args.lr, out=args.out)
@@ -0,0 +1,64 @@
+"""
+Training throughput of the full model vs the temporal head on cached features.
+Usage: python benchmarks/bench_feature_cache.py [--batch 4] [--steps 5]
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import torch
+import torch.nn as nn
+
+from benchmarks.common import report
+from src.models.hybrid_model import EmbryoGenModel
+
+
+def train_steps_per_sec(model, forward, inputs, labels, steps):
+    criterion = nn.CrossEntropyLoss()
+    optimizer = torch.optim.AdamW([p for p in model.parameters() if p.requires_grad], lr=1e-4)
+    model.train()
+
+    def step():
+        optimizer.zero_grad()
+        loss = criterion(forward(*inputs).reshape(-1, 17), labels.reshape(-1))
+        loss.backward()
+        optimizer.step()
+
+    step()  # warmup
+    start = time.perf_counter()
+    for _ in range(steps):
+        step()
+    return steps / (time.perf_counter() - start)
+
+
+def main(batch, steps, window=16, out=None):
+    torch.manual_seed(0)
+    frames = torch.randn(batch, window, 3, 224, 224)
+    features = torch.randn(batch, window, 512)
+    times = torch.rand(batch, window) * 100
+    labels = torch.randint(0, 17, (batch, window))
+
+    model = EmbryoGenModel(num_classes=17, pretrained=False)
+    full = train_steps_per_sec(model, model, (frames, times), labels, steps)
+
+    model.feature_extractor.requires_grad_(False)
+    head = train_steps_per_sec(model, model.forward_features, (features, times), labels, steps * 20)
+
+    results = [
+        {"mode": "end_to_end", "batch": batch, "steps_per_sec": full, "windows_per_sec": full * batch},
+        {"mode": "cached_features", "batch": batch, "steps_per_sec": head, "windows_per_sec": head * batch},
+        {"mode": "speedup", "batch": batch, "steps_per_sec": head / full, "windows_per_sec": head / full},
+    ]
+    report("feature_cache", results, out)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch", type=int, default=4)
+    parser.add_argument("--steps", type=int, default=5)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+    main(args.batch, args.steps, out=args.out)
@@ -0,0 +1,98 @@
+"""
+Federated rounds with several in-process nodes against the aggregation server:
+bytes on the wire per round and server aggregation memory for each update
+encoding, next to an uncompressed full-state exchange (every node uploads its
+fp32 state_dict and the server buffers all of them before averaging).
+Local training is simulated by a random weight change per node; rel_error is
+the distance of the global model's total change over all rounds from exact
+FedAvg of those changes (error feedback bounds it as rounds accumulate).
+Usage: python benchmarks/bench_federated.py [--nodes 4] [--rounds 3]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import httpx
+import torch
+
+from benchmarks.common import report
+from src.federated.client import FederatedClient
+from src.federated.server import Aggregator, create_app
+from src.models.hybrid_model import EmbryoGenModel
+
+ENCODINGS = {
+    "fp32": ("fp32", None),
+    "fp16": ("fp16", None),
+    "int8": ("int8", None),
+    "int8_top1pct": ("int8", 0.01),
+    "fp16_top10pct": ("fp16", 0.1),
+}
+
+
+async def run_round(clients, round_, scale):
+    async def node(i, client):
+        await client.pull()
+        change = {}
+        with torch.no_grad():
+            generator = torch.Generator().manual_seed(1000 * round_ + i)
+            for name, p in client.model.named_parameters():
+                change[name] = scale * torch.randn(p.shape, generator=generator)
+                p.add_(change[name])
+        await client.push(num_samples=i + 1)
+        return change
+
+    return await asyncio.gather(*[node(i, c) for i, c in enumerate(clients)])
+
+
+def main(encodings, num_nodes, rounds, scale, out=None):
+    torch.manual_seed(0)
+    initial = EmbryoGenModel(num_classes=17, pretrained=False).state_dict()
+    state_bytes = sum(t.numel() * t.element_size() for t in initial.values())
+    results = [{"encoding": "full_state_fp32", "nodes": num_nodes, "uplink_mb_per_round": num_nodes * state_bytes / 2**20,
+                "downlink_mb_per_round": num_nodes * state_bytes / 2**20,
+                "aggregation_mb": (num_nodes + 1) * state_bytes / 2**20, "rel_error": 0.0}]
+    weights = torch.arange(1, num_nodes + 1, dtype=torch.float32)
+
+    for name in encodings:
+        codec, topk = ENCODINGS[name]
+        aggregator = Aggregator(initial, min_clients=num_nodes)
+        transport = httpx.ASGITransport(create_app(aggregator))
+        clients = [FederatedClient("http://server", EmbryoGenModel(num_classes=17, pretrained=False),
+                                   codec=codec, topk=topk, transport=transport) for _ in range(num_nodes)]
+        start = time.perf_counter()
+        exact = {}
+        for r in range(rounds):
+            changes = asyncio.run(run_round(clients, r, scale))
+            # Exact weighted FedAvg of this round's parameter changes
+            for pname in changes[0]:
+                exact[pname] = exact.get(pname, 0) + sum(w * c[pname] for w, c in zip(weights, changes)) / weights.sum()
+        seconds = time.perf_counter() - start
+        num = sum((aggregator.state[p] - initial[p] - e).pow(2).sum().item() for p, e in exact.items())
+        den = sum(e.pow(2).sum().item() for e in exact.values())
+        history = aggregator.history
+        results.append({
+            "encoding": name, "nodes": num_nodes,
+            "uplink_mb_per_round": sum(c.bytes_sent for c in clients) / rounds / 2**20,
+            "downlink_mb_per_round": sum(c.bytes_received for c in clients) / rounds / 2**20,
+            # The global weights plus the running sum, the largest chunk and the staged uploads' in-memory part
+            "aggregation_mb": (state_bytes + max(h["accumulator_bytes"] + h["peak_chunk_bytes"] + h["peak_staged_bytes"]
+                                                for h in history)) / 2**20,
+            "rel_error": (num / den) ** 0.5, "round_s": seconds / rounds,
+        })
+    print(f"state_dict: {state_bytes / 2**20:.1f} MB; rel_error of the global change over {rounds} rounds")
+    report("federated", results, out)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--encodings", nargs="+", default=list(ENCODINGS), choices=list(ENCODINGS))
+    parser.add_argument("--nodes", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--scale", type=float, default=1e-3, help="std of the simulated local weight change")
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+    main(args.encodings, args.nodes, args.rounds, args.scale, args.out)
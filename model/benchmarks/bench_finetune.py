@@ -0,0 +1,88 @@
+"""
+/fl/execute latency while a local fine-tuning job trains in the background
+(POST /fl/jobs on a synthetic data root), next to the idle baseline, for
+several training-process niceness levels. The job runs trainer.train() in a
+separate process with FL_TRAIN_THREADS intra-op threads.
+Usage: python benchmarks/bench_finetune.py [--frames 16] [--nice 0 10] [--epochs 1]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import httpx
+
+from benchmarks.bench_fl_decode import make_upload
+from benchmarks.common import report, start_fl_node
+from benchmarks.synthetic import make_labels, make_stacked_frames
+from src.serving.batching import percentile
+
+
+async def latencies_ms(app, images, csv, job=None, requests=8):
+    """Sequential /fl/execute calls: `requests` of them, or until the job submitted by `job` finishes."""
+    files = [("images", (f"f{i}.jpeg", b, "image/jpeg")) for i, b in enumerate(images)]
+    files.append(("clinical_data", ("data.csv", csv, "text/csv")))
+    samples = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://node", timeout=None) as http:
+        (await http.post("/fl/execute", files=files)).raise_for_status()  # warmup
+        status = None
+        if job is not None:
+            response = await http.post("/fl/jobs", json=job)
+            response.raise_for_status()
+            status = response.json()
+        while (status["state"] == "running") if status else len(samples) < requests:
+            start = time.perf_counter()
+            (await http.post("/fl/execute", files=files)).raise_for_status()
+            samples.append(1000 * (time.perf_counter() - start))
+            if status:
+                status = (await http.get(f"/fl/jobs/{status['job_id']}")).json()
+        if status and status["state"] != "done":
+            raise RuntimeError(f"Training job failed: {status.get('error')}")
+    return samples
+
+
+def main(frames, nice_levels, epochs, num_embryos, frames_per_embryo, out=None):
+    fl_node = start_fl_node()
+    images, csv = make_upload(frames)
+    results = []
+    with tempfile.TemporaryDirectory() as root:
+        root = Path(root)
+        labels = make_labels(num_embryos, frames_per_embryo)
+        (root / "data" / "splits").mkdir(parents=True)
+        for split in ("train", "val"):
+            labels.to_csv(root / "data" / "splits" / f"{split}.csv", index=False)
+        make_stacked_frames(root / "data" / "processed" / "stacked_frames", labels)
+        fl_node.jobs.root = root / "jobs"
+
+        samples = asyncio.run(latencies_ms(fl_node.app, images, csv))
+        results.append({"training": "idle", "requests": len(samples),
+                        "latency_ms_p50": percentile(samples, 50), "latency_ms_p99": percentile(samples, 99)})
+        job = {"epochs": epochs, "batch_size": 2, "data_root": str(root)}
+        for nice in nice_levels:
+            fl_node.jobs.nice = nice
+            start = time.perf_counter()
+            samples = asyncio.run(latencies_ms(fl_node.app, images, csv, job=job))
+            results.append({"training": f"nice={nice}", "requests": len(samples),
+                            "latency_ms_p50": percentile(samples, 50), "latency_ms_p99": percentile(samples, 99),
+                            "job_s": time.perf_counter() - start})
+    fl_node.batcher.stop()
+    fl_node.decoder.shutdown()
+    print(f"cpu_count={os.cpu_count()}, training threads={fl_node.jobs.threads}")
+    report("finetune", results, out)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=16, help="frames per /fl/execute upload")
+    parser.add_argument("--nice", type=int, nargs="+", default=[0, 10], help="training process niceness levels")
+    parser.add_argument("--epochs", type=int, default=1)
+    parser.add_argument("--embryos", type=int, default=2)
+    parser.add_argument("--frames-per-embryo", type=int, default=32)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+    main(args.frames, args.nice, args.epochs, args.embryos, args.frames_per_embryo, args.out)
@@ -0,0 +1,109 @@
+"""
+Load test for /fl/execute upload decoding: the old per-frame PIL -> transform
+loop on the event loop vs FrameDecoder (parallel decode into one uint8 batch,
+one vectorized normalize). Measures decode-only throughput and end-to-end
+requests/sec through an in-process ASGI client with concurrent uploads.
+Usage: python benchmarks/bench_fl_decode.py [--clients 4] [--requests 2] [--frames 100]
+"""
+import os
+import io
+import sys
+import time
+import asyncio
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import httpx
+import numpy as np
+import pandas as pd
+import torch
+from PIL import Image
+from torchvision import transforms
+
+from benchmarks.common import report, start_fl_node
+from benchmarks.synthetic import synthetic_image
+from src.data.transforms import IMAGENET_MEAN, IMAGENET_STD
+from src.serving.preprocess import FrameDecoder
+
+
+class LegacyDecoder:
+    """The pre-FrameDecoder path: decode and transform one frame at a time on the event loop."""
+    transform = transforms.Compose([
+        transforms.Resize((224, 224)),
+        transforms.ToTensor(),
+        transforms.Normalize(mean=IMAGENET_MEAN, std=IMAGENET_STD)
+    ])
+
+    async def decode_normalized(self, contents):
+        return torch.stack([self.transform(Image.open(io.BytesIO(c)).convert("RGB")) for c in contents])
+
+    def shutdown(self):
+        pass
+
+
+def make_upload(frames, size=500):
+    rng = np.random.default_rng(0)
+    images = []
+    for _ in range(frames):
+        buf = io.BytesIO()
+        Image.fromarray(synthetic_image(rng, size)).save(buf, format="JPEG", quality=90)
+        images.append(buf.getvalue())
+    csv = pd.DataFrame({"Time": np.arange(frames) * 0.25}).to_csv(index=False)
+    return images, csv
+
+
+async def decode_only(decoder, images, clients, requests):
+    async def client():
+        for _ in range(requests):
+            await decoder.decode_normalized(images)
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return clients * requests / (time.perf_counter() - start)
+
+
+async def end_to_end(app, images, csv, clients, requests):
+    files = [("images", (f"f{i}.jpeg", b, "image/jpeg")) for i, b in enumerate(images)]
+    files.append(("clinical_data", ("data.csv", csv, "text/csv")))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://node", timeout=None) as http:
+        async def client():
+            for _ in range(requests):
+                response = await http.post("/fl/execute", files=files)
+                response.raise_for_status()
+        start = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(clients)))
+    return clients * requests / (time.perf_counter() - start)
+
+
+def main(clients, requests, frames, workers, skip_e2e=False, out=None):
+    images, csv = make_upload(frames)
+    results = []
+    decoders = [("legacy", LegacyDecoder()), ("frame_decoder", FrameDecoder(workers=workers))]
+    for name, decoder in decoders:
+        results.append({"path": name, "stage": "decode_only", "frames": frames, "clients": clients,
+                        "requests_per_sec": asyncio.run(decode_only(decoder, images, clients, requests))})
+
+    if not skip_e2e:
+        fl_node = start_fl_node()
+        for name, decoder in decoders:
+            fl_node.decoder = decoder
+            results.append({"path": name, "stage": "end_to_end", "frames": frames, "clients": clients,
+                            "requests_per_sec": asyncio.run(end_to_end(fl_node.app, images, csv, clients, requests))})
+        fl_node.batcher.stop()
+
+    for _, decoder in decoders:
+        decoder.shutdown()
+    report("fl_decode", results, out)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=2)
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--skip-e2e", action="store_true")
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+    main(args.clients, args.requests, args.frames, args.workers, args.skip_e2e, args.out)
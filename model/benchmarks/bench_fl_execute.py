@@ -0,0 +1,61 @@
+"""
+/fl/execute latency through an in-process ASGI client: decode, micro-batched
+inference and response, for several upload sizes and concurrency levels.
+Usage: python benchmarks/bench_fl_execute.py [--frames 4 16 64] [--clients 1 4] [--requests 4]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import httpx
+
+from benchmarks.bench_fl_decode import make_upload
+from benchmarks.common import report, start_fl_node
+from src.serving.batching import percentile
+
+
+async def latencies_ms(app, images, csv, clients, requests):
+    files = [("images", (f"f{i}.jpeg", b, "image/jpeg")) for i, b in enumerate(images)]
+    files.append(("clinical_data", ("data.csv", csv, "text/csv")))
+    samples = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://node", timeout=None) as http:
+        async def client():
+            for _ in range(requests):
+                start = time.perf_counter()
+                response = await http.post("/fl/execute", files=files)
+                response.raise_for_status()
+                samples.append(1000 * (time.perf_counter() - start))
+        await client()  # warmup
+        samples.clear()
+        start = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(clients)))
+    return samples, clients * requests / (time.perf_counter() - start)
+
+
+def main(frame_counts, client_counts, requests, out=None):
+    fl_node = start_fl_node()
+    results = []
+    for frames in frame_counts:
+        images, csv = make_upload(frames)
+        for clients in client_counts:
+            samples, throughput = asyncio.run(latencies_ms(fl_node.app, images, csv, clients, requests))
+            results.append({"frames": frames, "clients": clients, "latency_ms_p50": percentile(samples, 50),
+                            "latency_ms_p99": percentile(samples, 99), "requests_per_sec": throughput})
+    fl_node.batcher.stop()
+    fl_node.decoder.shutdown()
+    report("fl_execute", results, out)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, nargs="+", default=[4, 16, 64])
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--requests", type=int, default=4)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+    main(args.frames, args.clients, args.requests, args.out)
@@ -0,0 +1,81 @@
+"""
+JPEG-path DataLoader throughput with window-level shuffling (every frame shared
+by two overlapping windows is decoded twice) vs EmbryoLocalityBatchSampler with
+a per-worker FrameCache, at several num_workers. Reports windows/sec, JPEG
+decodes per epoch and the cache hit rate.
+Usage: python benchmarks/bench_frame_cache.py [--embryos 8] [--frames 64] [--workers 0 2 4]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from torch.utils.data import DataLoader
+from torchvision import transforms
+
+from benchmarks.common import report
+from benchmarks.synthetic import make_labels, make_stacked_frames
+from src.data.dataset import EmbryoSequenceDataset
+from src.data.sampler import EmbryoLocalityBatchSampler
+from src.data.transforms import IMAGENET_MEAN, IMAGENET_STD
+
+
+def run_epochs(loader, epochs):
+    start = time.perf_counter()
+    windows = 0
+    for _ in range(epochs):
+        for frames, _, _ in loader:
+            windows += len(frames)
+    return windows / (time.perf_counter() - start)
+
+
+def main(num_embryos, frames_per_embryo, workers, batch_size, cache_mb, epochs, out=None):
+    # Random augmentation as in training: it runs after the cache, on every read
+    transform = transforms.Compose([
+        transforms.Resize((224, 224)),
+        transforms.RandomHorizontalFlip(),
+        transforms.ToTensor(),
+        transforms.Normalize(mean=IMAGENET_MEAN, std=IMAGENET_STD)
+    ])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        labels = make_labels(num_embryos, frames_per_embryo)
+        labels.to_csv(tmp / "labels.csv", index=False)
+        make_stacked_frames(tmp / "stacked_frames", labels)
+
+        results = []
+        for num_workers in workers:
+            plain = EmbryoSequenceDataset(tmp / "labels.csv", tmp / "stacked_frames", transform=transform)
+            frames_per_epoch = len(plain) * plain.window_size
+            loader = DataLoader(plain, batch_size=batch_size, shuffle=True, num_workers=num_workers)
+            results.append({"mode": "shuffle", "num_workers": num_workers,
+                            "windows_per_sec": run_epochs(loader, epochs),
+                            "decodes_per_epoch": frames_per_epoch, "hit_rate": 0.0})
+
+            cached = EmbryoSequenceDataset(tmp / "labels.csv", tmp / "stacked_frames", transform=transform,
+                                           frame_cache_bytes=cache_mb * 2**20)
+            sampler = EmbryoLocalityBatchSampler(cached, batch_size, num_workers, shuffle=True)
+            loader = DataLoader(cached, batch_sampler=sampler, num_workers=num_workers)
+            windows_per_sec = run_epochs(loader, epochs)
+            stats = cached.frame_cache.stats()
+            results.append({"mode": "locality_cache", "num_workers": num_workers, "windows_per_sec": windows_per_sec,
+                            "decodes_per_epoch": stats["misses"] / epochs, "hit_rate": stats["hit_rate"]})
+        report("frame_cache", results, out)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--embryos", type=int, default=8)
+    parser.add_argument("--frames", type=int, default=64)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 2, 4])
+    parser.add_argument("--batch", type=int, default=4)
+    parser.add_argument("--cache-mb", type=int, default=256)
+    parser.add_argument("--epochs", type=int, default=1)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+    main(args.embryos, args.frames, args.workers, args.batch, args.cache_mb, args.epochs, args.out)
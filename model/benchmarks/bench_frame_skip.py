@@ -0,0 +1,82 @@
+"""
+Adaptive frame skipping (data.keyframes) on a validation split, through the
+offline scorer: for each threshold, the share of frames that still go
+through the backbone, scoring time, and agreement of the per-frame
+predictions with full processing (plus accuracy against the labels).
+Runs on a synthetic split of near-static time-lapses by default, or on real
+data with --split / --frames-root (and --checkpoint, --time-dir).
+Usage: python benchmarks/bench_frame_skip.py [--thresholds 0.005 0.01 0.02 0.05] [--embryos 4] [--frames 64]
+"""
+import os
+import sys
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pandas as pd
+import torch
+
+from benchmarks.common import report
+from benchmarks.synthetic import make_annotation_tree, make_labels, make_timelapse_frames
+from src.data.master_labels import read_labels
+from src.models.hybrid_model import EmbryoGenModel
+from src.training.score import score_archive
+
+
+def main(thresholds, num_embryos, frames_per_embryo, split=None, frames_root=None, time_dir=None, checkpoint=None,
+         out=None):
+    torch.manual_seed(0)
+    model = EmbryoGenModel(num_classes=17, pretrained=False)
+    if checkpoint:
+        model.load_state_dict(torch.load(checkpoint, map_location="cpu", weights_only=True))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        if split is None:
+            labels = make_labels(num_embryos, frames_per_embryo)
+            frames_root = make_timelapse_frames(tmp / "stacked_frames", labels)
+            _, time_dir = make_annotation_tree(tmp / "raw", labels)
+        else:
+            labels = read_labels(split)
+        embryo_ids = sorted(labels["EmbryoID"].astype(str).unique())
+        events = labels.assign(EmbryoID=labels["EmbryoID"].astype(str)).set_index(["EmbryoID", "Frame"])["Event"]
+
+        def run(threshold):
+            stats = score_archive(model, tmp / f"scores_{threshold}", frames_root=frames_root, time_dir=time_dir,
+                                  skip_threshold=threshold, embryo_ids=embryo_ids)
+            scores = pd.read_parquet(tmp / f"scores_{threshold}")
+            scores["EmbryoID"] = scores["EmbryoID"].astype(str)
+            return stats, scores.sort_values(["EmbryoID", "Frame"]).reset_index(drop=True)
+
+        full_stats, full = run(0)
+        probs = [c for c in full.columns if c.startswith("p_")]
+        truth = events.reindex(pd.MultiIndex.from_frame(full[["EmbryoID", "Frame"]])).to_numpy()
+        results = []
+        for threshold in [0] + list(thresholds):
+            stats, scores = (full_stats, full) if threshold == 0 else run(threshold)
+            results.append({
+                "threshold": f"{threshold:g}", "frames": stats["frames"],
+                "encoded_frac": stats["frames_encoded"] / stats["frames"],
+                "score_s": stats["seconds"], "speedup": full_stats["seconds"] / stats["seconds"],
+                "agreement": float((scores["Prediction"].astype(str) == full["Prediction"].astype(str)).mean()),
+                "max_prob_diff": f"{(scores[probs] - full[probs]).abs().to_numpy().max():.1e}",
+                "accuracy": float((scores["Prediction"].astype(str).to_numpy() == truth).mean()),
+            })
+    report("frame_skip", results, out)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.005, 0.01, 0.02, 0.05])
+    parser.add_argument("--embryos", type=int, default=4, help="synthetic split size")
+    parser.add_argument("--frames", type=int, default=64, help="frames per synthetic embryo")
+    parser.add_argument("--split", default=None, help="real validation split, e.g. data/splits/val.csv")
+    parser.add_argument("--frames-root", default=None, help="stacked_frames directory of the split")
+    parser.add_argument("--time-dir", default=None)
+    parser.add_argument("--checkpoint", default=None, help="trained weights (random weights otherwise)")
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+    main(args.thresholds, args.embryos, args.frames, args.split, args.frames_root, args.time_dir, args.checkpoint,
+         args.out)
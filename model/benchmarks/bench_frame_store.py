@@ -0,0 +1,54 @@
+"""
+Windows/sec of EmbryoSequenceDataset: per-frame JPEG decoding vs packed frame store.
+Usage: python benchmarks/bench_frame_store.py [--embryos 8] [--frames 64]
+"""
+import os
+import sys
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from torchvision import transforms
+
+from benchmarks.common import rate, report
+from benchmarks.synthetic import make_labels, make_stacked_frames
+from src.data.dataset import EmbryoSequenceDataset
+from src.data.frame_store import convert_stacked_frames
+from src.data.transforms import IMAGENET_MEAN, IMAGENET_STD
+
+
+def main(num_embryos, frames_per_embryo, out=None):
+    transform = transforms.Compose([
+        transforms.Resize((224, 224)),
+        transforms.ToTensor(),
+        transforms.Normalize(mean=IMAGENET_MEAN, std=IMAGENET_STD)
+    ])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        labels = make_labels(num_embryos, frames_per_embryo)
+        labels.to_csv(tmp / "labels.csv", index=False)
+        make_stacked_frames(tmp / "stacked_frames", labels)
+        convert_stacked_frames(tmp / "stacked_frames", tmp / "frame_store")
+
+        jpeg_ds = EmbryoSequenceDataset(tmp / "labels.csv", tmp / "stacked_frames", transform=transform)
+        packed_ds = EmbryoSequenceDataset(tmp / "labels.csv", tmp / "stacked_frames", frame_store=tmp / "frame_store")
+
+        n = len(jpeg_ds)
+        results = []
+        for name, ds in [("jpeg", jpeg_ds), ("packed", packed_ds)]:
+            results.append({"backend": name, "windows": n, "windows_per_sec": rate(lambda i: ds[i], n)})
+        results.append({"backend": "speedup", "windows": n,
+                        "windows_per_sec": results[1]["windows_per_sec"] / results[0]["windows_per_sec"]})
+        report("frame_store", results, out)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--embryos", type=int, default=8)
+    parser.add_argument("--frames", type=int, default=64)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+    main(args.embryos, args.frames, args.out)
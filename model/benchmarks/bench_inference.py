@@ -0,0 +1,68 @@
+"""
+Whole-time-lapse scoring: shared per-frame features (score_sequence) vs
+running the full model on every overlapping 16-frame window.
+Reports CPU seconds and peak RSS per sequence length; each measurement runs
+in a fresh process so the RSS high-water mark is not shared between runs.
+Usage: python benchmarks/bench_inference.py [--lengths 32 64 128]
+"""
+import os
+import sys
+import time
+import argparse
+import resource
+import multiprocessing as mp
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import torch
+
+from benchmarks.common import report
+from src.models.hybrid_model import EmbryoGenModel
+from src.models.inference import score_sequence, window_starts
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+@torch.no_grad()
+def per_window(model, frames, times, window_size=16, stride=8):
+    """The naive path: every window re-encodes all of its frames."""
+    for s in window_starts(len(frames), window_size, stride):
+        model(frames[s:s + window_size].unsqueeze(0), times[s:s + window_size].unsqueeze(0))
+
+
+def run_one(mode, n, queue):
+    torch.manual_seed(0)
+    model = EmbryoGenModel(num_classes=17, pretrained=False).eval()
+    frames = torch.randn(n, 3, 224, 224)
+    times = torch.arange(n, dtype=torch.float32) * 0.25
+    fn = per_window if mode == "per_window" else score_sequence
+
+    baseline = peak_rss_mb()
+    start = time.process_time()
+    fn(model, frames, times)
+    queue.put((time.process_time() - start, peak_rss_mb(), baseline))
+
+
+def main(lengths, out=None):
+    ctx = mp.get_context("spawn")
+    results = []
+    for n in lengths:
+        for mode in ("per_window", "score_sequence"):
+            queue = ctx.Queue()
+            proc = ctx.Process(target=run_one, args=(mode, n, queue))
+            proc.start()
+            cpu, peak, baseline = queue.get()
+            proc.join()
+            results.append({"mode": mode, "frames": n, "cpu_s": cpu, "cpu_ms_per_frame": 1000 * cpu / n,
+                            "peak_rss_mb": peak, "peak_over_inputs_mb": peak - baseline})
+    report("inference", results, out)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lengths", type=int, nargs="+", default=[32, 64, 128])
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+    main(args.lengths, args.out)
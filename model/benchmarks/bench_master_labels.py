@@ -0,0 +1,73 @@
+"""
+merge_range_context on a synthetic annotation tree: the original iterrows
+expansion vs the vectorized one, serial vs worker pool, CSV vs columnar output.
+Usage: python benchmarks/bench_master_labels.py [--embryos 10000] [--frames 300] [--workers 4]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pandas as pd
+
+from benchmarks.common import report
+from benchmarks.synthetic import make_labels, make_annotation_tree
+from src.data import master_labels
+from src.data.master_labels import merge_range_context, read_labels
+
+
+def iterrows_expand(df_anno):
+    """The pre-vectorization range expansion, kept for comparison."""
+    unpacked_frames = []
+    for _, row in df_anno.iterrows():
+        for f_num in range(int(row['Start']), int(row['End']) + 1):
+            unpacked_frames.append({'Frame': f_num, 'Event': row['Event']})
+    return pd.DataFrame(unpacked_frames)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main(num_embryos, frames_per_embryo, workers, out=None):
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        labels = make_labels(num_embryos, frames_per_embryo)
+        anno_dir, time_dir = make_annotation_tree(tmp / "raw", labels)
+        rows = len(labels)
+
+        results = []
+        vectorized = master_labels.expand_ranges
+        master_labels.expand_ranges = iterrows_expand
+        try:
+            seconds = timed(lambda: merge_range_context(anno_dir, time_dir, tmp / "legacy.csv"))
+        finally:
+            master_labels.expand_ranges = vectorized
+        results.append({"mode": "iterrows", "workers": 1, "output": "csv", "seconds": seconds})
+
+        for n_workers, suffix in [(1, "csv"), (workers, "csv"), (workers, "parquet"), (workers, "feather")]:
+            path = tmp / f"master_{n_workers}.{suffix}"
+            seconds = timed(lambda: merge_range_context(anno_dir, time_dir, path, workers=n_workers))
+            read_seconds = timed(lambda: read_labels(path))
+            results.append({"mode": "vectorized", "workers": n_workers, "output": suffix, "seconds": seconds,
+                            "read_seconds": read_seconds, "mb": path.stat().st_size / 2**20})
+
+        for row in results:
+            row["rows_per_sec"] = rows / row["seconds"]
+        report("master_labels", results, out)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--embryos", type=int, default=10000)
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+    main(args.embryos, args.frames, args.workers, args.out)
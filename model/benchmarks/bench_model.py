@@ -0,0 +1,68 @@
+"""
+EmbryoGenModel latency across (B, T): inference forward, and a training
+forward + backward + optimizer step as in trainer.py.
+Usage: python benchmarks/bench_model.py [--shapes 1x16 4x16] [--repeats 3]
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import torch
+import torch.nn as nn
+
+from benchmarks.common import report
+from src.models.hybrid_model import EmbryoGenModel
+
+
+def median_ms(fn, repeats):
+    fn()  # warmup
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(1000 * (time.perf_counter() - start))
+    return statistics.median(samples)
+
+
+def main(shapes, repeats, out=None):
+    torch.manual_seed(0)
+    model = EmbryoGenModel(num_classes=17, pretrained=False)
+    criterion = nn.CrossEntropyLoss(label_smoothing=0.1)
+    optimizer = torch.optim.AdamW(model.parameters(), lr=5e-5)
+
+    results = []
+    for b, t in shapes:
+        frames = torch.randn(b, t, 3, 224, 224)
+        times = torch.arange(t, dtype=torch.float32).repeat(b, 1)
+        labels = torch.randint(0, 17, (b, t))
+
+        @torch.no_grad()
+        def forward():
+            model(frames, times)
+
+        def train_step():
+            optimizer.zero_grad()
+            loss = criterion(model(frames, times).reshape(-1, 17), labels.reshape(-1))
+            loss.backward()
+            optimizer.step()
+
+        model.eval()
+        forward_ms = median_ms(forward, repeats)
+        model.train()
+        train_ms = median_ms(train_step, repeats)
+        results.append({"batch": b, "window": t, "forward_ms": forward_ms, "train_step_ms": train_ms,
+                        "train_frames_per_sec": 1000 * b * t / train_ms})
+    report("model", results, out)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shapes", nargs="+", default=["1x16", "4x16", "1x8"], help="BxT window shapes")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+    main([tuple(int(x) for x in s.split("x")) for s in args.shapes], args.repeats, args.out)
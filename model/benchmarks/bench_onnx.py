@@ -0,0 +1,61 @@
+"""
+Throughput of eager PyTorch vs the exported ONNX graphs under ONNX Runtime (CPU EP),
+for several intra-op thread counts and (B, T) window shapes.
+Usage: python benchmarks/bench_onnx.py [--checkpoint best_model.pth] [--threads 1 4]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import torch
+
+from benchmarks.common import report
+from src.serving.loading import load_model
+from src.serving.onnx_backend import OnnxModel, export_onnx
+
+
+@torch.no_grad()
+def windows_per_sec(model, b, t, repeats):
+    frames = torch.randn(b, t, 3, 224, 224)
+    times = torch.arange(t, dtype=torch.float32).repeat(b, 1)
+    model(frames, times)  # warmup
+    start = time.perf_counter()
+    for _ in range(repeats):
+        model(frames, times)
+    return repeats * b / (time.perf_counter() - start)
+
+
+def main(shapes, threads, repeats, checkpoint=None, out=None):
+    torch.manual_seed(0)
+    model = load_model(checkpoint=checkpoint, pretrained=False)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        export_onnx(model, tmp)
+        print(f"Exported in {time.perf_counter() - start:.1f}s")
+
+        runners = [(f"torch_eager/{torch.get_num_threads()}t", model)]
+        runners += [(f"onnxruntime/{n}t", OnnxModel(tmp, intra_op_threads=n)) for n in threads]
+        for name, runner in runners:
+            row = {"runtime": name}
+            for b, t in shapes:
+                row[f"windows_per_s_{b}x{t}"] = windows_per_sec(runner, b, t, repeats)
+            results.append(row)
+    report("onnx", results, out)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shapes", nargs="+", default=["1x16", "4x16"], help="BxT window shapes")
+    parser.add_argument("--threads", type=int, nargs="+", default=sorted({1, os.cpu_count() or 1}),
+                        help="ONNX Runtime intra-op thread counts")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--checkpoint", default=None)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+    shapes = [tuple(int(x) for x in s.split("x")) for s in args.shapes]
+    main(shapes, args.threads, args.repeats, args.checkpoint, args.out)
@@ -0,0 +1,99 @@
+"""
+Memory/speed trade-offs of trainer.train: one training epoch per combination of
+precision (fp32/bf16), backbone activation checkpointing and gradient
+accumulation at a fixed effective batch, reported as samples (windows)/sec and
+peak RSS. Each combination runs in a fresh process so the RSS high-water mark
+is its own.
+Usage: python benchmarks/bench_precision.py [--precisions fp32 bf16] [--chunks 0 4] [--accum 1 4]
+"""
+import os
+import sys
+import json
+import argparse
+import resource
+import tempfile
+import subprocess
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.common import report
+from benchmarks.synthetic import make_labels, make_stacked_frames
+
+
+def worker(root, precision, chunk, batch_size, accum):
+    """Runs in a subprocess: one epoch of the real training loop, then prints its peak RSS."""
+    os.chdir(root)
+    sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+    from training import trainer
+
+    trainer.EPOCHS = 1
+    trainer.BATCH_SIZE = batch_size
+    trainer.ACCUM_STEPS = accum
+    trainer.PRECISION = precision
+    trainer.CHECKPOINT_CHUNK = chunk or None
+    trainer.PRETRAINED = False
+    trainer.INSTRUMENT = True
+    trainer.FRAME_STORE = "data/processed/frame_store"
+    trainer.SAVE_DIR = Path(os.environ["BENCH_SAVE_DIR"])
+    trainer.train()
+    print(json.dumps({"peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+
+
+def run(root, name, precision, chunk, batch_size, accum):
+    save_dir = Path(root) / name
+    save_dir.mkdir()
+    proc = subprocess.run([sys.executable, __file__, "--worker", "--root", str(root), "--precisions", precision,
+                           "--chunks", str(chunk), "--batch", str(batch_size), "--accum", str(accum)],
+                          env={**os.environ, "BENCH_SAVE_DIR": str(save_dir)},
+                          check=True, capture_output=True, text=True)
+    peak = json.loads(proc.stdout.strip().splitlines()[-1])["peak_rss_mb"]
+    records = [json.loads(line) for line in open(save_dir / "timing.jsonl")]
+    return next(r["seconds"] for r in records if r["phase"] == "train"), peak
+
+
+def main(precisions, chunks, accums, effective_batch, num_embryos, frames_per_embryo, out=None):
+    from src.data.dataset import EmbryoSequenceDataset
+    from src.data.frame_store import convert_stacked_frames
+
+    with tempfile.TemporaryDirectory() as root:
+        root = Path(root)
+        labels = make_labels(num_embryos, frames_per_embryo)
+        (root / "data" / "splits").mkdir(parents=True)
+        for split in ("train", "val"):
+            labels.to_csv(root / "data" / "splits" / f"{split}.csv", index=False)
+        make_stacked_frames(root / "data" / "processed" / "stacked_frames", labels)
+        convert_stacked_frames(root / "data" / "processed" / "stacked_frames", root / "data" / "processed" / "frame_store")
+        windows = len(EmbryoSequenceDataset(root / "data" / "splits" / "train.csv",
+                                            root / "data" / "processed" / "stacked_frames"))
+
+        results = []
+        for precision in precisions:
+            for chunk in chunks:
+                for accum in accums:
+                    # Same effective batch: smaller micro-batches, more of them per optimizer step
+                    batch_size = max(1, effective_batch // accum)
+                    name = f"{precision}_c{chunk}_a{accum}"
+                    seconds, peak = run(root, name, precision, chunk, batch_size, accum)
+                    results.append({"precision": precision, "checkpoint_chunk": chunk, "accum_steps": accum,
+                                    "micro_batch": batch_size, "windows": windows, "epoch_s": seconds,
+                                    "samples_per_sec": windows / seconds, "peak_rss_mb": peak})
+    report("precision", results, out)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--precisions", nargs="+", default=["fp32", "bf16"])
+    parser.add_argument("--chunks", type=int, nargs="+", default=[0, 4], help="backbone checkpoint chunk (0 = off)")
+    parser.add_argument("--accum", type=int, nargs="+", default=[1, 4], help="gradient accumulation steps")
+    parser.add_argument("--batch", type=int, default=4, help="effective batch size (micro-batch in --worker mode)")
+    parser.add_argument("--embryos", type=int, default=4)
+    parser.add_argument("--frames", type=int, default=48)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--root", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+    if args.worker:
+        worker(args.root, args.precisions[0], args.chunks[0], args.batch, args.accum[0])
+    else:
+        main(args.precisions, args.chunks, args.accum, args.batch, args.embryos, args.frames, args.out)
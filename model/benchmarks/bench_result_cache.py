@@ -0,0 +1,79 @@
+"""
+/fl/execute with the content-addressed result cache: the first (miss)
+request, re-submissions served from memory, from the on-disk tier after a
+restart (fresh cache over the same directory), and bursts of identical
+concurrent uploads, where coalescing runs one decode + inference per burst.
+Usage: python benchmarks/bench_result_cache.py [--frames 16 64] [--clients 8] [--requests 4]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import httpx
+
+from benchmarks.bench_fl_decode import make_upload
+from benchmarks.common import report, start_fl_node
+from src.serving.batching import percentile
+from src.serving.result_cache import ResultCache
+
+
+async def latencies_ms(app, files, clients, requests):
+    """`clients` concurrent identical uploads, `requests` times; returns latencies and wall seconds."""
+    samples = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://node", timeout=None) as http:
+        async def one():
+            start = time.perf_counter()
+            (await http.post("/fl/execute", files=files)).raise_for_status()
+            samples.append(1000 * (time.perf_counter() - start))
+
+        start = time.perf_counter()
+        for _ in range(requests):
+            await asyncio.gather(*(one() for _ in range(clients)))
+    return samples, time.perf_counter() - start
+
+
+def main(frame_counts, clients, requests, out=None):
+    fl_node = start_fl_node(result_cache_mb=64)
+    version = fl_node.result_cache.version
+    results = []
+    with tempfile.TemporaryDirectory() as disk_dir:
+        for frames in frame_counts:
+            images, csv = make_upload(frames)
+            files = [("images", (f"f{i}.jpeg", b, "image/jpeg")) for i, b in enumerate(images)]
+            files.append(("clinical_data", ("data.csv", csv, "text/csv")))
+
+            def run(case, cache, n_clients, n_requests):
+                fl_node.result_cache = cache
+                misses = cache.counters["misses"] if cache is not None else 0
+                samples, seconds = asyncio.run(latencies_ms(fl_node.app, files, n_clients, n_requests))
+                # Requests that went through decode + inference
+                computed = cache.counters["misses"] - misses if cache is not None else len(samples)
+                results.append({"frames": frames, "case": case, "requests": len(samples), "computed": computed,
+                                "latency_ms_p50": percentile(samples, 50), "latency_ms_p99": percentile(samples, 99),
+                                "requests_per_sec": len(samples) / seconds})
+
+            run("no_cache", None, 1, requests)
+            cache = ResultCache(version, disk_dir=disk_dir)
+            run("miss", cache, 1, 1)
+            run("memory_hit", cache, 1, requests)
+            run("disk_hit_after_restart", ResultCache(version, disk_dir=disk_dir), 1, 1)
+            run("concurrent_no_cache", None, clients, 1)
+            run("concurrent_coalesced", ResultCache(version), clients, 1)
+    fl_node.batcher.stop()
+    fl_node.decoder.shutdown()
+    report("result_cache", results, out)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, nargs="+", default=[16, 64])
+    parser.add_argument("--clients", type=int, default=8, help="identical uploads sent at once")
+    parser.add_argument("--requests", type=int, default=4)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+    main(args.frames, args.clients, args.requests, args.out)
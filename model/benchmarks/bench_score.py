@@ -0,0 +1,93 @@
+"""
+Offline archive scoring (src/training/score.py) against scoring one embryo
+at a time (decode the whole time-lapse, then score_sequence), as the HTTP
+node does per request. Reports embryos/hour, frames/sec and peak RSS for
+several archive sizes; each run is a fresh process so the RSS high-water
+mark is its own and should stay flat as the archive grows.
+Usage: python benchmarks/bench_score.py [--embryos 4 8] [--frames 48] [--workers 2]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import subprocess
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.common import report
+from benchmarks.synthetic import make_annotation_tree, make_labels, make_stacked_frames
+
+MODES = ("per_embryo", "pipeline")
+
+
+def worker(root, mode, workers):
+    """Runs in a subprocess: scores the archive under `root`, then prints its stats and peak RSS."""
+    import torch
+    from src.data.transforms import normalize_window
+    from src.models.hybrid_model import EmbryoGenModel
+    from src.models.inference import score_sequence
+    from src.training.score import list_embryo_ids, open_embryo, score_archive
+
+    torch.manual_seed(0)
+    model = EmbryoGenModel(num_classes=17, pretrained=False).eval()
+    frames_root, time_dir = root / "stacked_frames", root / "raw" / "embryo_dataset_time_elapsed"
+    if mode == "pipeline":
+        stats = score_archive(model, root / f"scores_{workers}", frames_root=frames_root, time_dir=time_dir,
+                              workers=workers)
+    else:
+        start, num_frames = time.perf_counter(), 0
+        for emb_id in list_embryo_ids(frames_root):
+            embryo = open_embryo(emb_id, frames_root=frames_root, time_dir=time_dir)
+            frames = torch.from_numpy(embryo["read"](0, len(embryo["frame_nums"])))
+            torch.softmax(score_sequence(model, frames, embryo["times"], preprocess=normalize_window), dim=-1)
+            num_frames += len(frames)
+        seconds = time.perf_counter() - start
+        stats = {"embryos": len(list_embryo_ids(frames_root)), "frames": num_frames, "seconds": seconds,
+                 "embryos_per_hour": 3600 * len(list_embryo_ids(frames_root)) / seconds,
+                 "frames_per_sec": num_frames / seconds}
+    stats["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps(stats))
+
+
+def run(root, mode, workers):
+    proc = subprocess.run([sys.executable, __file__, "--worker", "--root", str(root), "--modes", mode,
+                           "--workers", str(workers)], check=True, capture_output=True, text=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main(modes, embryo_counts, frames_per_embryo, workers, out=None):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for num_embryos in embryo_counts:
+            root = Path(tmp) / f"archive_{num_embryos}"
+            labels = make_labels(num_embryos, frames_per_embryo)
+            make_stacked_frames(root / "stacked_frames", labels)
+            make_annotation_tree(root / "raw", labels)
+            for mode in modes:
+                stats = run(root, mode, workers)
+                results.append({"mode": mode, "embryos": num_embryos, "frames": stats["frames"],
+                                "workers": workers if mode == "pipeline" else 0,
+                                "embryos_per_hour": stats["embryos_per_hour"], "frames_per_sec": stats["frames_per_sec"],
+                                "peak_rss_mb": stats["peak_rss_mb"]})
+    print(f"cpu_count={os.cpu_count()}")
+    report("score", results, out)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=MODES)
+    parser.add_argument("--embryos", type=int, nargs="+", default=[4, 8], help="archive sizes")
+    parser.add_argument("--frames", type=int, default=48, help="frames per embryo")
+    parser.add_argument("--workers", type=int, default=2, help="decoder threads of the pipeline")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--root", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+    if args.worker:
+        worker(Path(args.root), args.modes[0], args.workers)
+    else:
+        main(args.modes, args.embryos, args.frames, args.workers, args.out)
@@ -0,0 +1,51 @@
+"""
+Per-update cost of streaming sessions vs re-uploading and re-scoring the
+whole sequence every time a new frame arrives.
+Usage: python benchmarks/bench_sessions.py [--lengths 16 48 96]
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import torch
+
+from benchmarks.common import report
+from src.models.hybrid_model import EmbryoGenModel
+from src.models.inference import score_sequence
+from src.serving.sessions import SessionStore
+
+
+@torch.no_grad()
+def main(lengths, out=None):
+    torch.manual_seed(0)
+    model = EmbryoGenModel(num_classes=17, pretrained=False).eval()
+    store = SessionStore(model)
+    results = []
+    for n in lengths:
+        frames = torch.randn(n + 1, 3, 224, 224)
+        times = torch.arange(n + 1, dtype=torch.float32) * 0.25
+
+        session_id = store.create()
+        store.append(session_id, frames[:n], times[:n])
+        start = time.perf_counter()
+        store.append(session_id, frames[n:], times[n:])
+        store.timeline(session_id)
+        incremental = time.perf_counter() - start
+
+        start = time.perf_counter()
+        score_sequence(model, frames, times)
+        full = time.perf_counter() - start
+
+        results.append({"frames": n + 1, "session_update_ms": 1000 * incremental, "full_rescore_ms": 1000 * full})
+    report("sessions", results, out)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lengths", type=int, nargs="+", default=[16, 48, 96])
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+    main(args.lengths, args.out)
@@ -0,0 +1,100 @@
+"""
+Cold start of fl_node: process launch -> /fl/ready -> first successful /fl/execute.
+Each mode starts a fresh uvicorn process with a random-weight checkpoint
+(or its TorchScript export) written to a temp dir.
+Usage: python benchmarks/bench_startup.py [--modes checkpoint torchscript pretrained]
+('pretrained' needs network access for the ImageNet backbone.)
+"""
+import io
+import os
+import sys
+import time
+import socket
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import httpx
+import torch
+from PIL import Image
+
+from benchmarks.common import report
+from src.models.hybrid_model import EmbryoGenModel
+from src.serving.loading import export_torchscript
+
+MODEL_ROOT = Path(__file__).resolve().parents[1]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def execute_payload(num_frames):
+    buf = io.BytesIO()
+    Image.new("RGB", (224, 224), color="red").save(buf, format="JPEG")
+    csv = "Time\n" + "\n".join(str(15 * i) for i in range(num_frames))
+    return [("images", (f"f{i}.jpg", buf.getvalue(), "image/jpeg")) for i in range(num_frames)] + \
+           [("clinical_data", ("data.csv", csv, "text/csv"))]
+
+
+def measure(env, num_frames, timeout):
+    port = free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "src.fl_node:app", "--port", str(port)],
+                            cwd=MODEL_ROOT, env={**os.environ, **env},
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    result = {}
+    try:
+        with httpx.Client(base_url=url, timeout=60) as client:
+            while "ready_s" not in result:
+                if time.perf_counter() - start > timeout or proc.poll() is not None:
+                    raise RuntimeError(f"Node did not become ready: {env}")
+                try:
+                    if client.get("/fl/ready").status_code == 200:
+                        result["ready_s"] = time.perf_counter() - start
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.02)
+            response = client.post("/fl/execute", files=execute_payload(num_frames))
+            response.raise_for_status()
+            result["first_response_s"] = time.perf_counter() - start
+            result.update({k: v for k, v in client.get("/fl/ready").json().items() if k != "ready"})
+    finally:
+        proc.terminate()
+        proc.wait()
+    return result
+
+
+def main(modes, warmup_steps, num_frames, timeout, out=None):
+    with tempfile.TemporaryDirectory() as tmp:
+        checkpoint = Path(tmp) / "model.pth"
+        torch.save(EmbryoGenModel(pretrained=False).state_dict(), checkpoint)
+        envs = {"checkpoint": {"FL_CHECKPOINT": str(checkpoint)}, "pretrained": {"FL_PRETRAINED": "1"}}
+        if "torchscript" in modes:
+            export_torchscript(checkpoint, Path(tmp) / "model.ts")
+            envs["torchscript"] = {"FL_TORCHSCRIPT": str(Path(tmp) / "model.ts")}
+
+        results = []
+        for mode in modes:
+            for steps in warmup_steps:
+                env = {**envs[mode], "FL_WARMUP_STEPS": str(steps)}
+                results.append({"mode": mode, "warmup_steps": steps, **measure(env, num_frames, timeout)})
+    report("startup", results, out)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modes", nargs="+", default=["checkpoint", "torchscript"],
+                        choices=["checkpoint", "torchscript", "pretrained"])
+    parser.add_argument("--warmup-steps", type=int, nargs="+", default=[0, 2])
+    parser.add_argument("--frames", type=int, default=16)
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+    main(args.modes, args.warmup_steps, args.frames, args.timeout, args.out)
@@ -0,0 +1,79 @@
+"""
+Startup time and memory of the EmbryoSequenceDataset window index at
+1k / 10k / 100k windows, against the previous list-of-DataFrame-slices index,
+and reloaded from the on-disk index cache.
+Usage: python benchmarks/bench_window_index.py [--windows 1000 10000 100000]
+"""
+import os
+import sys
+import time
+import pickle
+import argparse
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pandas as pd
+
+from benchmarks.common import report
+from benchmarks.synthetic import make_labels, make_empty_frames
+from src.data.dataset import EmbryoSequenceDataset
+
+FRAMES_PER_EMBRYO = 400   # 49 windows per embryo at window_size=16, stride=8
+
+
+def legacy_windows(csv_path, window_size=16, stride=8):
+    """The pre-array index: one DataFrame slice per window."""
+    df = pd.read_csv(csv_path)
+    windows = []
+    for _, group in df.groupby("EmbryoID"):
+        group = group.sort_values("Frame")
+        for start in range(0, len(group) - window_size + 1, stride):
+            windows.append(group.iloc[start:start + window_size])
+    return windows
+
+
+def measure(build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    obj = build()
+    seconds = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, seconds, current / 2**20, peak / 2**20
+
+
+def main(window_counts, out=None):
+    per_embryo = (FRAMES_PER_EMBRYO - 16) // 8 + 1
+    results = []
+    for n_windows in window_counts:
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            labels = make_labels(max(1, n_windows // per_embryo), FRAMES_PER_EMBRYO)
+            labels.to_csv(tmp / "labels.csv", index=False)
+            make_empty_frames(tmp / "frames", labels)
+
+            windows, seconds, held, peak = measure(lambda: legacy_windows(tmp / "labels.csv"))
+            results.append({"index": "dataframe_slices", "windows": len(windows), "startup_s": seconds,
+                            "retained_mb": held, "peak_mb": peak, "pickled_mb": len(pickle.dumps(windows)) / 2**20})
+            del windows
+
+            for name, build in [
+                ("numpy_arrays", lambda: EmbryoSequenceDataset(tmp / "labels.csv", tmp / "frames", cache_index=False)),
+                ("cache_build", lambda: EmbryoSequenceDataset(tmp / "labels.csv", tmp / "frames")),
+                ("cache_hit", lambda: EmbryoSequenceDataset(tmp / "labels.csv", tmp / "frames")),
+            ]:
+                ds, seconds, held, peak = measure(build)
+                results.append({"index": name, "windows": len(ds), "startup_s": seconds,
+                                "retained_mb": held, "peak_mb": peak, "pickled_mb": len(pickle.dumps(ds)) / 2**20})
+    report("window_index", results, out)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--windows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+    main(args.windows, args.out)
@@ -0,0 +1,44 @@
+import json
+import time
+import platform
+from pathlib import Path
+
+
+def rate(fn, n, warmup=1):
+    """Calls fn(i) for i in range(n) and returns calls per second."""
+    for i in range(min(warmup, n)):
+        fn(i)
+    start = time.perf_counter()
+    for i in range(n):
+        fn(i)
+    return n / (time.perf_counter() - start)
+
+
+def report(name, results, out=None):
+    """Prints a result table and optionally appends it as JSON to `out`."""
+    print(f"\n--- {name} ---")
+    for row in results:
+        print("  " + " | ".join(f"{k}={v:.2f}" if isinstance(v, float) else f"{k}={v}" for k, v in row.items()))
+
+    if out is not None:
+        Path(out).parent.mkdir(parents=True, exist_ok=True)
+        record = {"benchmark": name, "python": platform.python_version(), "time": time.time(), "results": results}
+        with open(out, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+def start_fl_node(warmup_steps=1, result_cache_mb=0):
+    """
+    Imports fl_node and loads its model in-process as the lifespan would:
+    in-process ASGI clients (httpx.ASGITransport) don't run lifespan events.
+    Without FL_CHECKPOINT / FL_TORCHSCRIPT / FL_ONNX_DIR the weights are random (no download).
+    The result cache is off by default: benchmarks re-send the same upload.
+    """
+    from src import fl_node
+    if not (fl_node.CHECKPOINT or fl_node.TORCHSCRIPT or fl_node.ONNX_DIR):
+        fl_node.PRETRAINED = False
+    fl_node.WARMUP_STEPS = warmup_steps
+    fl_node.RESULT_CACHE_MB = result_cache_mb
+    if not fl_node.startup["ready"]:
+        fl_node.load_and_warmup()
+    return fl_node
@@ -0,0 +1,61 @@
+"""
+Compares two run_suite.py result files and flags regressions.
+Rows are matched on their non-numeric fields; each numeric metric is reported as new/old.
+Usage: python benchmarks/compare.py base.json new.json [--threshold 0.1]
+"""
+import sys
+import json
+import argparse
+
+# Metric name fragments where larger is better; everything else (times, sizes, diffs) is lower-is-better
+HIGHER_IS_BETTER = ("per_sec", "per_s", "fps", "speedup", "agreement", "throughput")
+
+
+def row_key(row):
+    return tuple(sorted((k, v) for k, v in row.items() if not isinstance(v, float)))
+
+
+def compare(base, new, threshold):
+    regressions = []
+    for name, new_bench in new["benchmarks"].items():
+        base_bench = base["benchmarks"].get(name)
+        if base_bench is None:
+            continue
+        for table, new_rows in new_bench["results"].items():
+            # Rows with identical keys (e.g. workers == cpu_count) are matched in order
+            base_rows = {}
+            for r in base_bench["results"].get(table, []):
+                base_rows.setdefault(row_key(r), []).append(r)
+            for row in new_rows:
+                candidates = base_rows.get(row_key(row))
+                if not candidates:
+                    continue
+                old = candidates.pop(0)
+                label = ", ".join(f"{k}={v}" for k, v in row_key(row))
+                for metric, value in row.items():
+                    if not isinstance(value, float) or not old.get(metric):
+                        continue
+                    ratio = value / old[metric]
+                    better = ratio > 1 if any(h in metric for h in HIGHER_IS_BETTER) else ratio < 1
+                    worse_by = (1 / ratio - 1) if any(h in metric for h in HIGHER_IS_BETTER) else ratio - 1
+                    flag = "REGRESSION" if not better and worse_by > threshold else ""
+                    print(f"{table:>14} | {label} | {metric}: {old[metric]:.4g} -> {value:.4g} (x{ratio:.2f}) {flag}")
+                    if flag:
+                        regressions.append((table, label, metric))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative slowdown that counts as a regression")
+    args = parser.parse_args()
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    print(f"base {base['commit']} -> new {new['commit']}")
+    regressions = compare(base, new, args.threshold)
+    print(f"{len(regressions)} regression(s) above {args.threshold:.0%}")
+    sys.exit(1 if regressions else 0)
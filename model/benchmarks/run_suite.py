@@ -0,0 +1,112 @@
+"""
+Runs the benchmark suite and writes one machine-readable JSON document per run,
+tagged with the git commit, so results can be compared between commits
+(benchmarks/compare.py). Every benchmark runs in its own process.
+Usage: python benchmarks/run_suite.py [--scale quick|full] [--only model dataloader] [--out results.json]
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+MODEL_ROOT = BENCH_DIR.parent
+
+# name -> (script, quick args, full args); full args = the script's own defaults
+SUITE = {
+    "master_labels": ("bench_master_labels.py", ["--embryos", "200", "--frames", "100"], []),
+    "stacking": ("bench_stacking.py", ["--embryos", "2", "--frames", "16"], []),
+    "window_index": ("bench_window_index.py", ["--windows", "1000", "10000"], []),
+    "frame_store": ("bench_frame_store.py", ["--embryos", "2", "--frames", "32"], []),
+    "dataloader": ("bench_dataloader.py", ["--embryos", "2", "--frames", "32", "--workers", "0", "2"], []),
+    "frame_cache": ("bench_frame_cache.py", ["--embryos", "2", "--frames", "32", "--workers", "0", "2"], []),
+    "model": ("bench_model.py", ["--shapes", "1x16", "2x16", "--repeats", "2"], []),
+    "feature_cache": ("bench_feature_cache.py", ["--batch", "2", "--steps", "2"], []),
+    "inference": ("bench_inference.py", ["--lengths", "32"], []),
+    "batching": ("bench_batching.py", ["--clients", "4", "--requests", "2", "--frames", "4"], []),
+    "fl_decode": ("bench_fl_decode.py", ["--clients", "2", "--requests", "1", "--frames", "32"], []),
+    "fl_execute": ("bench_fl_execute.py", ["--frames", "4", "16", "--clients", "1", "4", "--requests", "2"], []),
+    "sessions": ("bench_sessions.py", ["--lengths", "16", "48"], []),
+    "federated": ("bench_federated.py", ["--nodes", "2", "--rounds", "1"], []),
+    "result_cache": ("bench_result_cache.py", ["--frames", "4", "--clients", "4", "--requests", "2"], []),
+    "frame_skip": ("bench_frame_skip.py", ["--embryos", "2", "--frames", "32", "--thresholds", "0.01"], []),
+}
+# Slow or environment-dependent; run with --only
+OPTIONAL = {
+    "startup": ("bench_startup.py", ["--warmup-steps", "0"], []),
+    "backends": ("bench_backends.py", ["--backends", "eager", "static_int8", "--shapes", "1x16", "--repeats", "2"], []),
+    "onnx": ("bench_onnx.py", ["--repeats", "2"], []),
+    "finetune": ("bench_finetune.py", ["--nice", "10", "--frames-per-embryo", "16"], []),
+    "precision": ("bench_precision.py", ["--embryos", "2", "--frames", "24", "--batch", "2", "--accum", "1", "2"], []),
+    "score": ("bench_score.py", ["--embryos", "2", "4", "--frames", "24"], []),
+    "distill": ("bench_distill.py", ["--students", "mobilenet_v3_small:128:1.0", "--epochs", "1", "--repeats", "2",
+                                     "--embryos", "2", "--frames", "32"], []),
+}
+
+
+def git_commit():
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=MODEL_ROOT, text=True).strip()
+        dirty = subprocess.run(["git", "diff", "--quiet", "HEAD"], cwd=MODEL_ROOT).returncode != 0
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(script, args, timeout):
+    with tempfile.NamedTemporaryFile(suffix=".jsonl", delete=False) as f:
+        out = Path(f.name)
+    start = time.perf_counter()
+    try:
+        proc = subprocess.run([sys.executable, str(BENCH_DIR / script), *args, "--out", str(out)],
+                              cwd=MODEL_ROOT, capture_output=True, text=True, timeout=timeout)
+        status = "ok" if proc.returncode == 0 else "failed"
+        error = None if proc.returncode == 0 else proc.stderr.strip().splitlines()[-1:]
+    except subprocess.TimeoutExpired:
+        status, error = "timeout", None
+    records = [json.loads(line) for line in out.read_text().splitlines() if line.strip()]
+    out.unlink()
+    return {"status": status, "error": error, "wall_s": time.perf_counter() - start,
+            "results": {r["benchmark"]: r["results"] for r in records}}
+
+
+def main(scale, only, timeout, out=None):
+    import torch
+
+    selected = only or list(SUITE)
+    registry = {**SUITE, **OPTIONAL}
+    document = {
+        "commit": git_commit(), "time": time.time(), "scale": scale,
+        "python": platform.python_version(), "torch": torch.__version__,
+        "platform": platform.platform(), "cpu_count": os.cpu_count(),
+        "benchmarks": {},
+    }
+    for name in selected:
+        script, quick_args, full_args = registry[name]
+        print(f"[{name}] running {script} ({scale})", flush=True)
+        result = run_benchmark(script, quick_args if scale == "quick" else full_args, timeout)
+        print(f"[{name}] {result['status']} in {result['wall_s']:.1f}s", flush=True)
+        document["benchmarks"][name] = result
+
+    commit = (document["commit"] or "unknown")[:12]
+    out = Path(out or BENCH_DIR / "results" / f"{commit}-{scale}.json")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(document, indent=2))
+    print(f"Wrote {out}")
+    failed = [n for n, r in document["benchmarks"].items() if r["status"] != "ok"]
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", choices=["quick", "full"], default="quick")
+    parser.add_argument("--only", nargs="+", choices=sorted({**SUITE, **OPTIONAL}), default=None)
+    parser.add_argument("--timeout", type=float, default=1800, help="per-benchmark timeout in seconds")
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+    sys.exit(main(args.scale, args.only, args.timeout, args.out))
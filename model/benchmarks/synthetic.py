@@ -0,0 +1,151 @@
+"""
+Synthetic data generators for the benchmarks.
+Layouts mirror the real pipeline outputs so the same code paths are exercised.
+Standalone: python benchmarks/synthetic.py data/synthetic_raw --embryos 20 --frames 100
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from PIL import Image
+
+CLASSES = ['tPB2', 'tPNa', 'tPNf', 't2', 't3', 't4', 't5', 't6', 't7', 't8', 't9+', 'tM', 'tSB', 'tB', 'tEB', 'tHB']
+
+
+def embryo_ids(num_embryos):
+    return [f"SYN{i:05d}-{i % 9 + 1}" for i in range(num_embryos)]
+
+
+def frame_name(emb_id, frame_num):
+    return f"D2020.01.01_S0001_I{emb_id}_WELL1_RUN{frame_num}.jpeg"
+
+
+def synthetic_image(rng, size=224, channels=3):
+    """Smooth noise so JPEG sizes and decode costs resemble microscopy frames."""
+    coarse = rng.integers(0, 256, size=(size // 16, size // 16, channels), dtype=np.uint8)
+    img = Image.fromarray(coarse.squeeze()).resize((size, size), Image.BILINEAR)
+    return np.asarray(img)
+
+
+def make_labels(num_embryos, frames_per_embryo, seed=0):
+    """Frame-level label table with the master_labels.csv columns."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for emb_id in embryo_ids(num_embryos):
+        # Monotonic stage progression along the time-lapse
+        bounds = np.sort(rng.integers(1, frames_per_embryo, size=len(CLASSES) - 1))
+        stages = np.searchsorted(bounds, np.arange(frames_per_embryo), side="right")
+        rows.append(pd.DataFrame({
+            'Frame': np.arange(1, frames_per_embryo + 1),
+            'Event': np.array(CLASSES)[stages],
+            'time': np.round(np.arange(frames_per_embryo) * 0.25, 2),
+            'EmbryoID': emb_id,
+        }))
+    return pd.concat(rows, ignore_index=True)
+
+
+def make_stacked_frames(root, labels, size=224, seed=0):
+    """Writes one stacked RGB JPEG per label row into `root/<EmbryoID>/`."""
+    rng = np.random.default_rng(seed)
+    root = Path(root)
+    for emb_id, group in labels.groupby('EmbryoID'):
+        emb_dir = root / str(emb_id)
+        emb_dir.mkdir(parents=True, exist_ok=True)
+        for frame_num in group['Frame']:
+            Image.fromarray(synthetic_image(rng, size)).save(emb_dir / frame_name(emb_id, frame_num), quality=90)
+    return root
+
+
+def make_timelapse_frames(root, labels, size=224, noise=2.0, drift=0.5, seed=0):
+    """
+    Like make_stacked_frames, but frames are near-static within a stage: one
+    base image per (embryo, stage) that brightens by `drift` gray levels per
+    frame, plus per-frame Gaussian noise of `noise` gray levels, as
+    consecutive frames of a real time-lapse barely change.
+    """
+    rng = np.random.default_rng(seed)
+    root = Path(root)
+    for emb_id, group in labels.groupby('EmbryoID'):
+        emb_dir = root / str(emb_id)
+        emb_dir.mkdir(parents=True, exist_ok=True)
+        bases, steps = {}, {}
+        for frame_num, event in zip(group['Frame'], group['Event']):
+            if event not in bases:
+                bases[event], steps[event] = synthetic_image(rng, size).astype(np.float32), 0
+            steps[event] += 1
+            img = bases[event] + steps[event] * drift + rng.normal(0, noise, bases[event].shape)
+            img = np.clip(img, 0, 255).astype(np.uint8)
+            Image.fromarray(img).save(emb_dir / frame_name(emb_id, frame_num), quality=90)
+    return root
+
+
+def make_raw_planes(raw_root, labels, source_size=500, seed=0):
+    """
+    Writes the raw focal-plane layout consumed by preproces.create_stacked_dataset:
+    embryo_dataset_F-15 / embryo_dataset / embryo_dataset_F15, grayscale JPEGs.
+    """
+    rng = np.random.default_rng(seed)
+    raw_root = Path(raw_root)
+    for plane in ("embryo_dataset_F-15", "embryo_dataset", "embryo_dataset_F15"):
+        for emb_id, group in labels.groupby('EmbryoID'):
+            emb_dir = raw_root / plane / str(emb_id)
+            emb_dir.mkdir(parents=True, exist_ok=True)
+            for frame_num in group['Frame']:
+                img = synthetic_image(rng, source_size, channels=1)
+                Image.fromarray(img).save(emb_dir / frame_name(emb_id, frame_num), quality=90)
+    return raw_root
+
+
+def make_annotation_tree(raw_root, labels):
+    """
+    Writes the annotation inputs of master_labels.merge_range_context:
+    embryo_dataset_annotations/<id>_phases.csv (Event,Start,End, no header) and
+    embryo_dataset_time_elapsed/<id>_timeElapsed.csv (frame_index,time).
+    """
+    raw_root = Path(raw_root)
+    anno_dir = raw_root / "embryo_dataset_annotations"
+    time_dir = raw_root / "embryo_dataset_time_elapsed"
+    anno_dir.mkdir(parents=True, exist_ok=True)
+    time_dir.mkdir(parents=True, exist_ok=True)
+
+    for emb_id, group in labels.groupby('EmbryoID'):
+        ranges = group.groupby('Event', sort=False)['Frame'].agg(['min', 'max'])
+        ranges.to_csv(anno_dir / f"{emb_id}_phases.csv", header=False)
+        group[['Frame', 'time']].rename(columns={'Frame': 'frame_index'}).to_csv(
+            time_dir / f"{emb_id}_timeElapsed.csv", index=False)
+    return anno_dir, time_dir
+
+
+def make_empty_frames(root, labels):
+    """Creates zero-byte stacked frame files: enough for path resolution and indexing benchmarks."""
+    root = Path(root)
+    for emb_id, group in labels.groupby('EmbryoID'):
+        emb_dir = root / str(emb_id)
+        emb_dir.mkdir(parents=True, exist_ok=True)
+        for frame_num in group['Frame']:
+            open(emb_dir / frame_name(emb_id, frame_num), "wb").close()
+    return root
+
+
+def make_raw_tree(raw_root, num_embryos, frames_per_embryo, source_size=500, seed=0):
+    """
+    Writes a complete raw dataset at the given scale: the three focal-plane
+    folders plus annotations and time-elapsed CSVs. Returns the label table.
+    """
+    labels = make_labels(num_embryos, frames_per_embryo, seed=seed)
+    make_raw_planes(raw_root, labels, source_size=source_size, seed=seed)
+    make_annotation_tree(raw_root, labels)
+    return labels
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic raw embryo dataset tree")
+    parser.add_argument("raw_root")
+    parser.add_argument("--embryos", type=int, default=20)
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--source-size", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    labels = make_raw_tree(args.raw_root, args.embryos, args.frames, args.source_size, args.seed)
+    print(f"Wrote {len(labels)} frames x 3 planes for {args.embryos} embryos to {args.raw_root}")
@@ -1,10 +1,16 @@
-import pandas as pd
+import numpy as np
 from sklearn.model_selection import train_test_split
 from pathlib import Path
+from .master_labels import read_labels, write_labels
 
-def create_final_splits(master_csv, processed_dir, output_dir):
+def create_final_splits(master_csv, processed_dir, output_dir, fmt=None):
+    """
+    master_csv may be .csv, .parquet or .feather; splits are written in the
+    same format unless `fmt` ('csv', 'parquet', 'feather') is given.
+    """
     # 1. Load the master labels
-    df = pd.read_csv(master_csv)
+    df = read_labels(master_csv)
+    fmt = fmt or Path(master_csv).suffix.lstrip('.').lower()
     
     # 2. Critical: Filter only embryos we successfully processed/stacked
     processed_path = Path(processed_dir)
@@ -12,7 +18,7 @@ def create_final_splits(master_csv, processed_dir, output_dir):
     
     # Only keep labels for embryos that have image folders
     df = df[df['EmbryoID'].isin(available_embryos)].copy()
-    unique_ids = df['EmbryoID'].unique()
+    unique_ids = np.asarray(df['EmbryoID'].unique())
     
     # 3. First split: 70% Train, 30% for Val+Test
     train_ids, temp_ids = train_test_split(
@@ -35,9 +41,9 @@ def create_final_splits(master_csv, processed_dir, output_dir):
     val_df = df[df['EmbryoID'].isin(val_ids)]
     test_df = df[df['EmbryoID'].isin(test_ids)]
     
-    train_df.to_csv(f"{output_dir}/train.csv", index=False)
-    val_df.to_csv(f"{output_dir}/val.csv", index=False)
-    test_df.to_csv(f"{output_dir}/test.csv", index=False)
+    write_labels(train_df, f"{output_dir}/train.{fmt}")
+    write_labels(val_df, f"{output_dir}/val.{fmt}")
+    write_labels(test_df, f"{output_dir}/test.{fmt}")
     
     print("--- 70/15/15 Split Complete ---")
     print(f"Total Processed Embryos: {len(unique_ids)}")
@@ -46,6 +52,8 @@ def create_final_splits(master_csv, processed_dir, output_dir):
     print(f"Test:  {len(test_ids)} embryos ({len(test_df)} frames)")
 
 if __name__ == "__main__":
+    # Part of the src.data package (relative imports), so run it as a module from the project root:
+    # python -m src.data.create_splits
     create_final_splits(
         master_csv="data/processed/master_labels.csv",
         processed_dir="data/processed/stacked_frames",
@@ -1,85 +1,205 @@
 import torch
-import pandas as pd
 import numpy as np
-import os
 from torch.utils.data import Dataset
 from PIL import Image
+from torchvision.io import ImageReadMode, decode_jpeg, read_file
 from pathlib import Path
+from .frame_cache import FrameCache
+from .frame_store import FrameStore, FEATURES_FILE, MISSING_FEATURE_FILE
+from .master_labels import read_labels
+from .transforms import normalize_window, resize_window
+from .window_index import load_or_build_index
+
+# Developmental stages in label-index order (SOTA fixed list)
+CLASSES = ['tPB2', 'tPNa', 'tPNf', 't2', 't3', 't4', 't5', 't6', 't7', 't8', 't9+', 'tM', 'tSB', 'tB', 'tEB', 'tHB', 'unknown']
 
 class EmbryoSequenceDataset(Dataset):
-    def __init__(self, csv_path, frames_root, window_size=16, stride=8, transform=None):
-        self.df = pd.read_csv(csv_path)
+    def __init__(self, csv_path, frames_root, window_size=16, stride=8, transform=None, frame_store=None, cache_index=True,
+                 frame_cache_bytes=0, window_transform=None):
+        """
+        csv_path: split file as written by create_splits (.csv, .parquet or .feather)
+        frame_store: optional path to a packed frame store (see frame_store.py).
+        When given, windows are sliced from memory-mapped uint8 arrays and
+        normalized in one op instead of decoding JPEGs; `transform` is not used.
+        cache_index: persist the window index next to the split file and
+        memory-map it back on later constructions (see window_index.py).
+        frame_cache_bytes: per-worker budget for caching decoded JPEG frames
+        (see frame_cache.py), so frames shared by overlapping windows are
+        decoded once; `transform` still runs on every read. Pair it with
+        EmbryoLocalityBatchSampler. 0 disables the cache.
+        window_transform: optional WindowTransform (see transforms.py) applied to
+        the whole uint8 window at once. On the JPEG path the window is decoded
+        with one batched decode_jpeg call and `transform` is not used; on the
+        frame store path it replaces the plain normalization.
+        """
+        self.csv_path = Path(csv_path)
         self.frames_root = Path(frames_root)
         self.window_size = window_size
         self.stride = stride
         self.transform = transform
+        self.window_transform = window_transform
+        self.frame_store = self._open_frame_store(frame_store) if frame_store is not None else None
+        self.frame_cache = FrameCache(frame_cache_bytes) if frame_cache_bytes and frame_store is None else None
         
         # 1. Map labels to consistent indices (SOTA fixed list)
-        self.classes = ['tPB2', 'tPNa', 'tPNf', 't2', 't3', 't4', 't5', 't6', 't7', 't8', 't9+', 'tM', 'tSB', 'tB', 'tEB', 'tHB', 'unknown']
+        self.classes = list(CLASSES)
         self.class_to_idx = {cls: i for i, cls in enumerate(self.classes)}
 
-        # 2. Create sliding windows
-        self.windows = []
-        embryo_groups = self.df.groupby("EmbryoID")
-        
-        print(f"Indexing windows for {len(embryo_groups)} embryos...")
-        for emb_id, group in embryo_groups:
-            group = group.sort_values("Frame")
-            num_frames = len(group)
-            
-            if num_frames >= window_size:
-                for start in range(0, num_frames - window_size + 1, stride):
-                    self.windows.append(group.iloc[start:start + window_size])
-        
-        # 3. Cache for file mapping to avoid slow disk lookups
-        self.file_cache = {}
+        # 2. Create sliding windows as flat arrays with frame paths resolved up front.
+        # Plain NumPy arrays keep DataLoader workers from touching copy-on-write pages via refcounts.
+        index = load_or_build_index(csv_path, self.frames_root, self.classes, window_size, stride, cache=cache_index)
+        self._set_index(index)
+        print(f"Indexed {len(self)} windows for {len(self.embryo_ids)} embryos")
+
+    def _set_index(self, index):
+        self.embryo_ids = index["embryo_ids"]
+        self.frame_nums = index["frame"]
+        self.times = index["time"]
+        self.labels = index["label"]
+        self.filenames = index["filename"]
+        self.window_start = index["window_start"]
+        self.window_embryo = index["window_embryo"]
+
+        # 3. Row positions inside the packed store, looked up once per embryo
+        if self.frame_store is not None:
+            self.store_rows = np.full(len(self.frame_nums), -1, dtype=np.int64)
+            offsets = np.searchsorted(index["row_embryo"], np.arange(len(self.embryo_ids) + 1))
+            for code, emb_id in enumerate(self.embryo_ids):
+                rows = slice(offsets[code], offsets[code + 1])
+                self.store_rows[rows] = self.frame_store.rows(emb_id, self.frame_nums[rows])
+
+    def _open_frame_store(self, root):
+        return FrameStore(root)
+
+    @property
+    def df(self):
+        """The label table this dataset was built from (loaded on demand)."""
+        return read_labels(self.csv_path)
 
     def __len__(self):
-        return len(self.windows)
+        return len(self.window_start)
 
-    def _get_image_path(self, emb_id, frame_num):
-        """Robustly finds the filename ending in _RUN{frame_num}.jpeg"""
-        emb_dir = self.frames_root / str(emb_id)
-        
-        # Cache directory listing for speed
-        if emb_id not in self.file_cache:
+    def _get_packed_window(self, emb_id, rows):
+        """Slices a whole window out of the frame store and normalizes it at once."""
+        store_rows = self.store_rows[rows]
+        frames = (self.window_transform or normalize_window)(torch.from_numpy(self.frame_store.take(emb_id, store_rows)))
+        # Match the JPEG path: missing frames are all-zero tensors
+        frames[torch.from_numpy(store_rows < 0)] = 0
+        return frames
+
+    def _get_decoded_window(self, emb_dir, start):
+        """Decodes a window's JPEGs as one batch into a uint8 tensor and transforms it as a whole."""
+        size = self.window_transform.size
+        frames = torch.zeros(self.window_size, 3, size, size, dtype=torch.uint8)
+        missing = torch.ones(self.window_size, dtype=torch.bool)
+        pending = []
+        for i, filename in enumerate(self.filenames[start:start + self.window_size]):
+            cached = self.frame_cache.get(start + i) if self.frame_cache is not None and filename else None
+            if cached is not None:
+                frames[i], missing[i] = cached, False
+            elif filename:
+                pending.append((i, filename))
+
+        for (i, _), frame in zip(pending, self._decode_batch(emb_dir, [f for _, f in pending])):
+            if frame is None:
+                continue
+            if frame.shape[-2:] != (size, size):
+                frame = resize_window(frame.unsqueeze(0), size)[0]
+            frames[i], missing[i] = frame, False
+            if self.frame_cache is not None:
+                self.frame_cache.put(start + i, frame)
+
+        frames = self.window_transform(frames)
+        # Match the per-frame path: missing or unreadable frames are all-zero tensors
+        frames[missing] = 0
+        return frames
+
+    def _decode_batch(self, emb_dir, filenames):
+        """Batched decode_jpeg; falls back to one call per file so a corrupt frame only loses itself."""
+        data = []
+        for filename in filenames:
+            try:
+                data.append(read_file(str(emb_dir / filename.decode())))
+            except RuntimeError:
+                data.append(None)
+        try:
+            if all(d is not None for d in data):
+                return decode_jpeg(data, mode=ImageReadMode.RGB) if data else []
+        except RuntimeError:
+            pass
+        frames = []
+        for d in data:
             try:
-                self.file_cache[emb_id] = os.listdir(emb_dir)
-            except FileNotFoundError:
-                return None
+                frames.append(decode_jpeg(d, mode=ImageReadMode.RGB) if d is not None else None)
+            except RuntimeError:
+                frames.append(None)
+        return frames
+
+    def _decode(self, emb_dir, filename, row):
+        if self.frame_cache is None:
+            return Image.open(emb_dir / filename.decode()).convert("RGB")
+        # Rows index the flat frame arrays, so they identify a frame across windows
+        frame = self.frame_cache.get(row)
+        if frame is None:
+            frame = np.asarray(Image.open(emb_dir / filename.decode()).convert("RGB"))
+            self.frame_cache.put(row, frame)
+        return Image.fromarray(frame)
+
+    def _load_frame(self, emb_dir, filename, row=None):
+        if not filename:
+            # If frame is missing, return a black placeholder
+            return torch.zeros(3, 224, 224)
+        try:
+            img = self._decode(emb_dir, filename, row)
+            return self.transform(img) if self.transform else img
+        except Exception:
+            return torch.zeros(3, 224, 224)
+
+    def __getitem__(self, idx):
+        start = self.window_start[idx]
+        rows = slice(start, start + self.window_size)
+        emb_id = self.embryo_ids[self.window_embryo[idx]]
         
-        target_suffix = f"RUN{int(frame_num)}.jpeg"
-        files = self.file_cache[emb_id]
+        times = torch.tensor(self.times[rows])
+        labels = torch.tensor(self.labels[rows])
         
-        # Search for the specific RUN index
-        actual_file = next((f for f in files if f.endswith(target_suffix)), None)
-        return emb_dir / actual_file if actual_file else None
+        if self.frame_store is not None:
+            return self._get_packed_window(emb_id, rows), times, labels
+        
+        emb_dir = self.frames_root / emb_id
+        if self.window_transform is not None:
+            return self._get_decoded_window(emb_dir, start), times, labels
+        images = [self._load_frame(emb_dir, f, row) for row, f in enumerate(self.filenames[rows], start)]
+        return torch.stack(images), times, labels
+
+
+class EmbryoFeatureDataset(EmbryoSequenceDataset):
+    """
+    Same windows as EmbryoSequenceDataset, but each sample carries cached
+    ResNet18 embeddings (T, 512) instead of frames, for training the temporal
+    head with EmbryoGenModel.forward_features. Build the store with
+    training/extract_features.py. Frames missing from the store get the
+    store's blank-frame embedding, as the end-to-end path runs the backbone
+    on a blank frame for them.
+    """
+    def __init__(self, csv_path, feature_store, window_size=16, stride=8, cache_index=True, feature_dim=512):
+        self.feature_dim = feature_dim
+        super().__init__(csv_path, feature_store, window_size, stride, frame_store=feature_store, cache_index=cache_index)
+        missing_file = Path(feature_store) / MISSING_FEATURE_FILE
+        self.missing_feature = torch.from_numpy(np.load(missing_file)) if missing_file.exists() else None
+
+    def _open_frame_store(self, root):
+        return FrameStore(root, frame_shape=(self.feature_dim,), array_file=FEATURES_FILE, dtype=np.float32)
 
     def __getitem__(self, idx):
-        window_df = self.windows[idx]
-        emb_id = window_df.iloc[0]['EmbryoID']
-        
-        images = []
-        times = []
-        labels = []
+        start = self.window_start[idx]
+        rows = slice(start, start + self.window_size)
+        emb_id = self.embryo_ids[self.window_embryo[idx]]
         
-        for _, row in window_df.iterrows():
-            img_path = self._get_image_path(emb_id, row['Frame'])
-            
-            if img_path and img_path.exists():
-                try:
-                    img = Image.open(img_path).convert("RGB")
-                    if self.transform:
-                        img = self.transform(img)
-                    images.append(img)
-                except Exception:
-                    images.append(torch.zeros(3, 224, 224))
-            else:
-                # If frame is missing, return a black placeholder
-                images.append(torch.zeros(3, 224, 224))
-            
-            times.append(row['time'])
-            label = self.class_to_idx.get(row['Event'], self.class_to_idx['unknown'])
-            labels.append(label)
-            
-        return torch.stack(images), torch.tensor(times).float(), torch.tensor(labels)
\ No newline at end of file
+        store_rows = self.store_rows[rows]
+        features = torch.from_numpy(self.frame_store.take(emb_id, store_rows))
+        missing = torch.from_numpy(store_rows < 0)
+        if self.missing_feature is not None and missing.any():
+            # take() returned a fresh array (not a view of the store) for a window with gaps
+            features[missing] = self.missing_feature
+        return features, torch.tensor(self.times[rows]), torch.tensor(self.labels[rows])
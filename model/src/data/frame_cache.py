@@ -0,0 +1,52 @@
+import multiprocessing as mp
+from collections import OrderedDict
+
+
+class FrameCache:
+    """
+    LRU cache of decoded uint8 frames, bounded by a byte budget.
+    With window_size=16 and stride=8 every frame belongs to two windows; when
+    both land on the same worker (see EmbryoLocalityBatchSampler) the second
+    read is a hit instead of another JPEG decode.
+    Each DataLoader worker holds its own copy of the cache (the dataset is
+    copied into every worker), but the hit/miss counters live in shared memory,
+    so the main process sees the totals of all workers.
+    """
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._frames = OrderedDict()
+        self._hits = mp.Value("q", 0)
+        self._misses = mp.Value("q", 0)
+
+    def __len__(self):
+        return len(self._frames)
+
+    def get(self, key):
+        frame = self._frames.get(key)
+        counter = self._misses if frame is None else self._hits
+        with counter.get_lock():
+            counter.value += 1
+        if frame is not None:
+            self._frames.move_to_end(key)
+        return frame
+
+    def put(self, key, frame):
+        if frame.nbytes > self.max_bytes or key in self._frames:
+            return
+        self._frames[key] = frame
+        self.nbytes += frame.nbytes
+        while self.nbytes > self.max_bytes:
+            _, evicted = self._frames.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+
+    def stats(self):
+        """Hits and misses summed over every process sharing this cache."""
+        hits, misses = self._hits.value, self._misses.value
+        lookups = hits + misses
+        return {"hits": hits, "misses": misses, "hit_rate": hits / lookups if lookups else 0.0}
+
+    def reset_stats(self):
+        for counter in (self._hits, self._misses):
+            with counter.get_lock():
+                counter.value = 0
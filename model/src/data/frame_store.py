@@ -0,0 +1,140 @@
+import os
+import re
+import numpy as np
+from pathlib import Path
+from PIL import Image
+from tqdm import tqdm
+
+# Stacked frames are named like ..._RUN{frame_num}.jpeg
+RUN_PATTERN = re.compile(r"RUN(\d+)\.jpe?g$", re.IGNORECASE)
+
+FRAMES_FILE = "frames.npy"     # (N, 3, H, W) uint8, one contiguous block per embryo
+FEATURES_FILE = "features.npy" # (N, 512) float32 backbone embeddings (see training/extract_features.py)
+INDEX_FILE = "index.npy"       # (N,) int32 frame numbers, sorted ascending
+MISSING_FEATURE_FILE = "missing_feature.npy"  # (512,) embedding of a blank frame, for frames without a readable JPEG
+
+
+def parse_run_index(filename):
+    """Returns the RUN frame number of a stacked frame filename, or None."""
+    match = RUN_PATTERN.search(filename)
+    return int(match.group(1)) if match else None
+
+
+def pack_embryo(store_root, emb_id, frame_nums, frames, shape=(3, 224, 224), dtype=np.uint8, array_file=FRAMES_FILE):
+    """
+    Writes one embryo's frames into the packed store.
+    frame_nums: frame numbers in the same order as `frames`
+    frames: iterable of uint8 arrays shaped `shape` (CHW, RGB)
+    dtype / array_file: override to store per-frame features instead of pixels
+    """
+    emb_dir = Path(store_root) / str(emb_id)
+    emb_dir.mkdir(parents=True, exist_ok=True)
+
+    frame_nums = np.asarray(frame_nums, dtype=np.int32)
+    order = np.argsort(frame_nums, kind="stable")
+    position = np.empty_like(order)
+    position[order] = np.arange(len(order))
+
+    # Write to a temp file first so readers never see a half-written array
+    tmp_path = emb_dir / (array_file + ".tmp")
+    out = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=dtype, shape=(len(frame_nums), *shape))
+    for i, frame in enumerate(frames):
+        out[position[i]] = frame
+    out.flush()
+    del out
+
+    os.replace(tmp_path, emb_dir / array_file)
+    np.save(emb_dir / INDEX_FILE, frame_nums[order])
+
+
+def load_frame_chw(img_path, size=224):
+    """Decodes a stacked JPEG into a (3, size, size) uint8 RGB array."""
+    img = Image.open(img_path).convert("RGB")
+    if img.size != (size, size):
+        img = img.resize((size, size))
+    return np.asarray(img).transpose(2, 0, 1)
+
+
+class FrameStore:
+    """
+    Read-only access to a packed frame store.
+    Frames are memory-mapped lazily, so each DataLoader worker shares the page cache
+    instead of decoding JPEGs. With array_file=FEATURES_FILE the same layout
+    serves cached backbone features.
+    """
+    def __init__(self, root, frame_shape=(3, 224, 224), array_file=FRAMES_FILE, dtype=np.uint8):
+        self.root = Path(root)
+        self.frame_shape = tuple(frame_shape)
+        self.array_file = array_file
+        self.dtype = dtype
+        self._frames = {}
+        self._index = {}
+
+    def embryo_ids(self):
+        return sorted(d.name for d in self.root.iterdir() if (d / INDEX_FILE).exists())
+
+    def index(self, emb_id):
+        emb_id = str(emb_id)
+        if emb_id not in self._index:
+            path = self.root / emb_id / INDEX_FILE
+            self._index[emb_id] = np.load(path) if path.exists() else np.empty(0, dtype=np.int32)
+        return self._index[emb_id]
+
+    def frames(self, emb_id):
+        emb_id = str(emb_id)
+        if emb_id not in self._frames:
+            # Copy-on-write mapping: torch can wrap it without a copy and the file stays untouched
+            self._frames[emb_id] = np.load(self.root / emb_id / self.array_file, mmap_mode="c")
+        return self._frames[emb_id]
+
+    def rows(self, emb_id, frame_nums):
+        """Maps frame numbers to row positions in the packed array (-1 if missing)."""
+        index = self.index(emb_id)
+        frame_nums = np.asarray(frame_nums, dtype=np.int64)
+        if len(index) == 0:
+            return np.full(len(frame_nums), -1, dtype=np.int64)
+
+        pos = np.minimum(np.searchsorted(index, frame_nums), len(index) - 1)
+        return np.where(index[pos] == frame_nums, pos, -1)
+
+    def take(self, emb_id, rows):
+        """
+        Returns frames for the given rows as a (T, *frame_shape) array.
+        Consecutive rows come back as a zero-copy slice of the memmap;
+        missing rows (-1) are filled with zeros.
+        """
+        rows = np.asarray(rows)
+        present = rows >= 0
+        if not present.any():
+            return np.zeros((len(rows), *self.frame_shape), dtype=self.dtype)
+
+        frames = self.frames(emb_id)
+        if len(rows) and rows[0] >= 0 and np.all(np.diff(rows) == 1):
+            return frames[rows[0]:rows[-1] + 1]
+
+        out = np.zeros((len(rows), *frames.shape[1:]), dtype=frames.dtype)
+        out[present] = frames[rows[present]]
+        return out
+
+
+def convert_stacked_frames(stacked_root, store_root, size=224):
+    """Packs an existing `stacked_frames` directory of JPEGs into a frame store."""
+    stacked_root = Path(stacked_root)
+    embryo_ids = sorted(d.name for d in stacked_root.iterdir() if d.is_dir())
+
+    for emb_id in tqdm(embryo_ids, desc="Packing Embryos"):
+        emb_dir = stacked_root / emb_id
+        indexed = [(parse_run_index(f), f) for f in os.listdir(emb_dir)]
+        indexed = sorted((n, f) for n, f in indexed if n is not None)
+        if not indexed:
+            continue
+
+        pack_embryo(
+            store_root, emb_id,
+            [n for n, _ in indexed],
+            (load_frame_chw(emb_dir / f, size) for _, f in indexed),
+            shape=(3, size, size)
+        )
+
+if __name__ == "__main__":
+    convert_stacked_frames("data/processed/stacked_frames", "data/processed/frame_store")
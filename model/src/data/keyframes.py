@@ -0,0 +1,62 @@
+import torch
+import torch.nn.functional as F
+
+from .transforms import IMAGENET_MEAN, IMAGENET_STD
+
+
+def frame_signatures(frames, size=16, mean=IMAGENET_MEAN, std=IMAGENET_STD):
+    """
+    Cheap change-detection signatures: each normalized frame (T, 3, H, W) is
+    mapped back to [0, 1] intensities, averaged over channels and area-pooled
+    to size x size. Returns (T, size * size) float32.
+    """
+    mean = torch.tensor(mean, dtype=torch.float32, device=frames.device).view(1, 3, 1, 1)
+    std = torch.tensor(std, dtype=torch.float32, device=frames.device).view(1, 3, 1, 1)
+    gray = (frames.float() * std + mean).mean(dim=1, keepdim=True)
+    return F.adaptive_avg_pool2d(gray, size).flatten(1)
+
+
+def select_keyframes(signatures, threshold, reference=None):
+    """
+    Marks the frames that need a backbone pass. A frame is skipped when the
+    mean absolute difference between its signature and the last selected
+    frame's is below `threshold` (a fraction of full intensity, e.g. 0.01).
+    Comparing with the last keyframe rather than the previous frame means
+    slow drift still triggers a new keyframe once it adds up.
+    reference: signature of the last keyframe before these frames (streaming),
+    or None to always keep the first frame.
+    Returns a (T,) bool mask.
+    """
+    keep = torch.ones(len(signatures), dtype=torch.bool)
+    if not threshold or not len(signatures):
+        return keep
+    last = reference
+    # One vectorized distance per keyframe: every frame up to the next change is skipped at once
+    i = 0
+    if last is None:
+        last, i = signatures[0], 1
+    while i < len(signatures):
+        changed = ((signatures[i:] - last).abs().mean(dim=1) >= threshold).nonzero()
+        if not len(changed):
+            keep[i:] = False
+            break
+        j = i + int(changed[0])
+        keep[i:j] = False
+        last, i = signatures[j], j + 1
+    return keep
+
+
+def expand_keyframes(features, keep, previous=None):
+    """
+    Gives every frame the features of the last keyframe at or before it.
+    features: (K, D) features of the kept frames, keep: (T,) mask from select_keyframes
+    previous: (D,) features of the last keyframe before these frames, needed when keep[0] is False
+    Returns (T, D).
+    """
+    index = keep.long().cumsum(0) - 1
+    if previous is not None:
+        features = torch.cat([previous.unsqueeze(0).to(features), features])
+        index += 1
+    elif not keep[0]:
+        raise ValueError("The first frame was skipped but no previous features were given")
+    return features[index.to(features.device)]
@@ -1,56 +1,123 @@
 import pandas as pd
+import numpy as np
 import os
 from pathlib import Path
 from tqdm import tqdm
+from concurrent.futures import ProcessPoolExecutor
 
-def merge_range_context(anno_dir, time_dir, output_file):
+# Columnar outputs keep the repeated string columns as categoricals
+CATEGORICAL_COLUMNS = ['Event', 'EmbryoID']
+
+def read_labels(path):
+    """Loads a label table written as .csv, .parquet or .feather."""
+    suffix = Path(path).suffix.lower()
+    if suffix == '.parquet':
+        return pd.read_parquet(path)
+    if suffix == '.feather':
+        return pd.read_feather(path)
+    return pd.read_csv(path)
+
+def write_labels(df, path):
+    """Writes a label table, picking the format from the file suffix."""
+    suffix = Path(path).suffix.lower()
+    if suffix in ('.parquet', '.feather'):
+        df = df.copy()
+        for col in CATEGORICAL_COLUMNS:
+            if col in df.columns:
+                df[col] = df[col].astype('category').cat.remove_unused_categories()
+        df = df.reset_index(drop=True)
+        if suffix == '.parquet':
+            df.to_parquet(path, index=False)
+        else:
+            df.to_feather(path)
+    else:
+        df.to_csv(path, index=False)
+
+def expand_ranges(df_anno):
+    """Unpacks (Event, Start, End) ranges into one row per frame without a Python loop."""
+    starts = df_anno['Start'].to_numpy(dtype=np.int64)
+    lengths = np.maximum(df_anno['End'].to_numpy(dtype=np.int64) - starts + 1, 0)
+
+    # Offset of every output row within its own range: 0, 1, ..., length-1
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return pd.DataFrame({
+        'Frame': np.repeat(starts, lengths) + offsets,
+        'Event': np.repeat(df_anno['Event'].to_numpy(), lengths),
+    })
+
+def read_time_elapsed(time_file):
+    """Loads an `<embryo>_timeElapsed.csv` table as (Frame, time) columns."""
+    df_time = pd.read_csv(time_file)
+    # Standardize column name to 'Frame'
+    time_col = next((c for c in df_time.columns if 'index' in c.lower() or 'frame' in c.lower()), None)
+    if time_col:
+        df_time = df_time.rename(columns={time_col: 'Frame'})
+    return df_time
+
+def load_embryo_labels(anno_file, time_path):
+    """Builds the frame-level table (Frame, Event, time..., EmbryoID) for one embryo."""
+    anno_file = Path(anno_file)
+    embryo_id = anno_file.name.replace('_phases.csv', '')
+
+    # 1. Load Range Annotations (Stage, Start, End)
+    # Since your example doesn't have headers, we assign them
+    df_anno = pd.read_csv(anno_file, names=['Event', 'Start', 'End'])
+
+    # 2. Unpack ranges into a frame-by-frame table
+    df_unpacked = expand_ranges(df_anno)
+
+    # 3. Match with Time Elapsed (frame_index, time)
+    time_file = Path(time_path) / f"{embryo_id}_timeElapsed.csv"
+    if time_file.exists():
+        df_time = read_time_elapsed(time_file)
+
+        # Merge: Frame-by-Frame labels + Time data
+        combined = pd.merge(df_unpacked, df_time, on='Frame', how='inner')
+    else:
+        combined = df_unpacked
+        combined['time'] = 0
+
+    combined['EmbryoID'] = embryo_id
+    return combined
+
+def _load_or_error(args):
+    anno_file, time_path = args
+    try:
+        return load_embryo_labels(anno_file, time_path), None
+    except Exception as e:
+        return None, f"Error processing {Path(anno_file).name.replace('_phases.csv', '')}: {e}"
+
+def _iter_results(jobs, workers):
+    if workers <= 1:
+        yield from map(_load_or_error, jobs)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(_load_or_error, jobs, chunksize=max(1, len(jobs) // (workers * 8)))
+
+def merge_range_context(anno_dir, time_dir, output_file, workers=1):
+    """
+    Expands every embryo's phase ranges to frame-level labels, joins the
+    elapsed-time table and writes one label file. Per-embryo files are read
+    across `workers` processes. An output ending in .parquet or .feather is
+    written columnar with categorical Event/EmbryoID (see read_labels).
+    """
     anno_path = Path(anno_dir)
     time_path = Path(time_dir)
     all_data = []
 
     # Get phase files (e.g., AA83-7_phases.csv)
-    anno_files = [f for f in os.listdir(anno_path) if f.endswith('_phases.csv')]
-
-    for file in tqdm(anno_files, desc="Unpacking Ranges"):
-        embryo_id = file.replace('_phases.csv', '')
-        
-        try:
-            # 1. Load Range Annotations (Stage, Start, End)
-            # Since your example doesn't have headers, we assign them
-            df_anno = pd.read_csv(anno_path / file, names=['Event', 'Start', 'End'])
-            
-            # 2. Unpack ranges into a frame-by-frame list
-            unpacked_frames = []
-            for _, row in df_anno.iterrows():
-                for f_num in range(int(row['Start']), int(row['End']) + 1):
-                    unpacked_frames.append({'Frame': f_num, 'Event': row['Event']})
-            
-            df_unpacked = pd.DataFrame(unpacked_frames)
-
-            # 3. Match with Time Elapsed (frame_index, time)
-            time_file = time_path / f"{embryo_id}_timeElapsed.csv"
-            if time_file.exists():
-                df_time = pd.read_csv(time_file)
-                # Standardize column name to 'Frame'
-                time_col = next((c for c in df_time.columns if 'index' in c.lower() or 'frame' in c.lower()), None)
-                if time_col:
-                    df_time = df_time.rename(columns={time_col: 'Frame'})
-                
-                # Merge: Frame-by-Frame labels + Time data
-                combined = pd.merge(df_unpacked, df_time, on='Frame', how='inner')
-            else:
-                combined = df_unpacked
-                combined['time'] = 0 
-
-            combined['EmbryoID'] = embryo_id
+    anno_files = sorted(f for f in os.listdir(anno_path) if f.endswith('_phases.csv'))
+    jobs = [(anno_path / f, time_path) for f in anno_files]
+
+    for combined, error in tqdm(_iter_results(jobs, workers), total=len(jobs), desc="Unpacking Ranges"):
+        if error:
+            print(error)
+        else:
             all_data.append(combined)
-            
-        except Exception as e:
-            print(f"Error processing {embryo_id}: {e}")
 
     if all_data:
         final_df = pd.concat(all_data, ignore_index=True)
-        final_df.to_csv(output_file, index=False)
+        write_labels(final_df, output_file)
         print(f"\nSuccessfully created: {output_file}")
         print(f"Total labeled frames: {len(final_df)}")
         print(f"Sample row:\n{final_df.iloc[0]}")
@@ -61,5 +128,6 @@ if __name__ == "__main__":
     merge_range_context(
         "data/raw/embryo_dataset_annotations",
         "data/raw/embryo_dataset_time_elapsed",
-        "data/processed/master_labels.csv"
-    )
\ No newline at end of file
+        "data/processed/master_labels.csv",
+        workers=os.cpu_count()
+    )
@@ -1,13 +1,134 @@
 import os
 import cv2
+import json
+import time
 import numpy as np
 from pathlib import Path
+from PIL import Image
 from tqdm import tqdm
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from .frame_store import pack_embryo, parse_run_index
 
-def create_stacked_dataset(raw_root, output_root):
+# Append-only journal of completed embryos: one JSON line per embryo, last entry wins
+MANIFEST_FILE = ".stack_manifest.jsonl"
+
+# OpenCV can decode JPEGs at 1/2, 1/4 or 1/8 scale for a fraction of the cost
+REDUCED_FLAGS = {
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+}
+
+def load_manifest(output_root):
+    """Returns {emb_id: {frame_file: [mtime_R, mtime_G, mtime_B]}} of already stacked frames."""
+    manifest = {}
+    path = Path(output_root) / MANIFEST_FILE
+    if path.exists():
+        with open(path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue # Torn last line after a crash
+                manifest[entry["embryo"]] = entry["frames"]
+    return manifest
+
+def _decode_flag(sample_path, size):
+    """Picks the largest reduced decode that still leaves at least `size` pixels per side."""
+    with Image.open(sample_path) as img:
+        short_side = min(img.size)
+    for factor, flag in REDUCED_FLAGS.items():
+        if short_side // factor >= size:
+            return flag
+    return cv2.IMREAD_GRAYSCALE
+
+def _read_plane(path, flag, size):
+    img = cv2.imread(str(path), flag)
+    if img.shape[:2] != (size, size):
+        img = cv2.resize(img, (size, size))
+    return img
+
+def _init_worker():
+    # One process per core already; keep OpenCV from oversubscribing
+    cv2.setNumThreads(1)
+
+def stack_embryo(emb_id, planes, save_path, done=None, packed_root=None, reduced_decode=False, size=224):
+    """
+    Stacks one embryo. Frames whose three source mtimes match `done` and whose
+    output exists are skipped. Returns the embryo's manifest entry plus timing.
+    """
+    start = time.perf_counter()
+    save_path = Path(save_path)
+    save_path.mkdir(parents=True, exist_ok=True)
+    done = done or {}
+
+    # Get frame list from the central plane (F0)
+    f0_frames = sorted(os.listdir(planes["G"] / emb_id))
+
+    entries = {}
+    flag = None
+    processed = 0
+    packed = {}
+    for frame_file in f0_frames:
+        paths = [planes[k] / emb_id / frame_file for k in ("R", "G", "B")]
+
+        # Ensure the frame exists in all 3 planes
+        if not all(p.exists() for p in paths):
+            continue
+        mtimes = [p.stat().st_mtime_ns for p in paths]
+        entries[frame_file] = mtimes
+        if done.get(frame_file) == mtimes and (save_path / frame_file).exists():
+            continue
+
+        if flag is None:
+            flag = _decode_flag(paths[1], size) if reduced_decode else cv2.IMREAD_GRAYSCALE
+
+        # Read images in grayscale and resize to SOTA standard
+        img_r, img_g, img_b = (_read_plane(p, flag, size) for p in paths)
+
+        # Stack into a single RGB image
+        stacked = cv2.merge([img_b, img_g, img_r]) # BGR for OpenCV
+        cv2.imwrite(str(save_path / frame_file), stacked)
+        processed += 1
+
+        if packed_root is not None:
+            packed[frame_file] = np.stack([img_r, img_g, img_b]) # RGB, CHW
+
+    # Repack the embryo when anything changed; unchanged frames come from the stacked JPEGs
+    if packed_root is not None and (processed or not (Path(packed_root) / emb_id).exists()):
+        frame_files = [f for f in entries if parse_run_index(f) is not None]
+        if frame_files:
+            pack_embryo(
+                packed_root, emb_id,
+                [parse_run_index(f) for f in frame_files],
+                (packed[f] if f in packed else cv2.imread(str(save_path / f))[:, :, ::-1].transpose(2, 0, 1)
+                 for f in frame_files),
+                shape=(3, size, size)
+            )
+
+    return {
+        "embryo": emb_id,
+        "frames": entries,
+        "processed": processed,
+        "seconds": time.perf_counter() - start,
+        "pid": os.getpid(),
+    }
+
+def create_stacked_dataset(raw_root, output_root, packed_root=None, workers=1, reduced_decode=False, size=224):
+    """
+    Stacks the F-15 / F0 / F15 focal planes into 224x224 RGB JPEGs.
+    If `packed_root` is given, each embryo's frames are also written to a
+    packed frame store (see frame_store.py) for memory-mapped training.
+
+    Work is split per embryo across `workers` processes. Completed embryos are
+    journaled in `output_root/.stack_manifest.jsonl` with their source mtimes,
+    so reruns only stack new or changed frames. `reduced_decode` lets OpenCV
+    decode large sources at 1/2-1/8 scale (IMREAD_REDUCED_*) before resizing.
+    """
     raw_root = Path(raw_root)
     output_root = Path(output_root)
-    
+    output_root.mkdir(parents=True, exist_ok=True)
+
     # Define our three planes
     planes = {
         "R": raw_root / "embryo_dataset_F-15",
@@ -17,33 +138,46 @@ def create_stacked_dataset(raw_root, output_root):
 
     # Get list of embryo IDs (common to all folders)
     embryo_ids = sorted([d.name for d in planes["G"].iterdir() if d.is_dir()])
-    
-    for emb_id in tqdm(embryo_ids, desc="Stacking Embryos"):
-        save_path = output_root / emb_id
-        save_path.mkdir(parents=True, exist_ok=True)
-        
-        # Get frame list from the central plane (F0)
-        f0_frames = sorted(os.listdir(planes["G"] / emb_id))
-        
-        for frame_file in f0_frames:
-            paths = {k: planes[k] / emb_id / frame_file for k in planes}
-            
-            # Ensure the frame exists in all 3 planes
-            if all(p.exists() for p in paths.values()):
-                # Read images in grayscale
-                img_r = cv2.imread(str(paths["R"]), cv2.IMREAD_GRAYSCALE)
-                img_g = cv2.imread(str(paths["G"]), cv2.IMREAD_GRAYSCALE)
-                img_b = cv2.imread(str(paths["B"]), cv2.IMREAD_GRAYSCALE)
-                
-                # Resize to SOTA standard
-                img_r = cv2.resize(img_r, (224, 224))
-                img_g = cv2.resize(img_g, (224, 224))
-                img_b = cv2.resize(img_b, (224, 224))
-                
-                # Stack into a single RGB image
-                stacked = cv2.merge([img_b, img_g, img_r]) # BGR for OpenCV
-                
-                cv2.imwrite(str(save_path / frame_file), stacked)
+    manifest = load_manifest(output_root)
+
+    def tasks():
+        for emb_id in embryo_ids:
+            yield dict(emb_id=emb_id, planes=planes, save_path=output_root / emb_id, done=manifest.get(emb_id),
+                       packed_root=packed_root, reduced_decode=reduced_decode, size=size)
+
+    per_worker = {}
+    with open(output_root / MANIFEST_FILE, "a") as journal:
+        def record(result):
+            journal.write(json.dumps({"embryo": result["embryo"], "frames": result["frames"]}) + "\n")
+            journal.flush()
+            manifest[result["embryo"]] = result["frames"]
+            stats = per_worker.setdefault(result["pid"], [0, 0.0])
+            stats[0] += result["processed"]
+            stats[1] += result["seconds"]
+
+        if workers <= 1:
+            for task in tqdm(tasks(), total=len(embryo_ids), desc="Stacking Embryos"):
+                record(stack_embryo(**task))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+                futures = [pool.submit(stack_embryo, **task) for task in tasks()]
+                for future in tqdm(as_completed(futures), total=len(futures), desc="Stacking Embryos"):
+                    record(future.result())
+
+    # Compact the journal to one line per embryo
+    tmp_path = output_root / (MANIFEST_FILE + ".tmp")
+    with open(tmp_path, "w") as f:
+        for emb_id, frames in manifest.items():
+            f.write(json.dumps({"embryo": emb_id, "frames": frames}) + "\n")
+    os.replace(tmp_path, output_root / MANIFEST_FILE)
+
+    total = sum(s[0] for s in per_worker.values())
+    print(f"Stacked {total} new/changed frames across {len(embryo_ids)} embryos")
+    for pid, (frames, seconds) in sorted(per_worker.items()):
+        print(f"  worker {pid}: {frames} frames in {seconds:.1f}s ({frames / seconds if seconds else 0:.1f} frames/sec)")
+    return per_worker
 
 if __name__ == "__main__":
-    create_stacked_dataset("data/raw", "data/processed/stacked_frames")
\ No newline at end of file
+    # Part of the src.data package (relative imports), so run it as a module from the project root:
+    # python -m src.data.preproces
+    create_stacked_dataset("data/raw", "data/processed/stacked_frames", workers=os.cpu_count())
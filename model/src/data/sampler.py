@@ -0,0 +1,76 @@
+import numpy as np
+from torch.utils.data import Sampler
+
+
+class EmbryoLocalityBatchSampler(Sampler):
+    """
+    Batch sampler that shuffles at the level of chunks of consecutive windows
+    from one embryo instead of single windows, so overlapping windows are read
+    back to back and on the same DataLoader worker, where a FrameCache can
+    serve their shared frames.
+
+    Chunks are balanced over `num_workers` streams. Within a stream, groups of
+    `batch_size` chunks are read in lockstep, so a batch takes one window from
+    each chunk (mixing embryos like window-level shuffling) while a chunk's
+    next window follows in the worker's next batch. The streams' batches are
+    interleaved round-robin, matching the order in which the DataLoader hands
+    batches to its workers. When the streams end up with different batch
+    counts, the tail batches may land on another worker (a cache miss, never a
+    wrong sample).
+    chunk_windows: windows per chunk; smaller chunks mix embryos more across batches
+    """
+    def __init__(self, dataset, batch_size, num_workers=0, chunk_windows=8, shuffle=True, seed=0, drop_last=False):
+        self.batch_size = batch_size
+        self.num_streams = max(1, num_workers)
+        self.shuffle = shuffle
+        self.seed = seed
+        self.drop_last = drop_last
+        self.epoch = 0
+
+        # Windows of one embryo in frame order, split into chunks
+        order = np.lexsort((dataset.window_start, dataset.window_embryo))
+        boundaries = np.flatnonzero(np.diff(dataset.window_embryo[order])) + 1
+        self.chunks = [chunk for windows in np.split(order, boundaries)
+                       for chunk in np.array_split(windows, max(1, -(-len(windows) // chunk_windows)))
+                       if len(chunk)]
+
+    def set_epoch(self, epoch):
+        """Reshuffles the chunk order; call once per epoch like DistributedSampler.set_epoch."""
+        self.epoch = epoch
+
+    def _streams(self):
+        chunk_order = np.arange(len(self.chunks))
+        if self.shuffle:
+            chunk_order = np.random.default_rng(self.seed + self.epoch).permutation(len(self.chunks))
+        streams = [[] for _ in range(self.num_streams)]
+        sizes = [0] * self.num_streams
+        for c in chunk_order:
+            # Greedy balance: next chunk goes to the stream with the fewest windows
+            stream = sizes.index(min(sizes))
+            streams[stream].append(self.chunks[c])
+            sizes[stream] += len(self.chunks[c])
+        return [self._interleave(chunks) for chunks in streams]
+
+    def _interleave(self, chunks):
+        """Window order of one stream: window j of each chunk in a group of batch_size, then window j + 1."""
+        order = []
+        for g in range(0, len(chunks), self.batch_size):
+            group = chunks[g:g + self.batch_size]
+            order.extend(int(chunk[j]) for j in range(max(map(len, group))) for chunk in group if j < len(chunk))
+        return order
+
+    def _batches(self, stream):
+        batches = [stream[i:i + self.batch_size] for i in range(0, len(stream), self.batch_size)]
+        if self.drop_last and batches and len(batches[-1]) < self.batch_size:
+            batches.pop()
+        return batches
+
+    def __iter__(self):
+        per_stream = [self._batches(stream) for stream in self._streams()]
+        for i in range(max(map(len, per_stream), default=0)):
+            for batches in per_stream:
+                if i < len(batches):
+                    yield batches[i]
+
+    def __len__(self):
+        return sum(len(self._batches(stream)) for stream in self._streams())
@@ -0,0 +1,63 @@
+import torch
+import torch.nn.functional as F
+
+# ImageNet statistics used by the ResNet18 backbone
+IMAGENET_MEAN = (0.485, 0.456, 0.406)
+IMAGENET_STD = (0.229, 0.224, 0.225)
+
+
+def normalize_window(frames, mean=IMAGENET_MEAN, std=IMAGENET_STD):
+    """
+    Converts a uint8 window (T, 3, H, W) to normalized float32 in one pass.
+    Equivalent to ToTensor() + Normalize() applied frame by frame.
+    """
+    # Fold /255, -mean and /std into a single scale and shift per channel
+    std = torch.tensor(std, dtype=torch.float32)
+    scale = (1.0 / (255.0 * std)).view(1, 3, 1, 1)
+    shift = (torch.tensor(mean, dtype=torch.float32) / std).view(1, 3, 1, 1)
+    return frames.to(torch.float32, copy=True).mul_(scale).sub_(shift)
+
+
+def resize_window(frames, size):
+    """
+    Bilinear (antialiased) resize of a uint8 window (T, 3, H, W) to (T, 3, size, size).
+    Interpolating uint8 directly is several times faster than going through float.
+    """
+    return F.interpolate(frames, size=(size, size), mode="bilinear", antialias=True)
+
+
+class WindowTransform:
+    """
+    Window-level replacement for the per-frame PIL Resize -> ToTensor -> Normalize chain.
+    Takes a uint8 window (T, 3, H, W) and returns normalized float32 (T, 3, size, size).
+    Resizing is skipped when frames already have the target size. With train=True a
+    random resized crop and flips are drawn once per window and applied to every
+    frame, so augmentation is consistent in time; all ops are batched over T.
+    crop_scale: (min, max) fraction of the frame area kept by the crop, None to disable
+    """
+    def __init__(self, size=224, train=False, crop_scale=(0.8, 1.0), hflip=0.5, vflip=0.5,
+                 mean=IMAGENET_MEAN, std=IMAGENET_STD):
+        self.size = size
+        self.train = train
+        self.crop_scale = crop_scale
+        self.hflip = hflip
+        self.vflip = vflip
+        self.mean = mean
+        self.std = std
+
+    def __call__(self, frames):
+        h, w = frames.shape[-2:]
+        if self.train and self.crop_scale is not None:
+            low, high = self.crop_scale
+            side = int(min(h, w) * (low + (high - low) * torch.rand(()).item()) ** 0.5)
+            top = int(torch.randint(0, h - side + 1, ()))
+            left = int(torch.randint(0, w - side + 1, ()))
+            frames = resize_window(frames[..., top:top + side, left:left + side], self.size)
+        elif (h, w) != (self.size, self.size):
+            frames = resize_window(frames, self.size)
+        if self.train:
+            if torch.rand(()) < self.hflip:
+                frames = frames.flip(-1)
+            if torch.rand(()) < self.vflip:
+                frames = frames.flip(-2)
+        return normalize_window(frames, self.mean, self.std)
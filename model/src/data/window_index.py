@@ -0,0 +1,161 @@
+import os
+import json
+import shutil
+import hashlib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from .frame_store import parse_run_index
+from .master_labels import read_labels
+
+# Bump when the layout of the index arrays changes
+INDEX_VERSION = 2
+
+
+def resolve_frame_names(emb_dir):
+    """Lists an embryo directory once and maps RUN{n} -> filename."""
+    try:
+        files = os.listdir(emb_dir)
+    except FileNotFoundError:
+        return {}
+    names = {}
+    for f in files:
+        frame_num = parse_run_index(f)
+        if frame_num is not None:
+            names[frame_num] = f
+    return names
+
+
+def build_window_index(df, frames_root, classes, window_size=16, stride=8):
+    """
+    Flattens a frame-level label table into plain NumPy arrays.
+
+    Row arrays (one entry per labeled frame, sorted by EmbryoID then Frame):
+        row_embryo, frame, time, label, filename (b'' if the JPEG is missing)
+    Window arrays (one entry per sliding window):
+        window_start (row offset), window_embryo (code into embryo_ids)
+
+    A window is rows [window_start, window_start + window_size), so indexing
+    needs only integer slicing and no per-window Python objects.
+    """
+    frames_root = Path(frames_root)
+    # Sorted by the string IDs, the order factorize assigns codes in (numeric 2 < 10, but "10" < "2")
+    df = df.assign(EmbryoID=df["EmbryoID"].astype(str)).sort_values(["EmbryoID", "Frame"], kind="stable")
+
+    row_embryo, embryo_ids = pd.factorize(df["EmbryoID"], sort=True)
+    embryo_ids = np.asarray(embryo_ids, dtype=str)
+
+    # Unknown or missing events fall back to the 'unknown' class
+    label = pd.Index(classes).get_indexer(df["Event"].astype(str))
+    label[label < 0] = classes.index('unknown')
+
+    # Resolve every frame path once: RUN{n} -> filename per embryo
+    frame = df["Frame"].to_numpy(dtype=np.int32)
+    counts = np.bincount(row_embryo, minlength=len(embryo_ids))
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    filenames = []
+    for code, emb_id in enumerate(embryo_ids):
+        names = resolve_frame_names(frames_root / emb_id)
+        filenames.extend(names.get(int(n), "") for n in frame[offsets[code]:offsets[code + 1]])
+
+    # Sliding windows never cross embryo boundaries
+    window_start, window_embryo = [], []
+    for code, count in enumerate(counts):
+        if count >= window_size:
+            starts = offsets[code] + np.arange(0, count - window_size + 1, stride)
+            window_start.append(starts)
+            window_embryo.append(np.full(len(starts), code))
+
+    return {
+        "embryo_ids": embryo_ids,
+        "row_embryo": row_embryo.astype(np.int32),
+        "frame": frame,
+        "time": df["time"].to_numpy(dtype=np.float32),
+        "label": label.astype(np.int64),
+        "filename": np.array([f.encode() for f in filenames], dtype=bytes) if filenames else np.empty(0, dtype="S1"),
+        "window_start": np.concatenate(window_start).astype(np.int64) if window_start else np.empty(0, dtype=np.int64),
+        "window_embryo": np.concatenate(window_embryo).astype(np.int32) if window_embryo else np.empty(0, dtype=np.int32),
+    }
+
+
+def index_cache_key(csv_path, frames_root, classes, window_size, stride):
+    """
+    Hash of everything the index depends on: label file content, window
+    parameters, class list and the frames-root listing. Embryo directory
+    mtimes change whenever a frame is added, removed or renamed.
+    """
+    h = hashlib.sha1()
+    h.update(json.dumps([INDEX_VERSION, window_size, stride, list(classes)]).encode())
+    with open(csv_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+
+    frames_root = Path(frames_root)
+    if frames_root.is_dir():
+        entries = sorted((e.name, e.stat().st_mtime_ns) for e in os.scandir(frames_root) if e.is_dir())
+        h.update(json.dumps(entries).encode())
+    return h.hexdigest()
+
+
+def cache_dir_for(csv_path, frames_root, window_size, stride):
+    """
+    The index cache lives next to the split file, one slot per frames root
+    and window configuration: train.csv -> train.csv.index/<slot>/
+    """
+    csv_path = Path(csv_path)
+    slot = hashlib.sha1(json.dumps([str(Path(frames_root).resolve()), window_size, stride]).encode()).hexdigest()[:12]
+    return csv_path.with_name(csv_path.name + ".index") / slot
+
+
+def load_cached_index(cache_dir, key):
+    """Memory-maps a cached index back in, or returns None if it is missing or stale."""
+    cache_dir = Path(cache_dir)
+    try:
+        with open(cache_dir / "meta.json") as f:
+            meta = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if meta.get("key") != key:
+        return None
+    try:
+        return {name: np.load(cache_dir / f"{name}.npy", mmap_mode="r") for name in meta["arrays"]}
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def save_cached_index(cache_dir, key, index):
+    """Writes the index arrays to a temp dir and swaps it into place."""
+    cache_dir = Path(cache_dir)
+    tmp_dir = cache_dir.with_name(f"{cache_dir.name}.tmp{os.getpid()}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+    for name, arr in index.items():
+        np.save(tmp_dir / f"{name}.npy", arr)
+    # meta.json goes last: its presence marks a complete cache
+    with open(tmp_dir / "meta.json", "w") as f:
+        json.dump({"key": key, "arrays": list(index)}, f)
+
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.replace(tmp_dir, cache_dir)
+
+
+def load_or_build_index(csv_path, frames_root, classes, window_size=16, stride=8, cache=True):
+    """
+    Returns the window index for a split file, reusing the on-disk cache when
+    its key still matches and rebuilding (and re-caching) it otherwise.
+    """
+    if not cache:
+        return build_window_index(read_labels(csv_path), frames_root, classes, window_size, stride)
+
+    key = index_cache_key(csv_path, frames_root, classes, window_size, stride)
+    cache_dir = cache_dir_for(csv_path, frames_root, window_size, stride)
+    index = load_cached_index(cache_dir, key)
+    if index is not None:
+        return index
+
+    index = build_window_index(read_labels(csv_path), frames_root, classes, window_size, stride)
+    try:
+        save_cached_index(cache_dir, key, index)
+    except OSError as e:
+        print(f"[WARNING] Could not cache window index at {cache_dir}: {e}")
+    return index
@@ -0,0 +1,79 @@
+import httpx
+
+from .compression import ChunkReader, UpdateEncoder, apply_chunk
+
+
+class FederatedClient:
+    """
+    Node side of the aggregation server (server.py).
+    pull() loads the global weights into `model` and keeps a copy as the base
+    of the next update; push() streams the delta since then, tensor by tensor,
+    compressed with an UpdateEncoder (whose error-feedback residuals persist
+    across rounds). Pass `transport=httpx.ASGITransport(app)` to talk to an
+    in-process server. node_id lets the server refuse a repeated upload
+    within one round. Pass a long-lived `encoder` to carry its residuals over
+    from earlier clients.
+    """
+    def __init__(self, base_url, model, codec="int8", topk=None, download_codec="fp32", transport=None, timeout=300,
+                 node_id=None, encoder=None):
+        self.base_url = base_url
+        self.node_id = node_id
+        self.model = model
+        self.encoder = encoder or UpdateEncoder(codec, topk)
+        self.download_codec = download_codec
+        self.transport = transport
+        self.timeout = timeout
+        self.round = None
+        self.base = None
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def _http(self):
+        return httpx.AsyncClient(base_url=self.base_url, transport=self.transport, timeout=self.timeout)
+
+    async def pull(self):
+        """Streams the global weights into the model; returns their round."""
+        state = self.model.state_dict()
+        reader = ChunkReader()
+        async with self._http() as http:
+            async with http.stream("GET", "/fed/model", params={"codec": self.download_codec}) as response:
+                response.raise_for_status()
+                round_ = int(response.headers["X-FL-Round"])
+                async for data in response.aiter_raw():
+                    self.bytes_received += len(data)
+                    for header, payload in reader.feed(data):
+                        apply_chunk(state, header, payload)
+        if reader.pending:
+            raise ConnectionError("Global model stream ended inside a chunk")
+        self.base = {name: t.detach().clone() for name, t in state.items()}
+        self.round = round_
+        return round_
+
+    def _chunks(self, state):
+        for name, tensor in state.items():
+            for chunk in self.encoder.encode(name, tensor.detach() - self.base[name]):
+                self.bytes_sent += len(chunk)
+                yield chunk
+
+    async def _body(self, state):
+        # Encoded lazily: only the chunk being sent is held, never the whole update
+        for chunk in self._chunks(state):
+            yield chunk
+
+    async def push(self, num_samples=1, state=None):
+        """
+        Uploads the delta of `state` (default: the model's weights) against the
+        pulled base; returns the server's reply.
+        """
+        if self.base is None:
+            raise RuntimeError("pull() the global model before pushing an update")
+        async with self._http() as http:
+            params = {"round": self.round, "num_samples": num_samples}
+            if self.node_id is not None:
+                params["node_id"] = self.node_id
+            response = await http.post("/fed/update", params=params,
+                                       content=self._body(self.model.state_dict() if state is None else state),
+                                       headers={"Content-Type": "application/octet-stream"})
+        response.raise_for_status()
+        return response.json()
+
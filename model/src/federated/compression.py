@@ -0,0 +1,156 @@
+import json
+import math
+import struct
+
+import torch
+
+# Chunk framing on the wire: <u32 header length><JSON header><payload bytes>
+_HEADER_LEN = struct.Struct("<I")
+
+CODECS = ("fp32", "fp16", "int8")
+DEFAULT_CHUNK_ELEMS = 2**20  # tensors are split into flat slices of at most this many elements
+
+
+def encode_chunk(header, payload=b""):
+    header = json.dumps({**header, "nbytes": len(payload)}).encode()
+    return _HEADER_LEN.pack(len(header)) + header + payload
+
+
+def _quantize(values, codec):
+    """Dense float32 values -> (payload bytes, dequantized values, extra header fields)."""
+    if codec == "fp32":
+        return values.numpy().tobytes(), values, {}
+    if codec == "fp16":
+        half = values.half()
+        return half.numpy().tobytes(), half.float(), {}
+    if codec == "int8":
+        # Symmetric per-chunk scale
+        scale = values.abs().max().item() / 127 if values.numel() else 0.0
+        q = torch.round(values / scale).clamp_(-127, 127).to(torch.int8) if scale > 0 else torch.zeros(values.shape, dtype=torch.int8)
+        return q.numpy().tobytes(), q.float() * scale, {"scale": scale}
+    raise ValueError(f"Unknown codec {codec!r}; expected one of {', '.join(CODECS)}")
+
+
+def _dequantize(payload, header, numel):
+    codec = header["codec"]
+    if codec == "fp32":
+        return torch.frombuffer(bytearray(payload), dtype=torch.float32, count=numel)
+    if codec == "fp16":
+        return torch.frombuffer(bytearray(payload), dtype=torch.float16, count=numel).float()
+    if codec == "int8":
+        return torch.frombuffer(bytearray(payload), dtype=torch.int8, count=numel).float() * header["scale"]
+    raise ValueError(f"Unknown codec {codec!r}")
+
+
+class UpdateEncoder:
+    """
+    Encodes model-update tensors (weight deltas) into framed wire chunks.
+    codec: "fp32", "fp16" or "int8" (symmetric, one scale per chunk)
+    topk: fraction of entries per chunk to send (largest magnitudes), None for dense
+    Lossy settings use error feedback: whatever a round's encoding dropped
+    (quantization error, unsent entries) is carried in a residual and added
+    to the same tensor's delta next round, so nothing is lost for good.
+    Integer tensors (e.g. BatchNorm's num_batches_tracked) are always sent raw.
+    """
+    def __init__(self, codec="int8", topk=None, chunk_elems=DEFAULT_CHUNK_ELEMS, error_feedback=True):
+        if codec not in CODECS:
+            raise ValueError(f"Unknown codec {codec!r}; expected one of {', '.join(CODECS)}")
+        self.codec = codec
+        self.topk = topk
+        self.chunk_elems = chunk_elems
+        self.error_feedback = error_feedback and (codec != "fp32" or topk is not None)
+        self.residuals = {}
+
+    def encode(self, name, delta):
+        """Yields the wire chunks of one tensor."""
+        if not delta.is_floating_point():
+            yield encode_chunk({"name": name, "shape": list(delta.shape), "offset": 0, "numel": delta.numel(),
+                                "codec": "raw", "dtype": str(delta.dtype).replace("torch.", "")},
+                               delta.detach().cpu().contiguous().numpy().tobytes())
+            return
+        flat = delta.detach().float().cpu().reshape(-1)
+        if self.error_feedback and name in self.residuals:
+            flat = flat + self.residuals[name]
+        sent = torch.zeros_like(flat) if self.error_feedback else None
+        for offset in range(0, max(flat.numel(), 1), self.chunk_elems):
+            values = flat[offset:offset + self.chunk_elems]
+            header = {"name": name, "shape": list(delta.shape), "offset": offset, "numel": values.numel(),
+                      "codec": self.codec}
+            if self.topk is not None:
+                k = max(1, math.ceil(self.topk * values.numel())) if values.numel() else 0
+                indices = values.abs().topk(k, sorted=False).indices.to(torch.int32)
+                payload, decoded, extra = _quantize(values[indices.long()], self.codec)
+                header.update(extra, k=k)
+                payload = indices.numpy().tobytes() + payload
+                if sent is not None:
+                    sent[offset + indices.long()] = decoded
+            else:
+                payload, decoded, extra = _quantize(values, self.codec)
+                header.update(extra)
+                if sent is not None:
+                    sent[offset:offset + values.numel()] = decoded
+            yield encode_chunk(header, payload)
+        if self.error_feedback:
+            self.residuals[name] = flat - sent
+
+
+def decode_chunk(header, payload):
+    """
+    Decodes one chunk into (name, shape, offset, values) with float32 values for
+    the flat range [offset, offset + numel), or (name, shape, offset, (indices, values))
+    for a top-k chunk. Raw integer chunks decode to a tensor of their own dtype.
+    """
+    numel = header["numel"]
+    if header["codec"] == "raw":
+        dtype = getattr(torch, header["dtype"])
+        return header["name"], header["shape"], header["offset"], torch.frombuffer(bytearray(payload), dtype=dtype, count=numel) if numel else torch.zeros(0, dtype=dtype)
+    if "k" in header:
+        k = header["k"]
+        indices = torch.frombuffer(bytearray(payload[:4 * k]), dtype=torch.int32, count=k).long() if k else torch.zeros(0, dtype=torch.long)
+        values = _dequantize(payload[4 * k:], header, k) if k else torch.zeros(0)
+        return header["name"], header["shape"], header["offset"], (indices, values)
+    values = _dequantize(payload, header, numel) if numel else torch.zeros(0)
+    return header["name"], header["shape"], header["offset"], values
+
+
+class ChunkReader:
+    """
+    Incremental parser for a stream of framed chunks: feed() it whatever bytes
+    arrive and it yields each complete (header, payload). Holds at most one
+    chunk plus a partial read.
+    """
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def feed(self, data):
+        self._buffer += data
+        while len(self._buffer) >= _HEADER_LEN.size:
+            (header_len,) = _HEADER_LEN.unpack_from(self._buffer)
+            if len(self._buffer) < _HEADER_LEN.size + header_len:
+                return
+            header = json.loads(bytes(self._buffer[_HEADER_LEN.size:_HEADER_LEN.size + header_len]))
+            end = _HEADER_LEN.size + header_len + header["nbytes"]
+            if len(self._buffer) < end:
+                return
+            payload = bytes(self._buffer[_HEADER_LEN.size + header_len:end])
+            del self._buffer[:end]
+            yield header, payload
+
+    @property
+    def pending(self):
+        """Bytes of an incomplete chunk (non-zero at the end of a stream means it was cut off)."""
+        return len(self._buffer)
+
+
+def encode_state(state_dict, codec="fp32", chunk_elems=DEFAULT_CHUNK_ELEMS):
+    """Yields a full state_dict as wire chunks (used for the downlink of global weights)."""
+    encoder = UpdateEncoder(codec, chunk_elems=chunk_elems, error_feedback=False)
+    for name, tensor in state_dict.items():
+        yield from encoder.encode(name, tensor)
+
+
+def apply_chunk(state_dict, header, payload):
+    """Writes one full-state chunk into the matching tensor of `state_dict` (in place)."""
+    name, _, offset, values = decode_chunk(header, payload)
+    target = state_dict[name].view(-1)
+    target[offset:offset + values.numel()] = values.to(target.dtype)
@@ -0,0 +1,158 @@
+import os
+import sys
+import json
+import uuid
+import threading
+import traceback
+import multiprocessing as mp
+from pathlib import Path
+
+import torch
+
+from ..serving.loading import load_state_dict
+
+BASE_FILE = "base.pth"      # snapshot of the global weights the job started from
+FINAL_FILE = "final.pth"    # fine-tuned weights, written atomically when the job succeeds
+CONFIG_FILE = "config.json"
+RESULT_FILE = "result.json"
+ERROR_FILE = "error.txt"
+
+
+class JobBusyError(Exception):
+    """Raised when a local training job is already running."""
+
+
+def _run_job(job_dir, threads, nice):
+    """
+    Child process: one run of trainer.train() starting from the snapshot,
+    under its own CPU budget so the serving process keeps its cores.
+    """
+    job_dir = Path(job_dir)
+    try:
+        if nice:
+            os.nice(nice)
+        torch.set_num_threads(threads)
+        torch.set_num_interop_threads(1)
+        config = json.loads((job_dir / CONFIG_FILE).read_text())
+
+        # trainer uses top-level imports (data., models., training.) and paths relative to the data root
+        sys.path.append(str(Path(__file__).resolve().parents[1]))
+        os.chdir(job_dir)
+        from training import trainer
+        from data.master_labels import read_labels
+
+        os.chdir(config["data_root"])
+        trainer.EPOCHS = config["epochs"]
+        trainer.BATCH_SIZE = config["batch_size"]
+        trainer.LR = config["lr"]
+        trainer.NUM_WORKERS = config["num_workers"]
+        trainer.FRAME_STORE = config["frame_store"]
+        trainer.PRETRAINED = False
+        trainer.MODEL_CONFIG = config.get("model_config") or {}
+        trainer.INIT_CHECKPOINT = job_dir / BASE_FILE
+        trainer.SAVE_DIR = job_dir
+        model = trainer.train()
+
+        torch.save(model.state_dict(), job_dir / (FINAL_FILE + ".tmp"))
+        os.replace(job_dir / (FINAL_FILE + ".tmp"), job_dir / FINAL_FILE)
+        result = {"num_samples": len(read_labels("data/splits/train.csv"))}
+        (job_dir / RESULT_FILE).write_text(json.dumps(result))
+    except BaseException:
+        (job_dir / ERROR_FILE).write_text(traceback.format_exc())
+        raise
+
+
+class LocalTrainingJobs:
+    """
+    Runs local fine-tuning rounds in a separate process, one at a time.
+    The job trains on a snapshot of the weights saved to its directory, so the
+    serving model is never touched while training runs; the result is a new
+    state_dict on disk, swapped in only when the caller decides to.
+    threads: intra-op threads for the training process
+    nice: niceness added to the training process, so inference wins CPU contention
+    """
+    def __init__(self, root, threads=1, nice=10):
+        self.root = Path(root)
+        self.threads = threads
+        self.nice = nice
+        self._ctx = mp.get_context("spawn")
+        self._jobs = {}
+        # submit() runs on executor threads: the slot is reserved under the lock until the process has started
+        self._lock = threading.Lock()
+        self._starting = False
+
+    def running(self):
+        return [job_id for job_id, job in self._jobs.items() if job["process"].is_alive()]
+
+    def submit(self, state_dict, base_round, data_root, epochs=1, batch_size=4, lr=5e-5, num_workers=0,
+               frame_store=None, model_config=None):
+        """
+        Snapshots `state_dict` and starts training on `data_root` (data/splits/*.csv as for trainer.py).
+        model_config: EmbryoGenModel arguments the snapshot was built with (e.g. a distilled backbone)
+        """
+        with self._lock:
+            if self._starting or self.running():
+                raise JobBusyError("A local training job is already running")
+            self._starting = True
+        try:
+            return self._start(state_dict, base_round, data_root, epochs, batch_size, lr, num_workers, frame_store,
+                               model_config)
+        finally:
+            with self._lock:
+                self._starting = False
+
+    def _start(self, state_dict, base_round, data_root, epochs, batch_size, lr, num_workers, frame_store,
+               model_config):
+        job_id = uuid.uuid4().hex[:12]
+        job_dir = self.root / job_id
+        job_dir.mkdir(parents=True)
+        torch.save({k: v.detach().cpu() for k, v in state_dict.items()}, job_dir / BASE_FILE)
+        config = {"base_round": base_round, "data_root": str(Path(data_root).resolve()), "epochs": epochs,
+                  "batch_size": batch_size, "lr": lr, "num_workers": num_workers, "frame_store": frame_store,
+                  "model_config": model_config}
+        (job_dir / CONFIG_FILE).write_text(json.dumps(config))
+
+        process = self._ctx.Process(target=_run_job, args=(str(job_dir), self.threads, self.nice),
+                                    name=f"fl-train-{job_id}", daemon=True)
+        process.start()
+        self._jobs[job_id] = {"dir": job_dir, "process": process, "config": config}
+        return job_id
+
+    def wait(self, job_id, timeout=None):
+        """Blocks until the job's process exits (or `timeout` seconds pass); returns its status."""
+        self._jobs[job_id]["process"].join(timeout)
+        return self.status(job_id)
+
+    def status(self, job_id):
+        """running/done/failed plus finished epochs; raises KeyError for unknown jobs."""
+        job = self._jobs[job_id]
+        job_dir = job["dir"]
+        timing = job_dir / "timing.jsonl"
+        epochs_done = sum(1 for line in open(timing) if '"phase": "train"' in line) if timing.exists() else 0
+        if job["process"].is_alive():
+            state = "running"
+        elif (job_dir / FINAL_FILE).exists():
+            state = "done"
+        else:
+            state = "failed"
+        status = {"job_id": job_id, "state": state, "epochs_done": epochs_done, **job["config"]}
+        if (job_dir / RESULT_FILE).exists():
+            status.update(json.loads((job_dir / RESULT_FILE).read_text()))
+        if state == "failed":
+            error = job_dir / ERROR_FILE
+            status["error"] = error.read_text().strip().splitlines()[-1] if error.exists() else (
+                f"exit code {job['process'].exitcode}")
+        return status
+
+    def weights(self, job_id):
+        """(base, final) state_dicts of a finished job, memory-mapped from disk."""
+        job_dir = self._jobs[job_id]["dir"]
+        if not (job_dir / FINAL_FILE).exists():
+            raise FileNotFoundError(f"Job {job_id} has not finished")
+        return load_state_dict(job_dir / BASE_FILE), load_state_dict(job_dir / FINAL_FILE)
+
+    def stop(self, timeout=5):
+        for job in self._jobs.values():
+            if job["process"].is_alive():
+                job["process"].terminate()
+                job["process"].join(timeout)
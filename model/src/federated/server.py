@@ -0,0 +1,235 @@
+"""
+FedAvg aggregation server. Nodes download the global weights, train locally
+and upload compressed weight deltas (see compression.py) as a chunked request
+body. Chunks are validated as they arrive and staged, still compressed, in a
+per-upload temporary file; only a complete upload is folded into the running
+weighted sum, so a broken or rejected upload leaves no trace. The server holds
+the global model and one accumulator, never a client's update: a staged
+upload stays in memory only up to SPOOL_BYTES and spills to disk beyond that,
+and uploads from several nodes are received concurrently. Once `min_clients`
+updates for the current round are in, the averaged delta is applied and the
+next round starts.
+
+Usage: python -m src.federated.server [--checkpoint best_model.pth] [--min-clients 3] [--port 8100]
+"""
+import time
+import argparse
+import tempfile
+from typing import Optional
+
+import torch
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from .compression import CODECS, ChunkReader, decode_chunk, encode_chunk, encode_state
+
+SPOOL_BYTES = 2**20  # staged bytes an upload keeps in memory before its temporary file moves to disk
+READ_BYTES = 2**20   # block size when folding a staged upload back in
+
+
+class StaleRoundError(Exception):
+    pass
+
+
+class DuplicateUpdateError(Exception):
+    """Raised when a node uploads a second update for the same round."""
+
+
+class Aggregator:
+    """
+    Running FedAvg over streamed delta chunks.
+    Deltas are weighted by each node's sample count. An upload's chunks are
+    staged (add_chunk) in the temporary file from stage() and only folded in
+    by finish_update once the whole stream has arrived, so an upload that
+    breaks off contributes nothing, and a node that already completed an
+    update this round is refused.
+    """
+    def __init__(self, state_dict, min_clients=2, spool_bytes=SPOOL_BYTES):
+        self.state = {name: t.detach().clone() for name, t in state_dict.items()}
+        self.min_clients = min_clients
+        self.spool_bytes = spool_bytes
+        self.round = 0
+        self.history = []
+        self.staged_bytes = 0  # staged chunks of the uploads in flight still held in memory
+        self._new_round()
+
+    def _new_round(self):
+        self._sums = {}
+        self._weights = {}
+        self._nodes = set()
+        self.received = 0
+        self.bytes_received = 0
+        self.peak_chunk_bytes = 0
+        self.peak_staged_bytes = self.staged_bytes
+        self.round_start = time.perf_counter()
+
+    def accumulator_bytes(self):
+        return sum(t.numel() * t.element_size() for t in self._sums.values())
+
+    def state_bytes(self):
+        return sum(t.numel() * t.element_size() for t in self.state.values())
+
+    def _check_round(self, round_):
+        if round_ != self.round:
+            raise StaleRoundError(f"Update for round {round_}, but the server is at round {self.round}")
+
+    def stage(self):
+        """A temporary file for one upload's chunks (in memory up to spool_bytes, then on disk)."""
+        return tempfile.SpooledTemporaryFile(max_size=self.spool_bytes)
+
+    def _in_memory(self, size):
+        return size if size <= self.spool_bytes else 0
+
+    def add_chunk(self, round_, header, payload, staged):
+        """Validates one chunk and appends it (still compressed) to `staged`, the upload's file from stage()."""
+        self._check_round(round_)
+        name, shape, offset, values = decode_chunk(header, payload)
+        if name not in self.state:
+            raise KeyError(f"Unknown tensor {name!r}")
+        if isinstance(values, tuple):
+            values = values[1]
+        before = staged.tell()
+        staged.write(encode_chunk(header, payload))
+        self.staged_bytes += self._in_memory(staged.tell()) - self._in_memory(before)
+        self.peak_staged_bytes = max(self.peak_staged_bytes, self.staged_bytes)
+        self.bytes_received += len(payload)
+        self.peak_chunk_bytes = max(self.peak_chunk_bytes, len(payload) + values.numel() * 4)
+
+    def release(self, staged):
+        """Closes an upload's staged file once it was folded in or refused."""
+        self.staged_bytes -= self._in_memory(staged.seek(0, 2))
+        staged.close()
+
+    def _fold(self, weight, header, payload):
+        name, shape, offset, values = decode_chunk(header, payload)
+        total = self._sums.get(name)
+        if total is None:
+            # float64 so integer buffers average exactly
+            dtype = torch.float32 if self.state[name].is_floating_point() else torch.float64
+            total = self._sums[name] = torch.zeros(self.state[name].numel(), dtype=dtype)
+        if isinstance(values, tuple):
+            indices, values = values
+            total.index_add_(0, indices + offset, values.to(total.dtype), alpha=weight)
+        else:
+            total[offset:offset + values.numel()].add_(values.to(total.dtype), alpha=weight)
+
+    def finish_update(self, round_, weight, staged, node_id=None):
+        """
+        Folds a complete upload's staged chunks into the running sums, weighted
+        by `weight`, and counts it; closes the round once enough have arrived.
+        Reads the staged file back a block at a time, so only one chunk is
+        decoded at once. node_id: refuses a second update from the same node
+        in one round.
+        """
+        self._check_round(round_)
+        if node_id is not None and node_id in self._nodes:
+            raise DuplicateUpdateError(f"Node {node_id!r} already sent an update for round {round_}")
+        names = set()
+        reader = ChunkReader()
+        staged.seek(0)
+        for data in iter(lambda: staged.read(READ_BYTES), b""):
+            for header, payload in reader.feed(data):
+                self._fold(weight, header, payload)
+                names.add(header["name"])
+        for name in names:
+            self._weights[name] = self._weights.get(name, 0.0) + weight
+        if node_id is not None:
+            self._nodes.add(node_id)
+        self.received += 1
+        if self.received >= self.min_clients:
+            self._apply()
+
+    def _apply(self):
+        for name, total in self._sums.items():
+            target = self.state[name]
+            mean = (total / self._weights[name]).view(target.shape)
+            if target.is_floating_point():
+                target.add_(mean.to(target.dtype))
+            else:
+                target.add_(torch.round(mean).to(target.dtype))
+        self.history.append({"round": self.round, "clients": self.received, "bytes_received": self.bytes_received,
+                             "accumulator_bytes": self.accumulator_bytes(), "peak_chunk_bytes": self.peak_chunk_bytes,
+                             "peak_staged_bytes": self.peak_staged_bytes, "seconds": time.perf_counter() - self.round_start})
+        self.round += 1
+        self._new_round()
+
+    def stats(self):
+        return {"round": self.round, "received": self.received, "min_clients": self.min_clients,
+                "state_bytes": self.state_bytes(), "accumulator_bytes": self.accumulator_bytes(),
+                "staged_bytes": self.staged_bytes, "bytes_received": self.bytes_received,
+                "history": self.history[-10:]}
+
+
+def create_app(aggregator):
+    app = FastAPI(title="EmbryoGen Aggregation Server")
+    app.state.aggregator = aggregator
+
+    @app.get("/fed/round")
+    async def current_round():
+        return {"round": aggregator.round, "received": aggregator.received, "min_clients": aggregator.min_clients}
+
+    @app.get("/fed/model")
+    async def global_model(codec: str = "fp32"):
+        """Streams the current global weights as framed chunks; X-FL-Round names their round."""
+        if codec not in CODECS:
+            raise HTTPException(status_code=400, detail=f"codec must be one of {', '.join(CODECS)}")
+        # Snapshot so a round closing mid-download cannot mix two rounds
+        state = {name: t.clone() for name, t in aggregator.state.items()}
+        return StreamingResponse(encode_state(state, codec), media_type="application/octet-stream",
+                                 headers={"X-FL-Round": str(aggregator.round)})
+
+    @app.post("/fed/update")
+    async def upload_update(request: Request, round: int, num_samples: int = 1, node_id: Optional[str] = None):
+        """
+        Receives one node's delta stream for `round`, weighted by `num_samples`.
+        It counts only if the whole stream arrives; node_id refuses repeats within a round.
+        """
+        if round != aggregator.round:
+            raise HTTPException(status_code=409, detail=f"Server is at round {aggregator.round}")
+        if num_samples <= 0:
+            raise HTTPException(status_code=400, detail="num_samples must be positive")
+        reader = ChunkReader()
+        staged = aggregator.stage()
+        chunks = 0
+        try:
+            async for data in request.stream():
+                for header, payload in reader.feed(data):
+                    aggregator.add_chunk(round, header, payload, staged)
+                    chunks += 1
+            if reader.pending:
+                raise ValueError("Update stream ended inside a chunk")
+            aggregator.finish_update(round, float(num_samples), staged, node_id)
+        except (StaleRoundError, DuplicateUpdateError) as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        except (KeyError, ValueError) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        finally:
+            aggregator.release(staged)
+        return {"accepted": True, "round": round, "chunks": chunks, "server_round": aggregator.round}
+
+    @app.get("/fed/stats")
+    async def stats():
+        """Bytes received and aggregation memory for the current and recent rounds."""
+        return aggregator.stats()
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+    from ..serving.loading import load_state_dict
+    from ..models.hybrid_model import EmbryoGenModel
+
+    parser = argparse.ArgumentParser(description="FedAvg aggregation server")
+    parser.add_argument("--checkpoint", default=None, help="initial global weights (trainer state_dict)")
+    parser.add_argument("--backbone", default="resnet18", help="architecture of the initial weights without --checkpoint")
+    parser.add_argument("--width-mult", type=float, default=1.0)
+    parser.add_argument("--min-clients", type=int, default=2)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8100)
+    args = parser.parse_args()
+
+    state = (load_state_dict(args.checkpoint) if args.checkpoint
+             else EmbryoGenModel(num_classes=17, pretrained=False, backbone=args.backbone,
+                                 width_mult=args.width_mult).state_dict())
+    uvicorn.run(create_app(Aggregator(state, args.min_clients)), host=args.host, port=args.port)
@@ -1,29 +1,161 @@
+import os
+import time
+import asyncio
+import functools
+import traceback
 import torch
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException
-from typing import List
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+from typing import List, Optional
+import httpx
 import uvicorn
-from PIL import Image
 import io
 import pandas as pd
 import numpy as np
-from torchvision import transforms
+from .serving.batching import MicroBatcher, QueueFullError
+from .federated.client import FederatedClient
+from .federated.compression import CODECS, UpdateEncoder
+from .federated.jobs import JobBusyError, LocalTrainingJobs
+from .instrumentation import Instrumentation
+from .models.backends import apply_backend
 from .models.hybrid_model import EmbryoGenModel
+from .serving.loading import calibration_frames, load_model, warmup
+from .serving.preprocess import FrameDecoder
+from .serving.result_cache import ResultCache, file_digest, state_digest
+from .serving.sessions import SessionStore
 
-app = FastAPI(title="EmbryoGen Federated Node")
+# --- Serving Configuration ---
+MAX_BATCH = int(os.environ.get("FL_MAX_BATCH", 8))            # requests fused into one forward pass
+MAX_WAIT_MS = float(os.environ.get("FL_MAX_WAIT_MS", 10))     # how long the first request waits for company
+MAX_QUEUE = int(os.environ.get("FL_MAX_QUEUE", 64))           # pending requests before answering 503
+RETRY_AFTER_S = int(os.environ.get("FL_RETRY_AFTER_S", 1))
+SESSION_MEMORY_MB = float(os.environ.get("FL_SESSION_MEMORY_MB", 256)) # feature cache budget for streaming sessions
+DECODE_WORKERS = int(os.environ.get("FL_DECODE_WORKERS", min(4, os.cpu_count() or 1)))
+METRICS = os.environ.get("FL_METRICS", "1") == "1"           # per-stage request histograms at /metrics
+SKIP_THRESHOLD = float(os.environ.get("FL_SKIP_THRESHOLD", 0)) # reuse features of near-static frames, e.g. 0.01
+RESULT_CACHE_MB = float(os.environ.get("FL_RESULT_CACHE_MB", 64))         # in-memory /fl/execute results (0 disables)
+RESULT_CACHE_DIR = os.environ.get("FL_RESULT_CACHE_DIR")                  # optional on-disk tier that survives restarts
+RESULT_CACHE_DISK_MB = float(os.environ.get("FL_RESULT_CACHE_DISK_MB", 1024))
+
+# --- Federation ---
+SERVER_URL = os.environ.get("FL_SERVER_URL")                  # aggregation server (python -m src.federated.server)
+NODE_ID = os.environ.get("FL_NODE_ID", "local_node_1")
+DATA_ROOT = os.environ.get("FL_DATA_ROOT")                    # local training data (data/splits/*.csv layout of trainer.py)
+JOB_DIR = os.environ.get("FL_JOB_DIR", "experiments/fl_jobs") # weight snapshots and results of local training jobs
+TRAIN_THREADS = int(os.environ.get("FL_TRAIN_THREADS", max(1, (os.cpu_count() or 1) // 2)))
+TRAIN_NICE = int(os.environ.get("FL_TRAIN_NICE", 10))         # lower CPU priority of the training process
+
+# --- Model Configuration ---
+# With FL_SERVER_URL the global weights are pulled from the aggregation server at startup instead
+CHECKPOINT = os.environ.get("FL_CHECKPOINT")                  # trainer state_dict (.pth), loaded memory-mapped
+TORCHSCRIPT = os.environ.get("FL_TORCHSCRIPT")                # or a TorchScript artifact (python -m src.serving.loading)
+ONNX_DIR = os.environ.get("FL_ONNX_DIR")                      # or ONNX graphs run by ONNX Runtime (python -m src.serving.onnx_backend)
+ORT_INTRA_THREADS = int(os.environ.get("FL_ORT_INTRA_THREADS", os.cpu_count() or 1))
+ORT_INTER_THREADS = int(os.environ.get("FL_ORT_INTER_THREADS", 1))
+PRETRAINED = os.environ.get("FL_PRETRAINED", "1") == "1"      # ImageNet backbone when neither is given (needs network)
+# Eager model architecture: FL_BACKBONE=mobilenet_v3_small (+ FL_INPUT_SIZE, FL_WIDTH_MULT) serves a
+# distilled student (python src/training/distill.py writes the matching student_config.json).
+# Uploads are decoded straight to FL_INPUT_SIZE, so the model never resizes them itself.
+MODEL_CONFIG = {"backbone": os.environ.get("FL_BACKBONE", "resnet18"),
+                "input_size": int(os.environ.get("FL_INPUT_SIZE", 224)),
+                "width_mult": float(os.environ.get("FL_WIDTH_MULT", 1.0))}
+WARMUP_STEPS = int(os.environ.get("FL_WARMUP_STEPS", 2))      # dummy forward passes before reporting ready
+BACKEND = os.environ.get("FL_BACKEND", "eager")               # see models.backends, e.g. static_int8+dynamic_int8
+CALIBRATION_STORE = os.environ.get("FL_CALIBRATION_STORE")    # packed frame store sampled to calibrate static_int8
+CALIBRATION_FRAMES = int(os.environ.get("FL_CALIBRATION_FRAMES", 64))
 
-# --- Model Initialization ---
-# Initialize with random weights since we don't have a pretrained .pth file
-# In a real FL scenario, this would load the global model weights sent by the server
 device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-model = EmbryoGenModel(num_classes=17).to(device)
-model.eval()
+
+# --- Model Initialization ---
+# Nothing is loaded at import time: the model is built and warmed up in the
+# background once the server starts, and /fl/ready answers 503 until then.
+model = None
+source_model = None  # eager fp32 EmbryoGenModel behind `model` (None for TorchScript/ONNX): snapshots and swaps
+calibration = None
+batcher = None    # all inference runs on one background thread that micro-batches concurrent requests
+sessions = None   # per-embryo streaming sessions keep backbone features server-side (LRU-evicted)
+result_cache = None  # /fl/execute logits keyed by upload bytes, times and weights version
+startup = {"ready": False, "error": None}
+fl_state = {"round": 0}  # round of the global weights being served (0 without an aggregation server)
+jobs = LocalTrainingJobs(JOB_DIR, threads=TRAIN_THREADS, nice=TRAIN_NICE)
+# One encoder per (codec, topk) for the node's lifetime: each push carries the error-feedback
+# residual (entries top-k left out, quantization error) of the previous one
+push_encoders = {}
+push_lock = asyncio.Lock()
+
+# Per-stage timings of /fl/execute: upload read, decode, CSV parsing, inference (incl. queueing), response
+metrics = Instrumentation(enabled=METRICS)
+
+def model_version(source=None):
+    """Identifies the served weights (content hash + backend + decode size) for the result cache."""
+    digest = state_digest(source.state_dict()) if source is not None else file_digest(TORCHSCRIPT or ONNX_DIR)
+    return (f"{digest}-{BACKEND}-{MODEL_CONFIG['input_size']}px"
+            + (f"-skip{SKIP_THRESHOLD:g}" if SKIP_THRESHOLD else ""))
+
+def load_and_warmup():
+    global model, source_model, calibration, batcher, sessions, result_cache
+    start = time.perf_counter()
+    model = load_model(checkpoint=CHECKPOINT, torchscript=TORCHSCRIPT, onnx_dir=ONNX_DIR, num_classes=17,
+                       pretrained=PRETRAINED and not SERVER_URL, device=device,
+                       intra_op_threads=ORT_INTRA_THREADS, inter_op_threads=ORT_INTER_THREADS,
+                       model_config=MODEL_CONFIG)
+    if SERVER_URL and not (TORCHSCRIPT or ONNX_DIR):
+        # Runs on an executor thread, so it gets its own event loop
+        fl_state["round"] = asyncio.run(FederatedClient(SERVER_URL, model).pull())
+        startup["fl_round"] = fl_state["round"]
+    calibration = (calibration_frames(CALIBRATION_STORE, CALIBRATION_FRAMES, size=MODEL_CONFIG["input_size"])
+                   if CALIBRATION_STORE else None)
+    source_model = model if isinstance(model, EmbryoGenModel) else None
+    model = apply_backend(model, BACKEND, calibration)
+    startup["backend"] = BACKEND
+    startup["load_s"] = time.perf_counter() - start
+    startup["warmup_s"] = warmup(model, steps=WARMUP_STEPS, size=MODEL_CONFIG["input_size"])
+
+    batcher = MicroBatcher(model, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS, max_queue=MAX_QUEUE, device=device,
+                           skip_threshold=SKIP_THRESHOLD)
+    sessions = SessionStore(model, max_bytes=int(SESSION_MEMORY_MB * 2**20), skip_threshold=SKIP_THRESHOLD)
+    if RESULT_CACHE_MB > 0:
+        result_cache = ResultCache(model_version(source_model), max_bytes=int(RESULT_CACHE_MB * 2**20),
+                                   disk_dir=RESULT_CACHE_DIR, disk_max_bytes=int(RESULT_CACHE_DISK_MB * 2**20))
+    batcher.start()
+    startup["ready"] = True
+
+async def initialize():
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, load_and_warmup)
+    except Exception as e:
+        traceback.print_exc()
+        startup["error"] = f"{type(e).__name__}: {e}"
+
+def require_ready():
+    if not startup["ready"]:
+        raise HTTPException(status_code=503, detail=startup["error"] or "Model is loading",
+                            headers={"Retry-After": str(RETRY_AFTER_S)})
+
+@asynccontextmanager
+async def lifespan(app):
+    init = asyncio.create_task(initialize())
+    yield
+    await init
+    if batcher is not None:
+        batcher.stop()
+    decoder.shutdown()
+    jobs.stop()
+
+app = FastAPI(title="EmbryoGen Federated Node", lifespan=lifespan)
 
 # --- Preprocessing ---
-image_transform = transforms.Compose([
-    transforms.Resize((224, 224)),
-    transforms.ToTensor(),
-    transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225])
-])
+# Resize to the backbone's input size (224, or FL_INPUT_SIZE for a distilled student) + ImageNet
+# normalization, decoded in parallel off the event loop
+decoder = FrameDecoder(workers=DECODE_WORKERS, size=MODEL_CONFIG["input_size"])
+
+@app.get("/fl/ready")
+async def readiness():
+    """200 once the model is loaded and warmed up, 503 before (or if loading failed)."""
+    require_ready()
+    return {k: v for k, v in startup.items() if k != "error"}
 
 def process_clinical_data(csv_file: bytes) -> torch.Tensor:
     """
@@ -63,33 +195,46 @@ async def execute_fl_task(
     
     if not images:
         raise HTTPException(status_code=400, detail="No images provided")
+    require_ready()
+    request_start = time.perf_counter()
+    metrics.count("execute_requests")
+    metrics.count("execute_frames", len(images))
 
     try:
-        # 1. Process Images
-        img_tensors = []
-        for img_file in images:
-            content = await img_file.read()
-            image = Image.open(io.BytesIO(content)).convert("RGB")
-            img_tensors.append(image_transform(image))
-        
-        # Stack into (Batch=1, Time, Channels, Height, Width)
-        # The model expects batched input
-        frames_tensor = torch.stack(img_tensors).unsqueeze(0).to(device)
-        
-        # 2. Process Clinical Data
-        clinical_content = await clinical_data.read()
-        times_tensor = process_clinical_data(clinical_content).unsqueeze(0).to(device)
+        with metrics.span("read_upload"):
+            contents = [await img_file.read() for img_file in images]
+            clinical_content = await clinical_data.read()
+
+        # 1. Process Clinical Data
+        with metrics.span("parse_csv"):
+            times_tensor = process_clinical_data(clinical_content)
         
         # Ensure times match frames dimension (truncate or pad if necessary)
         # For simplicity, we'll resize times to match frames count
-        b, t, c, h, w = frames_tensor.shape
-        if times_tensor.shape[1] != t:
+        t = len(contents)
+        if times_tensor.shape[0] != t:
              # Create linear time steps as fallback or resize
-             times_tensor = torch.linspace(0, 120, steps=t).unsqueeze(0).to(device)
+             times_tensor = torch.linspace(0, 120, steps=t)
+
+        async def infer():
+            # 2. Process Images
+            # Decoded into one (Time, Channels, Height, Width) batch
+            with metrics.span("decode"):
+                frames_tensor = await decoder.decode_normalized(contents)
+
+            # 3. Validated Inference (Local Step)
+            # Queued to the micro-batcher; sequences longer than 16 frames are scored
+            # with overlapping windows over per-frame features computed once
+            with metrics.span("inference"):
+                return await batcher.submit(frames_tensor, times_tensor)
 
-        # 3. Validated Inference (Local Step)
-        with torch.no_grad():
-            logits = model(frames_tensor, times_tensor)
+        # Re-submitted sequences (same bytes, times and weights) skip decoding and
+        # inference; identical requests in flight share one computation
+        if result_cache is not None:
+            logits, _ = await result_cache.get_or_compute(result_cache.key(contents, times_tensor), infer)
+        else:
+            logits = await infer()
+        with metrics.span("postprocess"), torch.no_grad():
             probs = torch.softmax(logits, dim=-1)
             
             # Simple viability score (e.g., prob of 'tB' (Blastocyst) or similar positive class)
@@ -101,20 +246,255 @@ async def execute_fl_task(
             
         return {
             "status": "success",
-            "fl_round": 1,
-            "node_id": "local_node_1",
+            "fl_round": fl_state["round"],
+            "node_id": NODE_ID,
             "results": {
                 "viability_score": viability_score,
                 "confidence": viability_score * 100, # Mock connection
                 "frames_processed": len(images),
-                "predictions": predicted_class.cpu().tolist()[0]
+                "predictions": predicted_class.cpu().tolist()
             }
         }
 
+    except QueueFullError as e:
+        metrics.count("execute_rejected")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(RETRY_AFTER_S)})
     except Exception as e:
-        import traceback
+        metrics.count("execute_errors")
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        metrics.observe("execute", time.perf_counter() - request_start)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus text format: /fl/execute stage histograms, request counters, queue and session gauges."""
+    gauges = {"ready": int(startup["ready"])}
+    if startup["ready"]:
+        stats, streaming = batcher.stats(), sessions.stats()
+        gauges.update(queue_depth=stats["queue_depth"], batcher_rejected=stats["rejected"], batches=stats["batches"],
+                      frames_skipped=stats["frames_skipped"],
+                      sessions=streaming["sessions"], session_bytes=streaming["bytes"],
+                      session_evictions=streaming["evictions"])
+        if result_cache is not None:
+            cached = result_cache.stats()
+            gauges.update({f"result_cache_{k}": cached[k] for k in (
+                "entries", "bytes", "disk_bytes", "hits", "disk_hits", "misses", "coalesced", "evictions",
+                "invalidations")})
+    return PlainTextResponse(metrics.prometheus(gauges=gauges), media_type="text/plain; version=0.0.4")
+
+@app.get("/fl/stats")
+async def batching_stats():
+    """Queue depth, realized batch sizes and p50/p99 inference latency."""
+    require_ready()
+    return {**batcher.stats(), "streaming": sessions.stats(),
+            "result_cache": result_cache.stats() if result_cache is not None else None}
+
+# --- Streaming Sessions ---
+# Incubators add one frame every 10-20 minutes; only the new frames go through the backbone.
+
+def timeline_response(session_id, logits):
+    probs = torch.softmax(logits, dim=-1)
+    confidence, predicted_class = torch.max(probs, dim=-1)
+    return {
+        "session_id": session_id,
+        "frames": len(logits),
+        "predictions": predicted_class.tolist(),
+        "confidence": confidence.tolist(),
+    }
+
+@app.post("/fl/sessions")
+async def open_session():
+    require_ready()
+    return {"session_id": sessions.create()}
+
+@app.post("/fl/sessions/{session_id}/frames")
+async def append_frames(
+    session_id: str,
+    images: List[UploadFile] = File(...),
+    times: str = Form(...)
+):
+    """Appends frame(s) in order; `times` holds one comma-separated elapsed time per image."""
+    require_ready()
+    try:
+        sessions.get(session_id)
+        time_values = [float(x) for x in times.split(",") if x.strip()]
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Unknown or evicted session")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="times must be comma-separated numbers")
+    if len(time_values) != len(images):
+        raise HTTPException(status_code=400, detail=f"Got {len(images)} images but {len(time_values)} times")
+
+    contents = [await img_file.read() for img_file in images]
+    frames_tensor = await decoder.decode_normalized(contents)
+    try:
+        length = await batcher.run(sessions.append, session_id, frames_tensor, torch.tensor(time_values))
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Unknown or evicted session")
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(RETRY_AFTER_S)})
+    return {"session_id": session_id, "frames": length}
+
+@app.get("/fl/sessions/{session_id}/timeline")
+async def session_timeline(session_id: str):
+    require_ready()
+    try:
+        logits = await batcher.run(sessions.timeline, session_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Unknown or evicted session")
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(RETRY_AFTER_S)})
+    return timeline_response(session_id, logits)
+
+@app.delete("/fl/sessions/{session_id}")
+async def close_session(session_id: str):
+    require_ready()
+    if not sessions.delete(session_id):
+        raise HTTPException(status_code=404, detail="Unknown or evicted session")
+    return {"session_id": session_id, "closed": True}
+
+# --- Local Training Jobs ---
+# Fine-tuning runs in a separate low-priority process on a snapshot of the served
+# weights; inference keeps serving the current global model until a new one is
+# accepted with /fl/sync and swapped in between two inference batches.
+
+class TrainingJobRequest(BaseModel):
+    epochs: int = 1
+    batch_size: int = 4
+    lr: float = 5e-5
+    num_workers: int = 0
+    data_root: Optional[str] = None     # defaults to FL_DATA_ROOT
+    frame_store: Optional[str] = None   # relative to data_root, e.g. data/processed/frame_store
+
+def build_serving_model(source):
+    """The configured backend over an eager EmbryoGenModel, warmed up (runs off the inference thread)."""
+    source = source.to(device).eval()
+    served = apply_backend(source, BACKEND, calibration)
+    warmup(served, steps=WARMUP_STEPS, size=MODEL_CONFIG["input_size"])
+    return served
+
+async def hot_swap(source, fl_round):
+    """
+    Prepares the new model on an executor thread, then swaps it in on the
+    inference thread between batches, so every request sees either the old
+    or the new model. Streaming sessions are reset and cached /fl/execute
+    results invalidated: both came from the old weights. Returns how many
+    sessions were dropped.
+    """
+    loop = asyncio.get_running_loop()
+    served = await loop.run_in_executor(None, build_serving_model, source)
+    version = await loop.run_in_executor(None, model_version, source) if result_cache is not None else None
+
+    def swap():
+        global model, source_model
+        model, source_model = served, source
+        batcher.model = served
+        sessions.model = served
+        fl_state["round"] = startup["fl_round"] = fl_round
+        dropped = sessions.clear()
+        if result_cache is not None:
+            # Memory tier only here; the disk tier is pruned on the cache's own thread
+            result_cache.invalidate(version)
+        return dropped
+
+    return await batcher.run(swap)
+
+def require_job(job_id):
+    try:
+        return jobs.status(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Unknown job")
+
+@app.post("/fl/jobs", status_code=202)
+async def submit_training_job(request: TrainingJobRequest):
+    """Starts a local fine-tuning round on the node's data from the currently served global weights."""
+    require_ready()
+    if source_model is None:
+        raise HTTPException(status_code=409, detail="Local training needs an eager model (not TorchScript/ONNX)")
+    data_root = request.data_root or DATA_ROOT
+    if not data_root:
+        raise HTTPException(status_code=400, detail="No data_root given and FL_DATA_ROOT is not set")
+    # Saving the snapshot takes a moment, so it happens off the event loop
+    submit = functools.partial(jobs.submit, source_model.state_dict(), fl_state["round"], data_root,
+                               epochs=request.epochs, batch_size=request.batch_size, lr=request.lr,
+                               num_workers=request.num_workers, frame_store=request.frame_store,
+                               model_config=MODEL_CONFIG)
+    try:
+        job_id = await asyncio.get_running_loop().run_in_executor(None, submit)
+    except JobBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return jobs.status(job_id)
+
+@app.get("/fl/jobs/{job_id}")
+async def training_job_status(job_id: str):
+    return require_job(job_id)
+
+@app.get("/fl/jobs/{job_id}/delta")
+async def training_job_delta(job_id: str, codec: str = "fp32", topk: Optional[float] = None):
+    """Streams the job's weight update (fine-tuned - base) in the aggregation server's chunk format."""
+    status = require_job(job_id)
+    if status["state"] != "done":
+        raise HTTPException(status_code=409, detail=f"Job is {status['state']}")
+    if codec not in CODECS:
+        raise HTTPException(status_code=400, detail=f"codec must be one of {', '.join(CODECS)}")
+    base, final = jobs.weights(job_id)
+    encoder = UpdateEncoder(codec, topk, error_feedback=False)
+
+    def chunks():
+        for name, tensor in final.items():
+            yield from encoder.encode(name, tensor - base[name])
+
+    return StreamingResponse(chunks(), media_type="application/octet-stream",
+                             headers={"X-FL-Round": str(status["base_round"]),
+                                      "X-FL-Num-Samples": str(status.get("num_samples", 1))})
+
+@app.post("/fl/jobs/{job_id}/push")
+async def push_training_job(job_id: str, codec: str = "int8", topk: Optional[float] = None):
+    """Uploads the job's update to the aggregation server (FL_SERVER_URL) for the round it trained on."""
+    status = require_job(job_id)
+    if not SERVER_URL:
+        raise HTTPException(status_code=400, detail="FL_SERVER_URL is not set")
+    if status["state"] != "done":
+        raise HTTPException(status_code=409, detail=f"Job is {status['state']}")
+    if codec not in CODECS:
+        raise HTTPException(status_code=400, detail=f"codec must be one of {', '.join(CODECS)}")
+    base, final = jobs.weights(job_id)
+    # Serialized, so two pushes never update the same residuals at once
+    async with push_lock:
+        encoder = push_encoders.setdefault((codec, topk), UpdateEncoder(codec, topk))
+        client = FederatedClient(SERVER_URL, None, node_id=NODE_ID, encoder=encoder)
+        client.base, client.round = base, status["base_round"]
+        try:
+            reply = await client.push(num_samples=status.get("num_samples", 1), state=final)
+        except httpx.HTTPStatusError as e:
+            raise HTTPException(status_code=e.response.status_code, detail=e.response.text)
+    return {**reply, "bytes_sent": client.bytes_sent}
+
+def pull_global_model():
+    """A fresh eager model with the aggregation server's global weights (runs on an executor thread)."""
+    source = EmbryoGenModel(num_classes=17, pretrained=False, **MODEL_CONFIG)
+    client = FederatedClient(SERVER_URL, source)
+    # On an executor thread, so it gets its own event loop
+    return source, client, asyncio.run(client.pull())
+
+@app.post("/fl/sync")
+async def sync_global_model():
+    """Pulls the aggregation server's global weights and hot-swaps them in if their round is new."""
+    require_ready()
+    if not SERVER_URL:
+        raise HTTPException(status_code=400, detail="FL_SERVER_URL is not set")
+    if source_model is None:
+        raise HTTPException(status_code=409, detail="Hot-swapping needs an eager model (not TorchScript/ONNX)")
+    # Building the model and applying the downloaded chunks both take a while, so neither runs on the event loop
+    source, client, fl_round = await asyncio.get_running_loop().run_in_executor(None, pull_global_model)
+    if fl_round == fl_state["round"]:
+        return {"swapped": False, "fl_round": fl_round}
+    try:
+        dropped = await hot_swap(source, fl_round)
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(RETRY_AFTER_S)})
+    return {"swapped": True, "fl_round": fl_round, "sessions_reset": dropped, "bytes_received": client.bytes_received}
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,171 @@
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+
+import torch
+
+# Prometheus histogram buckets (seconds): sub-millisecond CPU ops up to multi-second requests
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_NULL_SPAN = nullcontext()
+
+
+class _Series:
+    __slots__ = ("count", "total", "buckets")
+
+    def __init__(self, num_buckets):
+        self.count = 0
+        self.total = 0.0
+        self.buckets = [0] * (num_buckets + 1)  # last slot is +Inf
+
+
+class Instrumentation:
+    """
+    Named timed spans and counters.
+
+    `with metrics.span("decode"): ...` records the block's wall time into a
+    histogram; `metrics.count("frames", n)` bumps a counter. When disabled,
+    span() returns a shared no-op context and count() returns immediately, so
+    instrumented code costs one attribute check. Thread-safe.
+    cuda_sync: synchronize before closing a span so GPU work is attributed to it
+    record_functions: also emit torch.profiler.record_function ranges (named spans in traces)
+    """
+    def __init__(self, enabled=True, buckets=DEFAULT_BUCKETS, cuda_sync=False, record_functions=False):
+        self.enabled = enabled
+        self.bucket_bounds = tuple(buckets)
+        self.cuda_sync = cuda_sync
+        self.record_functions = record_functions
+        self._lock = threading.Lock()
+        self._series = {}
+        self._counters = {}
+
+    def span(self, name):
+        if not self.enabled:
+            return _NULL_SPAN
+        return self._span(name)
+
+    @contextmanager
+    def _span(self, name):
+        ranged = torch.profiler.record_function(name) if self.record_functions else nullcontext()
+        with ranged:
+            start = time.perf_counter()
+            try:
+                yield
+            finally:
+                if self.cuda_sync:
+                    torch.cuda.synchronize()
+                self.observe(name, time.perf_counter() - start)
+
+    def observe(self, name, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            series = self._series.get(name)
+            if series is None:
+                series = self._series[name] = _Series(len(self.bucket_bounds))
+            series.count += 1
+            series.total += seconds
+            series.buckets[bisect_left(self.bucket_bounds, seconds)] += 1
+
+    def count(self, name, value=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def timed_iter(self, iterable, name="data"):
+        """Yields from `iterable`, timing each wait for the next item (e.g. DataLoader stalls)."""
+        iterator = iter(iterable)
+        while True:
+            with self.span(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def time_module(self, module, name):
+        """Times every forward of `module` via hooks, without touching the caller. Returns the handles."""
+        if not self.enabled:
+            return []
+        starts = []
+
+        def before(mod, args):
+            starts.append(time.perf_counter())
+
+        def after(mod, args, output):
+            if self.cuda_sync:
+                torch.cuda.synchronize()
+            self.observe(name, time.perf_counter() - starts.pop())
+
+        return [module.register_forward_pre_hook(before), module.register_forward_hook(after)]
+
+    def total(self, name):
+        series = self._series.get(name)
+        return series.total if series else 0.0
+
+    def snapshot(self, wall_seconds=None):
+        """Per-span totals, plus each span's share of `wall_seconds` when given."""
+        with self._lock:
+            spans = {}
+            for name, s in self._series.items():
+                spans[name] = {"count": s.count, "total_s": round(s.total, 6),
+                               "mean_ms": round(1000 * s.total / s.count, 3) if s.count else 0.0}
+                if wall_seconds:
+                    spans[name]["pct"] = round(100 * s.total / wall_seconds, 2)
+            return {"spans": spans, "counters": dict(self._counters)}
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+            self._counters.clear()
+
+    def prometheus(self, prefix="embryogen", gauges=None):
+        """Renders spans as one `<prefix>_stage_seconds` histogram family, plus counters and gauges."""
+        lines = []
+        with self._lock:
+            if self._series:
+                family = f"{prefix}_stage_seconds"
+                lines += [f"# HELP {family} Wall time per instrumented stage.", f"# TYPE {family} histogram"]
+                for name, s in sorted(self._series.items()):
+                    cumulative = 0
+                    for bound, n in zip(self.bucket_bounds + ("+Inf",), s.buckets):
+                        cumulative += n
+                        lines.append(f'{family}_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+                    lines.append(f'{family}_sum{{stage="{name}"}} {s.total}')
+                    lines.append(f'{family}_count{{stage="{name}"}} {s.count}')
+            for name, value in sorted(self._counters.items()):
+                lines += [f"# TYPE {prefix}_{name}_total counter", f"{prefix}_{name}_total {value}"]
+        for name, value in sorted((gauges or {}).items()):
+            lines += [f"# TYPE {prefix}_{name} gauge", f"{prefix}_{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+class _NullProfiler:
+    def start(self):
+        pass
+
+    def step(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+def step_profiler(trace_dir=None, start=10, steps=5):
+    """
+    torch.profiler capture of loop steps [start, start + steps), written as a
+    TensorBoard/Chrome trace into `trace_dir`. Call .start() before the loop,
+    .step() after every step and .stop() at the end.
+    Returns a no-op profiler when trace_dir is None.
+    """
+    if trace_dir is None:
+        return _NullProfiler()
+    from torch.profiler import ProfilerActivity, profile, schedule, tensorboard_trace_handler
+
+    activities = [ProfilerActivity.CPU] + ([ProfilerActivity.CUDA] if torch.cuda.is_available() else [])
+    warmup = min(start, 1)
+    return profile(activities=activities, record_shapes=True,
+                   schedule=schedule(wait=start - warmup, warmup=warmup, active=steps, repeat=1),
+                   on_trace_ready=tensorboard_trace_handler(str(trace_dir)))
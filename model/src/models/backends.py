@@ -0,0 +1,81 @@
+import copy
+
+import torch
+import torch.nn as nn
+
+BACKENDS = ("eager", "channels_last", "dynamic_int8", "static_int8", "compile")
+
+
+class _ToChannelsLast(nn.Module):
+    def forward(self, x):
+        return x.contiguous(memory_format=torch.channels_last)
+
+
+def _channels_last(model, calibration):
+    model.feature_extractor = nn.Sequential(_ToChannelsLast(),
+                                            model.feature_extractor.to(memory_format=torch.channels_last))
+    return model
+
+
+def _dynamic_int8(model, calibration):
+    # INT8 weights, activations quantized on the fly: every nn.Linear incl. the transformer feed-forward
+    model = torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+    # The encoder layers' fused fast path reads `linear.weight` as a tensor, which quantized
+    # Linears don't have; any registered hook makes the layer take the regular path instead
+    for layer in model.transformer.layers:
+        layer.register_forward_pre_hook(lambda module, args: None)
+    return model
+
+
+@torch.no_grad()
+def _static_int8(model, calibration, calibration_batch=32):
+    # FX graph mode: the whole backbone runs in INT8, observers calibrated on real frames
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+    if calibration is None:
+        raise ValueError("static_int8 needs calibration frames (N, 3, H, W)")
+    prepared = prepare_fx(model.feature_extractor, get_default_qconfig_mapping("x86"),
+                          example_inputs=(calibration[:1],))
+    for batch in calibration.split(calibration_batch):
+        prepared(batch)
+    model.feature_extractor = convert_fx(prepared)
+    return model
+
+
+def _compile(model, calibration):
+    # Shapes vary per request (number of frames, padded batch), so compile for dynamic shapes
+    model.feature_extractor = torch.compile(model.feature_extractor, dynamic=True)
+    model.transformer = torch.compile(model.transformer, dynamic=True)
+    return model
+
+
+_APPLY = {
+    "eager": lambda model, calibration: model,
+    "channels_last": _channels_last,
+    "dynamic_int8": _dynamic_int8,
+    "static_int8": _static_int8,
+    "compile": _compile,
+}
+
+
+def apply_backend(model, backend="eager", calibration=None):
+    """
+    Returns an inference copy of an EmbryoGenModel for one CPU backend; `model` is left untouched.
+    backend: one of BACKENDS, or several joined with '+' and applied in order
+        (e.g. 'static_int8+dynamic_int8' for an INT8 backbone and INT8 head)
+    calibration: (N, 3, H, W) normalized frames, required by 'static_int8'
+    """
+    names = backend.split("+")
+    unknown = [name for name in names if name not in _APPLY]
+    if unknown:
+        raise ValueError(f"Unknown backend(s) {unknown}; choose from {BACKENDS}")
+    if backend == "eager":
+        return model
+    if not isinstance(model, nn.Module) or isinstance(model, torch.jit.ScriptModule):
+        raise ValueError("Backends apply to eager models; load a checkpoint instead of an exported artifact")
+
+    model = copy.deepcopy(model).eval()
+    for name in names:
+        model = _APPLY[name](model, calibration)
+    return model
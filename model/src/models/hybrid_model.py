@@ -1,18 +1,79 @@
 import torch
 import torch.nn as nn
+import torch.nn.functional as F
+from typing import Optional
+from torch.utils.checkpoint import checkpoint
 from torchvision import models
 
+
+class CheckpointedBackbone(nn.Sequential):
+    """
+    The backbone with activation checkpointing over chunks of frames: in training
+    only each chunk's input is kept, and its activations are recomputed during
+    backward, so peak memory scales with chunk_size instead of B*T.
+    Same children (and state_dict keys) as the plain nn.Sequential.
+    BatchNorm is frozen to its running statistics (eval mode, affine weights
+    still train): per-chunk batch statistics would differ from the B*T ones,
+    and the recomputation would update the running stats a second time.
+    """
+    def __init__(self, chunk_size, *layers):
+        super().__init__(*layers)
+        self.chunk_size = chunk_size
+        self.train(self.training)
+
+    def train(self, mode=True):
+        super().train(mode)
+        for module in self.modules():
+            if isinstance(module, nn.modules.batchnorm._BatchNorm):
+                module.eval()
+        return self
+
+    def forward(self, x):
+        run = super().forward
+        if not (self.training and torch.is_grad_enabled()):
+            return run(x)
+        return torch.cat([checkpoint(run, chunk, use_reentrant=False) for chunk in x.split(self.chunk_size)])
+
+
+BACKBONES = ("resnet18", "mobilenet_v3_small")
+FEATURE_DIM = 512  # frame embedding size every backbone produces for the temporal head
+
+
+def build_backbone(backbone="resnet18", pretrained=True, width_mult=1.0):
+    """
+    Frame encoder mapping (N, 3, H, W) to (N, FEATURE_DIM, 1, 1).
+    mobilenet_v3_small is the lightweight student (see training/distill.py): its
+    pooled features are projected to FEATURE_DIM by a 1x1 convolution so it plugs
+    into the same head. width_mult scales its channels (ImageNet weights need 1.0).
+    """
+    if backbone == "resnet18":
+        weights = models.ResNet18_Weights.IMAGENET1K_V1 if pretrained else None
+        resnet = models.resnet18(weights=weights)
+        return nn.Sequential(*list(resnet.children())[:-1]) # Remove last FC layer
+    if backbone == "mobilenet_v3_small":
+        weights = models.MobileNet_V3_Small_Weights.IMAGENET1K_V1 if pretrained and width_mult == 1.0 else None
+        mobilenet = models.mobilenet_v3_small(weights=weights, width_mult=width_mult)
+        channels = mobilenet.features[-1].out_channels
+        return nn.Sequential(*mobilenet.features, nn.AdaptiveAvgPool2d(1), nn.Conv2d(channels, FEATURE_DIM, 1))
+    raise ValueError(f"Unknown backbone {backbone!r}; choose from {BACKBONES}")
+
+
 class EmbryoGenModel(nn.Module):
-    def __init__(self, num_classes=17, d_model=256, nhead=8, num_layers=2):
+    def __init__(self, num_classes=17, d_model=256, nhead=8, num_layers=2, pretrained=True, backbone="resnet18",
+                 input_size=224, width_mult=1.0):
         super(EmbryoGenModel, self).__init__()
         
         # 1. Feature Extractor (ResNet18)
         # We use ResNet18 because it's fast and efficient for 3-channel stacks
-        resnet = models.resnet18(weights=models.ResNet18_Weights.IMAGENET1K_V1)
-        self.feature_extractor = nn.Sequential(*list(resnet.children())[:-1]) # Remove last FC layer
+        # pretrained=False skips the ImageNet download (weights are loaded from a checkpoint instead)
+        # backbone / input_size / width_mult select a distilled lightweight encoder instead.
+        # Serving and scoring decode frames at input_size; frames of another size (e.g. the
+        # teacher's 224 px windows during distillation) are resized inside encode_frames
+        self.input_size = input_size
+        self.feature_extractor = build_backbone(backbone, pretrained, width_mult)
         
         # 2. Linear projection from ResNet (512) to Transformer (d_model)
-        self.feature_proj = nn.Linear(512, d_model)
+        self.feature_proj = nn.Linear(FEATURE_DIM, d_model)
         
         # 3. Time Embedder (Injects the 'TimeElapsed' clock)
         self.time_proj = nn.Linear(1, d_model)
@@ -33,16 +94,31 @@ class EmbryoGenModel(nn.Module):
         # 6. Classification Head
         self.classifier = nn.Linear(d_model, num_classes)
 
-    def forward(self, frames, times):
-        # frames shape: (Batch, WindowSize, 3, 224, 224)
-        # times shape: (Batch, WindowSize)
-        
+    def enable_backbone_checkpointing(self, chunk_size):
+        """Training-only memory saving (see CheckpointedBackbone); export a freshly loaded model instead."""
+        self.feature_extractor = CheckpointedBackbone(chunk_size, *self.feature_extractor)
+
+    # Exported so a TorchScript artifact keeps the backbone/head split used for serving
+    @torch.jit.export
+    def encode_frames(self, frames):
+        """Runs the backbone on every frame: (B, T, 3, H, W) -> (B, T, 512)."""
         b, t, c, h, w = frames.shape
         
         # Flatten Batch and Time to pass through ResNet: (B*T, 3, 224, 224)
-        x = frames.view(b * t, c, h, w)
+        x = frames.reshape(b * t, c, h, w)
+        if h != self.input_size or w != self.input_size:
+            x = F.interpolate(x, size=(self.input_size, self.input_size), mode="bilinear", antialias=True)
         features = self.feature_extractor(x) # (B*T, 512, 1, 1)
-        features = features.view(b, t, -1)    # (B, T, 512)
+        return features.view(b, t, -1)        # (B, T, 512)
+
+    @torch.jit.export
+    def forward_features(self, features, times, padding_mask: Optional[torch.Tensor] = None):
+        """
+        Temporal head on precomputed backbone features.
+        features: (B, T, 512), times: (B, T) -> logits (B, T, num_classes)
+        padding_mask: optional (B, T) bool, True marks padded frames to ignore
+        """
+        t = features.shape[1]
         
         # Project to Transformer dimension
         x = self.feature_proj(features)       # (B, T, d_model)
@@ -53,21 +129,21 @@ class EmbryoGenModel(nn.Module):
         x = x + time_emb                      # Fuse spatial + temporal data
         
         # Add Positional Encoding
-        if t <= self.pos_embedding.shape[1]:
-            x = x + self.pos_embedding[:, :t, :]
-        else:
-             # Interpolate or pad if sequence is longer than 16 (fallback)
-             # multidimensional interpolation is complex, for now we just repeat/truncate simplistically or crash safely
-             # But let's just slice for now and assume T <= 16 or handle T > 16 by tiling (not ideal but works for shape)
-             # Better: just use what we have and repeat
-             pos_emb_stretched = self.pos_embedding.repeat(1, (t // 16) + 1, 1)[:, :t, :]
-             x = x + pos_emb_stretched
+        # Position i uses slot i % 16: identical to the learned table for T <= 16 and
+        # to the old repeat-and-truncate fallback beyond, but a single gather that
+        # traces and exports with a dynamic T
+        slots = torch.arange(t, device=features.device) % self.pos_embedding.shape[1]
+        x = x + self.pos_embedding[:, slots, :]
 
-        
         # Transformer Processing
-        x = self.transformer(x)               # (B, T, d_model)
+        x = self.transformer(x, src_key_padding_mask=padding_mask) # (B, T, d_model)
         
         # Classify each frame in the window
         logits = self.classifier(x)           # (B, T, num_classes)
         
-        return logits
\ No newline at end of file
+        return logits
+
+    def forward(self, frames, times):
+        # frames shape: (Batch, WindowSize, 3, 224, 224)
+        # times shape: (Batch, WindowSize)
+        return self.forward_features(self.encode_frames(frames), times, None)
@@ -0,0 +1,94 @@
+import torch
+
+
+def window_starts(num_frames, window_size=16, stride=8):
+    """
+    Start offsets of the overlapping windows covering a whole sequence.
+    The last window is aligned to the end so the tail is always covered.
+    """
+    if num_frames <= window_size:
+        return [0]
+    starts = list(range(0, num_frames - window_size + 1, stride))
+    if starts[-1] + window_size < num_frames:
+        starts.append(num_frames - window_size)
+    return starts
+
+
+def merge_weights(length, merge="center"):
+    """
+    Per-position weights used when averaging overlapping window logits.
+    'mean' weighs every position equally; 'center' trusts the middle of a
+    window (full temporal context on both sides) more than its edges.
+    """
+    if merge == "mean":
+        return torch.ones(length)
+    if merge == "center":
+        # Hann window without its zero end points, so edge frames still count
+        return torch.hann_window(length + 2, periodic=False)[1:-1]
+    raise ValueError(f"Unknown merge mode: {merge}")
+
+
+@torch.no_grad()
+def encode_sequence(model, frames, frame_batch=32, preprocess=None, device=None):
+    """
+    Runs the backbone once per frame, `frame_batch` frames at a time.
+    frames: (N, 3, H, W) tensor, or an iterable of such batches (e.g. a decoder
+    that never materializes the whole sequence).
+    preprocess: optional callable applied to each batch (e.g. normalize_window for uint8)
+    Returns (N, 512) features on `device`.
+    """
+    device = device or next(model.parameters()).device
+    if torch.is_tensor(frames):
+        frames = frames.split(frame_batch)
+
+    chunks = []
+    for batch in frames:
+        if preprocess is not None:
+            batch = preprocess(batch)
+        chunks.append(model.encode_frames(batch.unsqueeze(0).to(device))[0])
+    return torch.cat(chunks)
+
+
+@torch.no_grad()
+def score_features(model, features, times, window_size=16, stride=8, merge="center", window_batch=16):
+    """
+    Runs the temporal head over overlapping windows of precomputed features
+    and merges the per-window logits into one (N, num_classes) timeline.
+    """
+    num_frames = features.shape[0]
+    times = times.to(features.device, torch.float32)
+    length = min(window_size, num_frames)
+    weights = merge_weights(length, merge).to(features.device).unsqueeze(-1)   # (L, 1)
+
+    starts = window_starts(num_frames, window_size, stride)
+    merged = None
+    weight_sum = torch.zeros(num_frames, 1, device=features.device)
+    for i in range(0, len(starts), window_batch):
+        batch_starts = starts[i:i + window_batch]
+        window_feats = torch.stack([features[s:s + length] for s in batch_starts])
+        window_times = torch.stack([times[s:s + length] for s in batch_starts])
+        logits = model.forward_features(window_feats, window_times)          # (W, L, C)
+
+        if merged is None:
+            merged = torch.zeros(num_frames, logits.shape[-1], device=features.device)
+        for s, window_logits in zip(batch_starts, logits):
+            merged[s:s + length] += window_logits * weights
+            weight_sum[s:s + length] += weights
+
+    return merged / weight_sum
+
+
+@torch.no_grad()
+def score_sequence(model, frames, times, window_size=16, stride=8, merge="center",
+                   frame_batch=32, window_batch=16, preprocess=None):
+    """
+    Scores a whole time-lapse: every frame's CNN feature is computed exactly
+    once, the transformer runs on overlapping windows, and window logits are
+    merged per frame. Cost and peak memory grow linearly with sequence length.
+
+    frames: (N, 3, H, W) tensor or iterable of batches (see encode_sequence)
+    times: (N,) elapsed time per frame
+    Returns per-frame logits (N, num_classes).
+    """
+    features = encode_sequence(model, frames, frame_batch, preprocess)
+    return score_features(model, features, times, window_size, stride, merge, window_batch)
@@ -0,0 +1,247 @@
+import time
+import queue
+import asyncio
+import threading
+from collections import Counter, deque
+
+import torch
+from torch.nn.utils.rnn import pad_sequence
+
+from ..data.keyframes import expand_keyframes, frame_signatures, select_keyframes
+from ..models.inference import encode_sequence, score_features
+
+
+class QueueFullError(Exception):
+    """Raised when the inference queue is at capacity; callers should retry later."""
+
+
+class BatcherStoppedError(Exception):
+    """Raised for requests still queued when the batcher stops."""
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+class _Call:
+    """A job that runs an arbitrary callable on the inference thread (e.g. session updates)."""
+    def __init__(self, fn, args, future, loop):
+        self.fn = fn
+        self.args = args
+        self.future = future
+        self.loop = loop
+
+
+class MicroBatcher:
+    """
+    Groups concurrent inference requests into one forward pass.
+
+    Handlers `await submit(frames, times)`; a dedicated inference thread
+    collects up to `max_batch` requests or waits at most `max_wait_ms` after
+    the first one, runs the backbone once over all of their frames, runs the
+    transformer on the padded + masked batch and fans the per-frame logits
+    back out to the awaiting handlers. The event loop never blocks on the model.
+    `run(fn, ...)` executes other model work on the same thread, so the model
+    is only ever used from one place.
+    skip_threshold: frames that barely differ from the request's last encoded
+    frame reuse its backbone features (see data.keyframes); their times are
+    kept, so the transformer still sees every frame. None/0 encodes every frame.
+    """
+    def __init__(self, model, max_batch=8, max_wait_ms=10, max_queue=64, window_size=16, stride=8,
+                 frame_batch=64, device=None, skip_threshold=None):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue = max_queue
+        self.window_size = window_size
+        self.stride = stride
+        self.frame_batch = frame_batch
+        self.device = device or next(model.parameters()).device
+        self.skip_threshold = skip_threshold
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stopping = False
+
+        # Stats
+        self.batch_sizes = Counter()
+        self.latencies = deque(maxlen=2048)
+        self.rejected = 0
+        self.frames = 0
+        self.frames_encoded = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name="inference-batcher", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout=5):
+        """Stops the inference thread; requests it never picked up fail with BatcherStoppedError."""
+        self._stopping = True
+        self._queue.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is None:
+                continue
+            future, loop = (job.future, job.loop) if isinstance(job, _Call) else job[2:4]
+            try:
+                loop.call_soon_threadsafe(_set_exception, future, BatcherStoppedError("Inference batcher stopped"))
+            except RuntimeError:
+                pass  # its event loop is already closed, so nobody is waiting
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def _check_capacity(self):
+        if self._queue.qsize() >= self.max_queue:
+            self.rejected += 1
+            raise QueueFullError(f"Inference queue full ({self.max_queue} pending)")
+        self.start()
+
+    async def submit(self, frames, times):
+        """
+        Queues one sequence. frames: (T, 3, H, W) normalized, times: (T,)
+        Returns per-frame logits (T, num_classes) on CPU.
+        """
+        self._check_capacity()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.put((frames, times, future, loop, time.perf_counter()))
+        return await future
+
+    async def run(self, fn, *args):
+        """Runs fn(*args) under no_grad on the inference thread and returns its result."""
+        self._check_capacity()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.put(_Call(fn, args, future, loop))
+        return await future
+
+    def stats(self):
+        # Snapshot under the lock: the inference thread appends to these while the event loop reads them
+        with self._lock:
+            latencies = list(self.latencies)
+            batch_sizes = dict(self.batch_sizes)
+            frames, frames_encoded = self.frames, self.frames_encoded
+        latencies_ms = [1000 * x for x in latencies]
+        return {
+            "queue_depth": self.queue_depth,
+            "max_queue": self.max_queue,
+            "rejected": self.rejected,
+            "batches": sum(batch_sizes.values()),
+            "batch_sizes": dict(sorted(batch_sizes.items())),
+            "latency_ms_p50": percentile(latencies_ms, 50),
+            "latency_ms_p99": percentile(latencies_ms, 99),
+            "frames": frames,
+            "frames_skipped": frames - frames_encoded,
+        }
+
+    def _collect(self):
+        """Blocks for the first request, then gathers more until full or the wait expires."""
+        first = self._queue.get()
+        if first is None:
+            return []
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._stopping = True
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while not self._stopping:
+            batch = self._collect()
+            requests = [job for job in batch if not isinstance(job, _Call)]
+            if requests:
+                self._run_requests(requests)
+            for call in (job for job in batch if isinstance(job, _Call)):
+                try:
+                    with torch.no_grad():
+                        result = call.fn(*call.args)
+                except Exception as e:
+                    call.loop.call_soon_threadsafe(_set_exception, call.future, e)
+                else:
+                    call.loop.call_soon_threadsafe(_set_result, call.future, result)
+
+    def _run_requests(self, batch):
+        try:
+            results = self._infer([(frames, times) for frames, times, *_ in batch])
+        except Exception as e:
+            for _, _, future, loop, _ in batch:
+                loop.call_soon_threadsafe(_set_exception, future, e)
+            return
+
+        done = time.perf_counter()
+        with self._lock:
+            self.batch_sizes[len(batch)] += 1
+            self.latencies.extend(done - enqueued for *_, enqueued in batch)
+        for (_, _, future, loop, _), logits in zip(batch, results):
+            loop.call_soon_threadsafe(_set_result, future, logits)
+
+    @torch.no_grad()
+    def _infer(self, requests):
+        # 1. One backbone pass over every (key)frame of every request
+        lengths = [len(frames) for frames, _ in requests]
+        if self.skip_threshold:
+            keep = [select_keyframes(frame_signatures(frames), self.skip_threshold) for frames, _ in requests]
+            frames = torch.cat([f[k] for (f, _), k in zip(requests, keep)])
+            features = encode_sequence(self.model, frames, self.frame_batch, device=self.device)
+            features = [expand_keyframes(f, k) for f, k in zip(features.split([int(k.sum()) for k in keep]), keep)]
+        else:
+            frames = torch.cat([f for f, _ in requests])
+            features = encode_sequence(self.model, frames, self.frame_batch, device=self.device).split(lengths)
+        with self._lock:
+            self.frames += sum(lengths)
+            self.frames_encoded += len(frames)
+        times = [t.to(self.device, torch.float32) for _, t in requests]
+
+        results = [None] * len(requests)
+
+        # 2. Short sequences share one padded transformer pass
+        short = [i for i, n in enumerate(lengths) if n <= self.window_size]
+        if short:
+            padded = pad_sequence([features[i] for i in short], batch_first=True)
+            padded_times = pad_sequence([times[i] for i in short], batch_first=True)
+            mask = torch.arange(padded.shape[1], device=self.device)[None] >= torch.tensor(
+                [lengths[i] for i in short], device=self.device)[:, None]
+            logits = self.model.forward_features(padded, padded_times, padding_mask=mask if mask.any() else None)
+            for row, i in enumerate(short):
+                results[i] = logits[row, :lengths[i]].cpu()
+
+        # 3. Long time-lapses are scored with overlapping windows over their features
+        for i, n in enumerate(lengths):
+            if n > self.window_size:
+                results[i] = score_features(self.model, features[i], times[i], self.window_size, self.stride).cpu()
+        return results
+
+
+def _set_result(future, result):
+    if not future.done():
+        future.set_result(result)
+
+
+def _set_exception(future, exc):
+    if not future.done():
+        future.set_exception(exc)
@@ -0,0 +1,111 @@
+import json
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+import torch
+
+from ..data.frame_store import FrameStore
+from ..data.transforms import normalize_window, resize_window
+from ..models.hybrid_model import EmbryoGenModel
+from ..models.inference import encode_sequence
+
+
+def load_state_dict(path):
+    """
+    Reads a checkpoint's state_dict memory-mapped, so tensors are paged in
+    from disk instead of being copied into freshly allocated memory.
+    Falls back to a regular load for legacy (non-zipfile) checkpoints.
+    """
+    try:
+        return torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+    except RuntimeError:
+        return torch.load(path, map_location="cpu", weights_only=True)
+
+
+def load_model(checkpoint=None, torchscript=None, onnx_dir=None, num_classes=17, pretrained=True, device=None,
+               intra_op_threads=None, inter_op_threads=1, model_config=None):
+    """
+    Builds the serving model.
+    onnx_dir: graphs written by onnx_backend.export_onnx, run with ONNX Runtime on CPU
+    torchscript: path to a TorchScript artifact (see export_torchscript); no Python model is built
+    checkpoint: state_dict saved by the trainer; the ImageNet download is skipped since
+        every weight is overwritten anyway
+    Without either, falls back to EmbryoGenModel(pretrained=pretrained) with an untrained head.
+    model_config: extra EmbryoGenModel arguments of the eager model, e.g. the backbone,
+        input_size and width_mult of a distilled student (training/distill.py)
+    """
+    model_config = model_config or {}
+    device = device or torch.device("cpu")
+    if onnx_dir:
+        from .onnx_backend import OnnxModel
+        return OnnxModel(onnx_dir, intra_op_threads, inter_op_threads)
+    if torchscript:
+        model = torch.jit.load(torchscript, map_location=device)
+    elif checkpoint:
+        # Built on the meta device: no random init, parameters are assigned straight from the mmap
+        with torch.device("meta"):
+            model = EmbryoGenModel(num_classes=num_classes, pretrained=False, **model_config)
+        model.load_state_dict(load_state_dict(checkpoint), assign=True)
+        model = model.to(device)
+    else:
+        model = EmbryoGenModel(num_classes=num_classes, pretrained=pretrained, **model_config).to(device)
+    return model.eval()
+
+
+def calibration_frames(frame_store, num_frames=64, size=224):
+    """
+    Normalized frames for static quantization, sampled evenly over every
+    embryo of a packed frame store so all developmental stages are represented.
+    size: the backbone's input size (the quantized feature_extractor sees them as is)
+    """
+    store = FrameStore(frame_store)
+    pairs = [(emb_id, row) for emb_id in store.embryo_ids() for row in range(len(store.index(emb_id)))]
+    if not pairs:
+        raise ValueError(f"No frames in {frame_store}")
+    picks = np.linspace(0, len(pairs) - 1, min(num_frames, len(pairs))).astype(int)
+    frames = torch.from_numpy(np.stack([store.frames(pairs[i][0])[pairs[i][1]] for i in picks]))
+    if frames.shape[-1] != size:
+        frames = resize_window(frames, size)
+    return normalize_window(frames)
+
+
+@torch.no_grad()
+def warmup(model, steps=2, num_frames=16, size=224):
+    """
+    Runs `steps` dummy forward passes through the serving path so lazy
+    initialization (allocator pools, kernel selection, TorchScript profiling)
+    happens before the first real request. Returns seconds spent.
+    """
+    start = time.perf_counter()
+    device = next(model.parameters()).device
+    frames = torch.zeros(num_frames, 3, size, size)
+    times = torch.arange(num_frames, dtype=torch.float32, device=device)
+    for _ in range(steps):
+        features = encode_sequence(model, frames)
+        model.forward_features(features.unsqueeze(0), times.unsqueeze(0))
+    return time.perf_counter() - start
+
+
+def read_model_config(path):
+    """EmbryoGenModel arguments from a student_config.json (training/distill.py); {} without a path."""
+    return json.loads(Path(path).read_text()) if path else {}
+
+
+def export_torchscript(checkpoint, output, num_classes=17, model_config=None):
+    """Compiles a trainer (or distilled student) checkpoint into a self-contained TorchScript artifact for serving."""
+    model = load_model(checkpoint=checkpoint, num_classes=num_classes, model_config=model_config)
+    torch.jit.save(torch.jit.script(model), output)
+
+
+if __name__ == "__main__":
+    # python -m src.serving.loading --checkpoint checkpoints/best_model.pth --output checkpoints/best_model.ts
+    # A student also needs --model-config student_config.json (and FL_INPUT_SIZE when served)
+    parser = argparse.ArgumentParser(description="Export a checkpoint as TorchScript for fl_node")
+    parser.add_argument("--checkpoint", required=True)
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--model-config", default=None,
+                        help="student_config.json of a distilled checkpoint (training/distill.py)")
+    args = parser.parse_args()
+    export_torchscript(args.checkpoint, args.output, model_config=read_model_config(args.model_config))
@@ -0,0 +1,116 @@
+import os
+import argparse
+from pathlib import Path
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+BACKBONE_FILE = "backbone.onnx"
+HEAD_FILE = "head.onnx"
+
+
+class _Backbone(nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, frames):
+        # (N, 3, H, W) -> (N, 512); batch and time are flattened into N by the caller
+        return self.model.encode_frames(frames.unsqueeze(0))[0]
+
+
+class _Head(nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, features, times, padding_mask):
+        return self.model.forward_features(features, times, padding_mask)
+
+
+@torch.no_grad()
+def export_onnx(model, output_dir, size=224):
+    """
+    Exports the backbone and the temporal head as two ONNX graphs:
+    backbone.onnx: frames (N, 3, size, size) -> features (N, 512), dynamic N
+    head.onnx: features (B, T, 512), times (B, T), padding_mask (B, T) bool -> logits (B, T, C),
+        dynamic B and T (positions use the same slot = t % 16 gather as the PyTorch model)
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    model = model.eval()
+    n, b, t = torch.export.Dim("frames"), torch.export.Dim("batch"), torch.export.Dim("time")
+
+    torch.onnx.export(_Backbone(model).eval(), (torch.randn(2, 3, size, size),), output_dir / BACKBONE_FILE,
+                      input_names=["frames"], output_names=["features"],
+                      dynamic_shapes={"frames": {0: n}}, dynamo=True)
+    torch.onnx.export(_Head(model).eval(), (torch.randn(2, 16, 512), torch.zeros(2, 16), torch.zeros(2, 16, dtype=torch.bool)),
+                      output_dir / HEAD_FILE,
+                      input_names=["features", "times", "padding_mask"], output_names=["logits"],
+                      dynamic_shapes={"features": {0: b, 1: t}, "times": {0: b, 1: t}, "padding_mask": {0: b, 1: t}},
+                      dynamo=True)
+
+
+class OnnxModel:
+    """
+    Runs an exported model with ONNX Runtime's CPU execution provider behind
+    the EmbryoGenModel serving API (encode_frames / forward_features / __call__),
+    so the batcher, sessions and scoring helpers work unchanged.
+    intra_op_threads parallelize one operator; inter_op_threads run independent
+    branches of the graph concurrently (one is best for these sequential graphs).
+    """
+    def __init__(self, model_dir, intra_op_threads=None, inter_op_threads=1):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads or os.cpu_count() or 1
+        options.inter_op_num_threads = inter_op_threads
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        providers = ["CPUExecutionProvider"]
+        self.backbone = ort.InferenceSession(str(Path(model_dir) / BACKBONE_FILE), options, providers=providers)
+        self.head = ort.InferenceSession(str(Path(model_dir) / HEAD_FILE), options, providers=providers)
+        self._device_probe = torch.empty(0)
+
+    def parameters(self):
+        # Device lookups in the serving path (next(model.parameters()).device) resolve to CPU
+        yield self._device_probe
+
+    def eval(self):
+        return self
+
+    def encode_frames(self, frames):
+        b, t = frames.shape[:2]
+        x = np.ascontiguousarray(frames.reshape(b * t, *frames.shape[2:]).numpy(), dtype=np.float32)
+        features = self.backbone.run(None, {"frames": x})[0]
+        return torch.from_numpy(features).view(b, t, -1)
+
+    def forward_features(self, features, times, padding_mask=None):
+        if padding_mask is None:
+            padding_mask = torch.zeros(features.shape[:2], dtype=torch.bool)
+        logits = self.head.run(None, {
+            "features": np.ascontiguousarray(features.numpy(), dtype=np.float32),
+            "times": np.ascontiguousarray(times.numpy(), dtype=np.float32),
+            "padding_mask": padding_mask.numpy(),
+        })[0]
+        return torch.from_numpy(logits)
+
+    def __call__(self, frames, times):
+        return self.forward_features(self.encode_frames(frames), times)
+
+
+if __name__ == "__main__":
+    # python -m src.serving.onnx_backend --checkpoint checkpoints/best_model.pth --output checkpoints/onnx
+    # A student also needs --model-config student_config.json (and FL_INPUT_SIZE when served)
+    from .loading import load_model, read_model_config
+
+    parser = argparse.ArgumentParser(description="Export a checkpoint as ONNX graphs for fl_node")
+    parser.add_argument("--checkpoint", required=True)
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--model-config", default=None,
+                        help="student_config.json of a distilled checkpoint (training/distill.py)")
+    args = parser.parse_args()
+    model_config = read_model_config(args.model_config)
+    export_onnx(load_model(checkpoint=args.checkpoint, model_config=model_config), args.output,
+                size=model_config.get("input_size", 224))
@@ -0,0 +1,201 @@
+import os
+import shutil
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import torch
+
+
+def state_digest(state_dict):
+    """Content hash of a state_dict: identical weights give the same version across restarts."""
+    h = hashlib.blake2b(digest_size=16)
+    for name, tensor in state_dict.items():
+        h.update(name.encode())
+        h.update(tensor.detach().cpu().contiguous().view(-1).view(torch.uint8).numpy().tobytes())
+    return h.hexdigest()
+
+
+def file_digest(path):
+    """Content hash of a file, or of every file under a directory (e.g. exported ONNX graphs)."""
+    path = Path(path)
+    h = hashlib.blake2b(digest_size=16)
+    for file in sorted(path.rglob("*")) if path.is_dir() else [path]:
+        if file.is_file():
+            h.update(file.name.encode())
+            with open(file, "rb") as f:
+                for block in iter(lambda: f.read(2**20), b""):
+                    h.update(block)
+    return h.hexdigest()
+
+
+class ResultCache:
+    """
+    Content-addressed cache of per-frame logits for /fl/execute.
+
+    Keys hash the uploaded frame bytes, the times tensor and the model version,
+    so a re-submitted sequence skips decoding and inference. Entries live in an
+    in-memory LRU tier bounded by `max_bytes`, and optionally in `disk_dir`
+    (bounded by `disk_max_bytes`, oldest files pruned first), which survives
+    restarts as long as the weights are unchanged. Identical requests that
+    arrive while the first is still computing await that one result.
+    invalidate() switches to a new model version and drops every older entry;
+    the disk tier is pruned on a background thread, serialized with writes.
+    """
+    def __init__(self, version, max_bytes=64 * 2**20, disk_dir=None, disk_max_bytes=2**30):
+        self.version = version
+        self.max_bytes = max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+        self.nbytes = 0
+        self.disk_bytes = 0
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()  # writes and prunes of the disk tier, which run on different threads
+        self._pruner = None
+        self.counters = dict.fromkeys(("hits", "disk_hits", "misses", "coalesced", "evictions", "invalidations"), 0)
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            self._prune_disk()
+
+    def key(self, contents, times):
+        h = hashlib.blake2b(digest_size=20)
+        h.update(self.version.encode())
+        for content in contents:
+            h.update(len(content).to_bytes(8, "little"))
+            h.update(content)
+        h.update(times.to(torch.float32).contiguous().numpy().tobytes())
+        return h.hexdigest()
+
+    def _disk_path(self, version, key):
+        return self.disk_dir / version / f"{key}.pt"
+
+    def get(self, key):
+        """Memory tier only; returns the logits or None."""
+        with self._lock:
+            logits = self._entries.get(key)
+            if logits is not None:
+                self._entries.move_to_end(key)
+            return logits
+
+    def put(self, version, key, logits):
+        """Stores a result computed with `version`; results of a replaced model are dropped."""
+        with self._lock:
+            if version != self.version or key in self._entries:
+                return
+            size = logits.numel() * logits.element_size()
+            if size > self.max_bytes:
+                return
+            self._entries[key] = logits
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.nbytes -= evicted.numel() * evicted.element_size()
+                self.counters["evictions"] += 1
+
+    def _read_disk(self, version, key):
+        path = self._disk_path(version, key)
+        try:
+            return torch.load(path, weights_only=True)
+        except (FileNotFoundError, RuntimeError, EOFError):
+            return None
+
+    def _write_disk(self, version, key, logits):
+        with self._disk_lock:
+            # A result of replaced weights would recreate the directory a prune just removed
+            if version != self.version:
+                return
+            path = self._disk_path(version, key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            torch.save(logits, tmp)
+            os.replace(tmp, path)
+            self.disk_bytes += path.stat().st_size
+            prune = self.disk_bytes > self.disk_max_bytes
+        if prune:
+            self._prune_disk()
+
+    def _prune_disk(self):
+        """
+        Deletes other versions' entries, then the oldest files of the current
+        version until the tier is at 90% of its budget (so pruning, a directory
+        scan, runs rarely). Files and directories that vanish meanwhile are skipped.
+        """
+        with self._disk_lock:
+            keep_version = self.version
+            for version_dir in self.disk_dir.iterdir():
+                if version_dir.is_dir() and version_dir.name != keep_version:
+                    shutil.rmtree(version_dir, ignore_errors=True)
+            sizes = []
+            for file in (self.disk_dir / keep_version).glob("*.pt"):
+                try:
+                    stat = file.stat()
+                except FileNotFoundError:
+                    continue
+                sizes.append((stat.st_mtime, stat.st_size, file))
+            sizes.sort(key=lambda entry: entry[0])
+            self.disk_bytes = sum(size for _, size, _ in sizes)
+            if self.disk_bytes <= self.disk_max_bytes:
+                return
+            for _, size, file in sizes:
+                if self.disk_bytes <= 0.9 * self.disk_max_bytes:
+                    break
+                self.disk_bytes -= size
+                file.unlink(missing_ok=True)
+
+    async def get_or_compute(self, key, compute):
+        """
+        Returns (logits, source) where source is "hit", "disk_hit", "coalesced" or "miss".
+        compute: coroutine function producing the logits on a miss; failures are not cached.
+        """
+        logits = self.get(key)
+        if logits is not None:
+            self.counters["hits"] += 1
+            return logits, "hit"
+        if key in self._inflight:
+            self.counters["coalesced"] += 1
+            return await asyncio.shield(self._inflight[key]), "coalesced"
+
+        loop = asyncio.get_running_loop()
+        future = self._inflight[key] = loop.create_future()
+        version = self.version
+        try:
+            logits = None
+            if self.disk_dir is not None:
+                logits = await loop.run_in_executor(None, self._read_disk, version, key)
+            source = "disk_hit" if logits is not None else "miss"
+            self.counters["disk_hits" if logits is not None else "misses"] += 1
+            if logits is None:
+                logits = await compute()
+                if self.disk_dir is not None and version == self.version:
+                    await loop.run_in_executor(None, self._write_disk, version, key, logits)
+            self.put(version, key, logits)
+            future.set_result(logits)
+            return logits, source
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # waiters re-raise it; don't warn when there are none
+            raise
+        finally:
+            del self._inflight[key]
+
+    def invalidate(self, version):
+        """Switches to a new model version: every cached result of older weights is dropped."""
+        with self._lock:
+            self.version = version
+            self._entries.clear()
+            self.nbytes = 0
+            self.counters["invalidations"] += 1
+        if self.disk_dir is not None:
+            # Off the caller's thread (fl_node swaps models on the inference thread)
+            self._pruner = threading.Thread(target=self._prune_disk, name="result-cache-prune", daemon=True)
+            self._pruner.start()
+
+    def stats(self):
+        lookups = self.counters["hits"] + self.counters["disk_hits"] + self.counters["misses"] + self.counters["coalesced"]
+        served = lookups - self.counters["misses"]
+        return {**self.counters, "entries": len(self._entries), "bytes": self.nbytes, "max_bytes": self.max_bytes,
+                "disk_bytes": self.disk_bytes, "hit_rate": served / lookups if lookups else 0.0, "version": self.version}
@@ -0,0 +1,182 @@
+import time
+import uuid
+import threading
+from collections import OrderedDict
+
+import torch
+
+from ..data.keyframes import expand_keyframes, frame_signatures, select_keyframes
+from ..models.inference import encode_sequence, merge_weights
+
+
+class StreamSession:
+    """
+    Server-side state of one embryo's live time-lapse.
+
+    Keeps every frame's backbone feature plus a running weighted sum of the
+    logits of all *complete* windows on the stride grid. Only the open tail
+    window is recomputed on read, so the merged timeline is identical to
+    score_features over the whole sequence while each append costs O(new frames).
+    """
+    def __init__(self, session_id, num_classes, feature_dim=512, window_size=16, stride=8, merge="center"):
+        self.id = session_id
+        self.window_size = window_size
+        self.stride = stride
+        self.merge = merge
+        self.length = 0
+        self.next_start = 0          # next stride-grid window not yet folded into `merged`
+        self.last_access = time.monotonic()
+        self.key_signature = None    # change-detection signature of the last encoded frame (frame skipping)
+
+        # Capacity-doubling buffers so appends are amortized O(1)
+        self.features = torch.zeros(window_size, feature_dim)
+        self.times = torch.zeros(window_size)
+        self.merged = torch.zeros(window_size, num_classes)
+        self.weight_sum = torch.zeros(window_size, 1)
+
+    @property
+    def nbytes(self):
+        return sum(t.element_size() * t.nelement() for t in (self.features, self.times, self.merged, self.weight_sum))
+
+    def _reserve(self, n):
+        capacity = self.features.shape[0]
+        if n <= capacity:
+            return
+        while capacity < n:
+            capacity *= 2
+        for name in ("features", "times", "merged", "weight_sum"):
+            old = getattr(self, name)
+            new = old.new_zeros((capacity, *old.shape[1:]))
+            new[:self.length] = old[:self.length]
+            setattr(self, name, new)
+
+    def append(self, model, features, times):
+        """Adds new frame features and folds every newly completed window into the timeline."""
+        n = self.length + len(features)
+        self._reserve(n)
+        self.features[self.length:n] = features
+        self.times[self.length:n] = times
+        self.length = n
+
+        weights = merge_weights(self.window_size, self.merge).unsqueeze(-1)
+        starts = list(range(self.next_start, n - self.window_size + 1, self.stride))
+        if starts:
+            logits = self._run_windows(model, starts, self.window_size)
+            for s, window_logits in zip(starts, logits):
+                self.merged[s:s + self.window_size] += window_logits * weights
+                self.weight_sum[s:s + self.window_size] += weights
+            self.next_start = starts[-1] + self.stride
+
+    def timeline(self, model):
+        """Per-frame logits (N, num_classes), merging in the end-aligned tail window if one is open."""
+        n = self.length
+        merged = self.merged[:n].clone()
+        weight_sum = self.weight_sum[:n].clone()
+
+        # Same tail rule as models.inference.window_starts
+        length = min(self.window_size, n)
+        last_complete = self.next_start - self.stride
+        if n < self.window_size or last_complete + self.window_size < n:
+            start = n - length
+            weights = merge_weights(length, self.merge).unsqueeze(-1)
+            merged[start:] += self._run_windows(model, [start], length)[0] * weights
+            weight_sum[start:] += weights
+        return merged / weight_sum
+
+    def _run_windows(self, model, starts, length):
+        device = next(model.parameters()).device
+        feats = torch.stack([self.features[s:s + length] for s in starts]).to(device)
+        times = torch.stack([self.times[s:s + length] for s in starts]).to(device)
+        return model.forward_features(feats, times).cpu()
+
+
+class SessionStore:
+    """
+    LRU-evicted streaming sessions under a memory budget.
+    Model work (`append`, `timeline`) must run on the inference thread,
+    e.g. through MicroBatcher.run.
+    """
+    def __init__(self, model, max_bytes=256 * 2**20, window_size=16, stride=8, merge="center",
+                 num_classes=17, frame_batch=32, skip_threshold=None):
+        self.model = model
+        self.skip_threshold = skip_threshold  # see MicroBatcher; the reference frame carries across appends
+        self.max_bytes = max_bytes
+        self.window_size = window_size
+        self.stride = stride
+        self.merge = merge
+        self.num_classes = num_classes
+        self.frame_batch = frame_batch
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def create(self):
+        session_id = uuid.uuid4().hex
+        with self._lock:
+            self._sessions[session_id] = StreamSession(session_id, self.num_classes, window_size=self.window_size,
+                                                       stride=self.stride, merge=self.merge)
+            self._evict(keep=session_id)
+        return session_id
+
+    def get(self, session_id):
+        """Returns the session and marks it most recently used; raises KeyError if unknown or evicted."""
+        with self._lock:
+            session = self._sessions[session_id]
+            self._sessions.move_to_end(session_id)
+            session.last_access = time.monotonic()
+            return session
+
+    def delete(self, session_id):
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def clear(self):
+        """Drops every session (e.g. after a model swap made their cached features stale); returns how many."""
+        with self._lock:
+            count = len(self._sessions)
+            self._sessions.clear()
+            return count
+
+    def append(self, session_id, frames, times):
+        """Encodes only the new frames and updates the session; returns its length."""
+        session = self.get(session_id)
+        if self.skip_threshold:
+            signatures = frame_signatures(frames)
+            keep = select_keyframes(signatures, self.skip_threshold, reference=session.key_signature)
+            features = (encode_sequence(self.model, frames[keep], self.frame_batch).cpu() if keep.any()
+                        else session.features.new_zeros(0, session.features.shape[1]))
+            previous = session.features[session.length - 1] if session.length else None
+            features = expand_keyframes(features, keep, previous)
+            if keep.any():
+                session.key_signature = signatures[keep.nonzero()[-1, 0]]
+        else:
+            features = encode_sequence(self.model, frames, self.frame_batch).cpu()
+        session.append(self.model, features, times.float())
+        with self._lock:
+            self._evict(keep=session_id)
+        return session.length
+
+    def timeline(self, session_id):
+        session = self.get(session_id)
+        if session.length == 0:
+            return torch.zeros(0, self.num_classes)
+        return session.timeline(self.model)
+
+    @property
+    def nbytes(self):
+        return sum(s.nbytes for s in self._sessions.values())
+
+    def stats(self):
+        with self._lock:
+            return {"sessions": len(self._sessions), "bytes": self.nbytes, "max_bytes": self.max_bytes,
+                    "evictions": self.evictions}
+
+    def _evict(self, keep):
+        # Least recently used first; never evict the session being served
+        while self.nbytes > self.max_bytes and len(self._sessions) > 1:
+            oldest = next(iter(self._sessions))
+            if oldest == keep:
+                self._sessions.move_to_end(keep)
+                oldest = next(iter(self._sessions))
+            del self._sessions[oldest]
+            self.evictions += 1
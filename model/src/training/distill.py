@@ -0,0 +1,193 @@
+import sys
+from pathlib import Path
+
+# --- THE ROBUST PATH FIX ---
+current_file = Path(__file__).resolve()
+src_path = current_file.parents[1]
+root_path = current_file.parents[2]
+
+sys.path.append(str(root_path))
+sys.path.append(str(src_path))
+
+import json
+import time
+
+import torch
+import torch.nn.functional as F
+import torch.optim as optim
+from torch.utils.data import DataLoader
+from tqdm import tqdm
+
+from data.dataset import EmbryoSequenceDataset
+from data.sampler import EmbryoLocalityBatchSampler
+from data.transforms import WindowTransform
+from models.hybrid_model import EmbryoGenModel
+from training.utils import precision_settings, seed_everything
+
+# --- CONFIGURATION ---
+# Distills the trained EmbryoGenModel (teacher) into a lightweight frame encoder for CPU serving:
+#     python src/training/distill.py
+# then serve it with FL_CHECKPOINT=SAVE_DIR/student_model.pth and FL_BACKBONE / FL_INPUT_SIZE / FL_WIDTH_MULT
+# from SAVE_DIR/student_config.json (or score.py --model-config SAVE_DIR/student_config.json). Both decode
+# frames at input_size, so the student's smaller input saves compute instead of adding a resize.
+TEACHER_CHECKPOINT = Path("experiments/run_001_hybrid_sota/best_model.pth")
+STUDENT_CONFIG = {"backbone": "mobilenet_v3_small", "input_size": 160, "width_mult": 1.0}
+PRETRAINED = True  # ImageNet-initialized student backbone (only available for width_mult 1.0)
+FREEZE_HEAD = True  # the student reuses the teacher's feature_proj/transformer/classifier; only its encoder trains
+EMBED_WEIGHT = 1.0  # MSE between student and teacher frame embeddings (B, T, 512)
+LOGIT_WEIGHT = 1.0  # KL divergence between temperature-softened per-frame predictions
+TEMPERATURE = 2.0
+LABEL_WEIGHT = 0.0  # cross-entropy on the annotations as well (0: pure distillation)
+EPOCHS = 10
+BATCH_SIZE = 4
+LR = 1e-3
+NUM_WORKERS = 2
+FRAME_STORE = None  # e.g. "data/processed/frame_store" to read windows from the packed memmap store
+FRAME_CACHE_MB = 256
+PRECISION = "auto"  # see training.utils.precision_settings
+DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+SAVE_DIR = Path("experiments/distill_mobilenet")
+CONFIG_FILE = "student_config.json"
+MODEL_FILE = "student_model.pth"
+
+def build_student(teacher, config, pretrained=False, freeze_head=True):
+    """
+    EmbryoGenModel with the backbone described by `config`, starting from the
+    teacher's temporal head (feature_proj, time/positional embeddings,
+    transformer, classifier). The student is then trained to produce the
+    teacher's 512-d frame embeddings, so that head keeps working on them.
+    """
+    student = EmbryoGenModel(num_classes=teacher.classifier.out_features, pretrained=pretrained, **config)
+    head = {k: v for k, v in teacher.state_dict().items() if not k.startswith("feature_extractor.")}
+    missing, unexpected = student.load_state_dict(head, strict=False)
+    mismatched = [k for k in missing + unexpected if not k.startswith("feature_extractor.")]
+    if mismatched:
+        raise ValueError(f"Teacher head does not fit the student: {', '.join(mismatched)}")
+    if freeze_head:
+        for name, param in student.named_parameters():
+            if not name.startswith("feature_extractor."):
+                param.requires_grad_(False)
+    return student.to(next(teacher.parameters()).device)
+
+def distillation_loss(student_features, teacher_features, student_logits, teacher_logits, labels=None,
+                      embed_weight=1.0, logit_weight=1.0, temperature=2.0, label_weight=0.0):
+    """
+    Weighted sum of embedding MSE, softened-logit KL divergence (scaled by T^2
+    so its gradients keep their size across temperatures) and optionally the
+    label cross-entropy. Returns (loss, {term: value}).
+    """
+    num_classes = student_logits.shape[-1]
+    embed = F.mse_loss(student_features.float(), teacher_features.float())
+    logit = F.kl_div(F.log_softmax(student_logits.float().reshape(-1, num_classes) / temperature, dim=-1),
+                     F.softmax(teacher_logits.float().reshape(-1, num_classes) / temperature, dim=-1),
+                     reduction="batchmean") * temperature ** 2
+    loss = embed_weight * embed + logit_weight * logit
+    parts = {"embed": embed.item(), "logit": logit.item()}
+    if label_weight and labels is not None:
+        label = F.cross_entropy(student_logits.float().reshape(-1, num_classes), labels.reshape(-1))
+        loss = loss + label_weight * label
+        parts["label"] = label.item()
+    return loss, parts
+
+def distill_epoch(teacher, student, loader, optimizer, scaler=None, amp_dtype=None, freeze_head=True, desc=None):
+    """One pass over `loader`; the teacher runs in eval mode without gradients. Returns the mean loss."""
+    teacher.eval()
+    student.train()
+    if freeze_head:
+        # Dropout off in the frozen head, so student logits are comparable with the teacher's
+        student.transformer.eval()
+    scaler = scaler or torch.amp.GradScaler(DEVICE.type, enabled=False)
+    total, batches = 0.0, 0
+    loop = tqdm(loader, desc=desc, disable=desc is None)
+    for frames, times, labels in loop:
+        frames, times, labels = frames.to(DEVICE), times.to(DEVICE), labels.to(DEVICE)
+        with torch.autocast(DEVICE.type, dtype=amp_dtype, enabled=amp_dtype is not None):
+            with torch.no_grad():
+                teacher_features = teacher.encode_frames(frames)
+                teacher_logits = teacher.forward_features(teacher_features, times)
+            student_features = student.encode_frames(frames)
+            student_logits = student.forward_features(student_features, times)
+            loss, parts = distillation_loss(student_features, teacher_features, student_logits, teacher_logits,
+                                            labels, EMBED_WEIGHT, LOGIT_WEIGHT, TEMPERATURE, LABEL_WEIGHT)
+        optimizer.zero_grad()
+        scaler.scale(loss).backward()
+        scaler.unscale_(optimizer)
+        torch.nn.utils.clip_grad_norm_(student.parameters(), max_norm=1.0)
+        scaler.step(optimizer)
+        scaler.update()
+        total += loss.item()
+        batches += 1
+        loop.set_postfix({name: f"{value:.4f}" for name, value in parts.items()})
+    return total / batches if batches else 0.0
+
+def evaluate(teacher, student, loader):
+    """
+    Per-frame accuracy of both models on the labels, how often the student
+    predicts the teacher's class, and the mean cosine similarity of their
+    frame embeddings.
+    """
+    teacher.eval()
+    student.eval()
+    teacher_correct = student_correct = agree = total = 0
+    cosine, windows = 0.0, 0
+    with torch.no_grad():
+        for frames, times, labels in loader:
+            frames, times, labels = frames.to(DEVICE), times.to(DEVICE), labels.to(DEVICE)
+            teacher_features, student_features = teacher.encode_frames(frames), student.encode_frames(frames)
+            teacher_preds = teacher.forward_features(teacher_features, times).argmax(dim=-1)
+            student_preds = student.forward_features(student_features, times).argmax(dim=-1)
+            teacher_correct += (teacher_preds == labels).sum().item()
+            student_correct += (student_preds == labels).sum().item()
+            agree += (teacher_preds == student_preds).sum().item()
+            total += labels.numel()
+            cosine += F.cosine_similarity(student_features, teacher_features, dim=-1).mean(dim=1).sum().item()
+            windows += len(frames)
+    total, windows = max(total, 1), max(windows, 1)
+    return {"teacher_acc": teacher_correct / total, "student_acc": student_correct / total,
+            "agreement": agree / total, "embed_cosine": cosine / windows}
+
+def distill():
+    seed_everything(42)
+    SAVE_DIR.mkdir(parents=True, exist_ok=True)
+    # Windows stay at 224 px for the teacher; the student resizes them inside encode_frames (training only)
+    train_ds = EmbryoSequenceDataset("data/splits/train.csv", "data/processed/stacked_frames",
+                                     window_transform=WindowTransform(224, train=True), frame_store=FRAME_STORE,
+                                     frame_cache_bytes=FRAME_CACHE_MB * 2**20)
+    val_ds = EmbryoSequenceDataset("data/splits/val.csv", "data/processed/stacked_frames",
+                                   window_transform=WindowTransform(224), frame_store=FRAME_STORE,
+                                   frame_cache_bytes=FRAME_CACHE_MB * 2**20)
+    train_sampler = EmbryoLocalityBatchSampler(train_ds, BATCH_SIZE, NUM_WORKERS, shuffle=True, seed=42)
+    train_loader = DataLoader(train_ds, batch_sampler=train_sampler, num_workers=NUM_WORKERS)
+    val_loader = DataLoader(val_ds, batch_sampler=EmbryoLocalityBatchSampler(val_ds, BATCH_SIZE, NUM_WORKERS, shuffle=False),
+                            num_workers=NUM_WORKERS)
+
+    teacher = EmbryoGenModel(num_classes=17, pretrained=False).to(DEVICE)
+    teacher.load_state_dict(torch.load(TEACHER_CHECKPOINT, map_location=DEVICE, mmap=True, weights_only=True))
+    teacher.requires_grad_(False)
+    student = build_student(teacher, STUDENT_CONFIG, pretrained=PRETRAINED, freeze_head=FREEZE_HEAD)
+    optimizer = optim.AdamW([p for p in student.parameters() if p.requires_grad], lr=LR, weight_decay=1e-2)
+    amp_dtype, use_scaler = precision_settings(DEVICE, PRECISION)
+    scaler = torch.amp.GradScaler(DEVICE.type, enabled=use_scaler)
+    (SAVE_DIR / CONFIG_FILE).write_text(json.dumps(STUDENT_CONFIG))
+
+    best_val_acc = -1.0
+    for epoch in range(EPOCHS):
+        train_sampler.set_epoch(epoch)
+        start = time.perf_counter()
+        train_loss = distill_epoch(teacher, student, train_loader, optimizer, scaler, amp_dtype, FREEZE_HEAD,
+                                   desc=f"Epoch {epoch+1}/{EPOCHS}")
+        metrics = evaluate(teacher, student, val_loader)
+        print(f"Epoch {epoch+1} | Distill Loss: {train_loss:.4f} | Val Acc: {metrics['student_acc']:.4f} "
+              f"(teacher {metrics['teacher_acc']:.4f}) | Agreement: {metrics['agreement']:.4f}")
+        with open(SAVE_DIR / "distill.jsonl", "a") as f:
+            f.write(json.dumps({"epoch": epoch + 1, "seconds": round(time.perf_counter() - start, 3),
+                                "train_loss": train_loss, **metrics}) + "\n")
+
+        if metrics["student_acc"] > best_val_acc:
+            best_val_acc = metrics["student_acc"]
+            torch.save(student.state_dict(), SAVE_DIR / MODEL_FILE)
+            print(">>> Saved Best Student")
+    return student
+
+if __name__ == "__main__":
+    distill()
@@ -0,0 +1,44 @@
+import os
+import datetime
+
+import torch
+import torch.distributed as dist
+
+
+def is_distributed():
+    """True when launched by torchrun (or any launcher that sets WORLD_SIZE)."""
+    return int(os.environ.get("WORLD_SIZE", 1)) > 1
+
+
+def init_distributed(backend="gloo", timeout_minutes=30):
+    """
+    Joins the process group described by torchrun's environment
+    (RANK, WORLD_SIZE, MASTER_ADDR, MASTER_PORT). Returns (rank, world_size).
+    """
+    if not is_distributed():
+        return 0, 1
+    if not dist.is_initialized():
+        dist.init_process_group(backend, timeout=datetime.timedelta(minutes=timeout_minutes))
+    return dist.get_rank(), dist.get_world_size()
+
+
+def is_main():
+    return not dist.is_initialized() or dist.get_rank() == 0
+
+
+def barrier():
+    if dist.is_initialized():
+        dist.barrier()
+
+
+def all_reduce_sum(values):
+    """Sums a list of numbers over all ranks (returned as floats)."""
+    tensor = torch.tensor(values, dtype=torch.float64)
+    if dist.is_initialized():
+        dist.all_reduce(tensor, op=dist.ReduceOp.SUM)
+    return tensor.tolist()
+
+
+def cleanup():
+    if dist.is_initialized():
+        dist.destroy_process_group()
@@ -0,0 +1,126 @@
+import sys
+import os
+from pathlib import Path
+
+# --- THE ROBUST PATH FIX ---
+current_file = Path(__file__).resolve()
+src_path = current_file.parents[1]
+root_path = current_file.parents[2]
+
+sys.path.append(str(root_path))
+sys.path.append(str(src_path))
+
+import numpy as np
+import torch
+from tqdm import tqdm
+
+from data.frame_store import FrameStore, FEATURES_FILE, MISSING_FEATURE_FILE, load_frame_chw, pack_embryo, parse_run_index
+from data.transforms import normalize_window
+from models.hybrid_model import EmbryoGenModel
+
+# --- CONFIGURATION ---
+BATCH_SIZE = 64
+DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+class JpegFrames:
+    """
+    Stacked JPEGs of one embryo as a (N, 3, 224, 224) uint8 array-like, decoded slice by slice.
+    An unreadable JPEG is read as a zero frame and its position recorded in `unreadable`.
+    """
+    def __init__(self, paths):
+        self.paths = paths
+        self.unreadable = set()
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __getitem__(self, rows):
+        start = range(len(self.paths))[rows].start
+        frames = np.zeros((len(self.paths[rows]), 3, 224, 224), dtype=np.uint8)
+        for i, path in enumerate(self.paths[rows]):
+            try:
+                frames[i] = load_frame_chw(path)
+            except (OSError, ValueError) as e:
+                print(f"[WARNING] Unreadable frame {path}: {e}")
+                self.unreadable.add(start + i)
+        return frames
+
+def count_embryos(frames_root=None, frame_store=None):
+    if frame_store is not None:
+        return len(FrameStore(frame_store).embryo_ids())
+    return sum(1 for d in Path(frames_root).iterdir() if d.is_dir())
+
+def iter_embryo_frames(frames_root=None, frame_store=None):
+    """
+    Yields (emb_id, frame_nums, frames) per embryo, frames as a (N, 3, 224, 224)
+    uint8 array-like, from either a packed frame store or stacked JPEGs.
+    Nothing is decoded up front: store frames are memory-mapped and JPEGs are
+    read when a slice of them is taken.
+    """
+    if frame_store is not None:
+        store = FrameStore(frame_store)
+        for emb_id in store.embryo_ids():
+            yield emb_id, store.index(emb_id), store.frames(emb_id)
+        return
+
+    frames_root = Path(frames_root)
+    for emb_dir in sorted(d for d in frames_root.iterdir() if d.is_dir()):
+        indexed = sorted((parse_run_index(f), f) for f in os.listdir(emb_dir) if parse_run_index(f) is not None)
+        if indexed:
+            yield emb_dir.name, [n for n, _ in indexed], JpegFrames([emb_dir / f for _, f in indexed])
+
+@torch.no_grad()
+def extract_features(model, output_root, frames_root=None, frame_store=None, batch_size=BATCH_SIZE):
+    """
+    Runs the backbone exactly once over every stacked frame and writes the
+    512-d embeddings per embryo into a memory-mapped feature store.
+    Frames without a readable JPEG get the embedding of a blank (all-zero
+    after normalization) frame, which is what the end-to-end path feeds the
+    backbone for them; it is also saved as MISSING_FEATURE_FILE for frames
+    that have no JPEG at all.
+    """
+    model.eval()
+    blank = model.encode_frames(torch.zeros(1, 1, 3, model.input_size, model.input_size, device=DEVICE))
+    blank = blank[0, 0].float().cpu().numpy()
+    Path(output_root).mkdir(parents=True, exist_ok=True)
+    np.save(Path(output_root) / MISSING_FEATURE_FILE, blank)
+    # One embryo at a time, one batch of frames at a time: memory stays flat however large the archive
+    sources = iter_embryo_frames(frames_root, frame_store)
+    for emb_id, frame_nums, frames in tqdm(sources, total=count_embryos(frames_root, frame_store),
+                                           desc="Extracting Features"):
+        chunks = []
+        for start in range(0, len(frames), batch_size):
+            batch = normalize_window(torch.from_numpy(np.asarray(frames[start:start + batch_size])))
+            chunks.append(model.encode_frames(batch.unsqueeze(0).to(DEVICE))[0].float().cpu().numpy())
+        features = np.concatenate(chunks)
+        for i in getattr(frames, "unreadable", ()):
+            features[i] = blank
+        pack_embryo(output_root, emb_id, frame_nums, features,
+                    shape=features.shape[1:], dtype=np.float32, array_file=FEATURES_FILE)
+
+@torch.no_grad()
+def check_feature_parity(model, frame_ds, feature_ds, num_windows=8, atol=1e-4):
+    """
+    Validates the cache: the cached-feature forward must match the end-to-end
+    forward on the same windows. Returns the max absolute logit difference.
+    """
+    model.eval()
+    max_diff = 0.0
+    for idx in np.linspace(0, len(frame_ds) - 1, min(num_windows, len(frame_ds))).astype(int):
+        frames, times, _ = frame_ds[idx]
+        features, feature_times, _ = feature_ds[idx]
+        assert torch.equal(times, feature_times), "Frame and feature datasets index different windows"
+
+        end_to_end = model(frames.unsqueeze(0).to(DEVICE), times.unsqueeze(0).to(DEVICE))
+        cached = model.forward_features(features.unsqueeze(0).to(DEVICE), times.unsqueeze(0).to(DEVICE))
+        max_diff = max(max_diff, (end_to_end - cached).abs().max().item())
+
+    if max_diff > atol:
+        raise AssertionError(f"Cached features diverge from end-to-end forward (max |diff| = {max_diff:.2e})")
+    print(f"Feature cache parity OK (max |diff| = {max_diff:.2e})")
+    return max_diff
+
+if __name__ == "__main__":
+    # Features must come from the same backbone weights the head will be trained with
+    model = EmbryoGenModel(num_classes=17).to(DEVICE)
+    extract_features(model, "data/processed/feature_store", frames_root="data/processed/stacked_frames")
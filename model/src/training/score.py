@@ -0,0 +1,348 @@
+import sys
+import os
+from pathlib import Path
+
+# --- THE ROBUST PATH FIX ---
+current_file = Path(__file__).resolve()
+src_path = current_file.parents[1]
+root_path = current_file.parents[2]
+
+sys.path.append(str(root_path))
+sys.path.append(str(src_path))
+
+import json
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import torch
+from tqdm import tqdm
+
+from data.dataset import CLASSES
+from data.keyframes import expand_keyframes, frame_signatures, select_keyframes
+from data.frame_store import FrameStore, FRAMES_FILE, INDEX_FILE, load_frame_chw, parse_run_index
+from data.master_labels import read_time_elapsed, write_labels
+from data.transforms import normalize_window, resize_window
+from models.hybrid_model import EmbryoGenModel
+from models.inference import merge_weights, window_starts
+
+# --- CONFIGURATION ---
+# python src/training/score.py --checkpoint experiments/run_001_hybrid_sota/best_model.pth \
+#     --frames-root data/processed/stacked_frames --time-dir data/raw/embryo_dataset_time_elapsed --output experiments/scores
+FRAME_BATCH = 32        # frames per backbone forward, filled across embryo boundaries
+WINDOW_BATCH = 32       # windows per temporal-head forward, also across embryos
+DECODE_WORKERS = min(4, os.cpu_count() or 1)
+PREFETCH = 2            # decoded frame batches buffered ahead of the model
+FRAME_INTERVAL_H = 0.25 # elapsed hours per frame step for embryos without a timeElapsed table
+SKIP_THRESHOLD = None   # e.g. 0.01: near-static frames reuse the previous frame's features (data.keyframes)
+DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+def list_embryo_ids(frames_root=None, frame_store=None):
+    if frame_store is not None:
+        return FrameStore(frame_store).embryo_ids()
+    return sorted(d.name for d in Path(frames_root).iterdir() if d.is_dir())
+
+def open_embryo(emb_id, frames_root=None, frame_store=None, time_dir=None, size=224):
+    """
+    Describes one embryo without decoding it: frame numbers, elapsed times and
+    read(start, stop), which returns those frames as (n, 3, size, size) uint8
+    (size: the backbone's input size; packed 224 px frames are resized on read).
+    An unreadable JPEG is read as a zero frame and its position recorded in
+    "unreadable", so one bad file doesn't stop the archive (see decode_segments).
+    """
+    unreadable = set()
+    if frame_store is not None:
+        frame_nums = np.load(Path(frame_store) / emb_id / INDEX_FILE)
+        # Mapped per embryo and dropped with it (FrameStore keeps every mapping it opens)
+        frames = np.load(Path(frame_store) / emb_id / FRAMES_FILE, mmap_mode="r")
+
+        def read(start, stop):
+            if frames.shape[-1] == size:
+                return frames[start:stop]
+            return resize_window(torch.from_numpy(np.ascontiguousarray(frames[start:stop])), size).numpy()
+    else:
+        emb_dir = Path(frames_root) / emb_id
+        indexed = sorted((parse_run_index(f), f) for f in os.listdir(emb_dir) if parse_run_index(f) is not None)
+        frame_nums = np.array([n for n, _ in indexed], dtype=np.int32)
+        files = [emb_dir / f for _, f in indexed]
+
+        def read(start, stop):
+            frames = np.zeros((stop - start, 3, size, size), dtype=np.uint8)
+            for i, f in enumerate(files[start:stop]):
+                try:
+                    frames[i] = load_frame_chw(f, size)
+                except (OSError, ValueError) as e:
+                    print(f"[WARNING] Unreadable frame {f}: {e}")
+                    unreadable.add(start + i)
+            return frames
+
+    time_file = Path(time_dir) / f"{emb_id}_timeElapsed.csv" if time_dir else None
+    if time_file is not None and time_file.exists():
+        table = read_time_elapsed(time_file).set_index("Frame")["time"]
+        times = table.reindex(frame_nums).to_numpy(dtype=np.float32)
+        # Frames missing from the table: interpolate along the frame numbers
+        missing = np.isnan(times)
+        if missing.all():
+            times = (frame_nums - frame_nums[:1]) * FRAME_INTERVAL_H
+        elif missing.any():
+            times[missing] = np.interp(frame_nums[missing], frame_nums[~missing], times[~missing])
+    else:
+        times = (frame_nums - frame_nums[:1]) * FRAME_INTERVAL_H
+    return {"id": emb_id, "frame_nums": frame_nums, "times": torch.as_tensor(times, dtype=torch.float32), "read": read,
+            "unreadable": unreadable}
+
+def iter_frame_batches(embryos, frame_batch=FRAME_BATCH):
+    """
+    Cuts a stream of embryos into batches of `frame_batch` frames that span
+    embryo boundaries. Yields lists of (embryo, start, stop) segments.
+    """
+    segments, size = [], 0
+    for embryo in embryos:
+        num_frames, start = len(embryo["frame_nums"]), 0
+        while start < num_frames:
+            stop = min(num_frames, start + frame_batch - size)
+            segments.append((embryo, start, stop))
+            size += stop - start
+            start = stop
+            if size == frame_batch:
+                yield segments
+                segments, size = [], 0
+    if segments:
+        yield segments
+
+def decode_segments(segments):
+    """
+    Reads (decodes) every segment of a batch and normalizes it in one op: (n, 3, size, size) float32.
+    Unreadable frames are all-zero after normalization, as in EmbryoSequenceDataset.
+    """
+    frames = normalize_window(torch.from_numpy(np.concatenate([np.asarray(embryo["read"](start, stop))
+                                                               for embryo, start, stop in segments])))
+    offset = 0
+    for embryo, start, stop in segments:
+        for i in embryo.get("unreadable", ()):
+            if start <= i < stop:
+                frames[offset + i - start] = 0
+        offset += stop - start
+    return frames
+
+def prefetch(pool, batches, depth=PREFETCH):
+    """
+    Producer side: decodes batches on the worker pool at most `depth` ahead of
+    the consumer, so at most depth + 1 decoded batches exist at any time.
+    Yields (segments, frames) in order.
+    """
+    pending = deque()
+    for segments in batches:
+        pending.append((segments, pool.submit(decode_segments, segments)))
+        if len(pending) > depth:
+            segments, future = pending.popleft()
+            yield segments, future.result()
+    while pending:
+        segments, future = pending.popleft()
+        yield segments, future.result()
+
+def encode_batch(model, frames, segments, skip_threshold=None, device=None):
+    """
+    Backbone features (n, D) of one frame batch. With `skip_threshold`, frames
+    that barely differ from their embryo's last encoded frame reuse its
+    features; that reference carries over between batches in the embryo dict.
+    Returns (features, number of frames actually encoded).
+    """
+    if not skip_threshold:
+        return model.encode_frames(frames.unsqueeze(0).to(device))[0], len(frames)
+
+    signatures = frame_signatures(frames)
+    keep = torch.empty(len(frames), dtype=torch.bool)
+    offset = 0
+    for embryo, start, stop in segments:
+        rows = slice(offset, offset + stop - start)
+        keep[rows] = select_keyframes(signatures[rows], skip_threshold, reference=embryo.get("key_signature"))
+        if keep[rows].any():
+            embryo["key_signature"] = signatures[rows][keep[rows].nonzero()[-1, 0]]
+        offset += stop - start
+
+    if keep.any():
+        encoded = model.encode_frames(frames[keep].unsqueeze(0).to(device))[0]
+    else:
+        # Every frame reuses features of an earlier batch (an embryo's first frame is always encoded)
+        encoded = segments[0][0]["key_feature"].new_zeros(0, len(segments[0][0]["key_feature"]))
+    features, offset, used = [], 0, 0
+    for embryo, start, stop in segments:
+        segment_keep = keep[offset:offset + stop - start]
+        count = int(segment_keep.sum())
+        features.append(expand_keyframes(encoded[used:used + count], segment_keep, embryo.get("key_feature")))
+        embryo["key_feature"] = features[-1][-1]
+        offset, used = offset + stop - start, used + count
+    return torch.cat(features), len(encoded)
+
+class ArchiveScorer:
+    """
+    Consumer side: collects per-frame backbone features until an embryo is
+    complete, runs the temporal head over its overlapping windows (batched with
+    other embryos' windows), merges them per frame like models.inference and
+    writes the embryo's rows to `output_dir/<EmbryoID>.parquet`.
+    Only embryos in flight are held in memory.
+    """
+    def __init__(self, model, output_dir, window_size=16, stride=8, merge="center", window_batch=WINDOW_BATCH):
+        self.model = model
+        self.output_dir = Path(output_dir)
+        self.window_size = window_size
+        self.stride = stride
+        self.merge = merge
+        self.window_batch = window_batch
+        self._open = {}
+        self._windows = []
+
+    def add_features(self, embryo, start, stop, features):
+        """Stores features of frames [start, stop); returns the IDs of embryos completed (written) by it."""
+        state = self._open.get(embryo["id"])
+        if state is None:
+            state = self._open[embryo["id"]] = {"embryo": embryo, "filled": 0, "features": torch.empty(
+                len(embryo["frame_nums"]), features.shape[-1], device=features.device)}
+        state["features"][start:stop] = features
+        state["filled"] += stop - start
+        if state["filled"] < len(state["features"]):
+            return []
+
+        starts = window_starts(len(state["features"]), self.window_size, self.stride)
+        state["windows_left"] = len(starts)
+        self._windows.extend((state, s) for s in starts)
+        return self.flush() if len(self._windows) >= self.window_batch else []
+
+    @torch.no_grad()
+    def flush(self):
+        """Runs the temporal head over every queued window; returns the IDs of completed embryos."""
+        # Embryos shorter than a window yield shorter windows, which only batch with equal lengths
+        by_length = {}
+        for state, s in self._windows:
+            by_length.setdefault(min(self.window_size, len(state["features"])), []).append((state, s))
+        self._windows = []
+
+        done = []
+        for length, windows in by_length.items():
+            weights = merge_weights(length, self.merge).unsqueeze(-1)
+            for i in range(0, len(windows), self.window_batch):
+                batch = windows[i:i + self.window_batch]
+                feats = torch.stack([state["features"][s:s + length] for state, s in batch])
+                times = torch.stack([state["embryo"]["times"][s:s + length] for state, s in batch])
+                logits = self.model.forward_features(feats, times.to(feats.device)).float().cpu()
+                for (state, s), window_logits in zip(batch, logits):
+                    if "merged" not in state:
+                        state["merged"] = torch.zeros(len(state["features"]), logits.shape[-1])
+                        state["weight_sum"] = torch.zeros(len(state["features"]), 1)
+                    state["merged"][s:s + length] += window_logits * weights
+                    state["weight_sum"][s:s + length] += weights
+                    state["windows_left"] -= 1
+                    if state["windows_left"] == 0:
+                        self._write(state)
+                        done.append(state["embryo"]["id"])
+        return done
+
+    def _write(self, state):
+        embryo = self._open.pop(state["embryo"]["id"])["embryo"]
+        probs = torch.softmax(state["merged"] / state["weight_sum"], dim=-1)
+        confidence, predicted = probs.max(dim=-1)
+        df = pd.DataFrame({
+            "EmbryoID": embryo["id"],
+            "Frame": embryo["frame_nums"],
+            "time": embryo["times"].numpy(),
+            "Prediction": np.asarray(CLASSES)[predicted.numpy()],
+            "Confidence": confidence.numpy(),
+            **{f"p_{cls}": probs[:, i].numpy() for i, cls in enumerate(CLASSES)},
+        })
+        # Written under a temporary name first: an existing <EmbryoID>.parquet is always complete
+        tmp_path = self.output_dir / f".{embryo['id']}.tmp.parquet"
+        write_labels(df, tmp_path)
+        os.replace(tmp_path, self.output_dir / f"{embryo['id']}.parquet")
+
+def completed_embryos(output_dir):
+    """IDs already scored into `output_dir`; leftovers of an interrupted write are removed."""
+    output_dir = Path(output_dir)
+    for tmp_path in output_dir.glob(".*.tmp.parquet"):
+        tmp_path.unlink()
+    return {p.name[:-len(".parquet")] for p in output_dir.glob("*.parquet") if not p.name.startswith(".")}
+
+@torch.no_grad()
+def score_archive(model, output_dir, frames_root=None, frame_store=None, time_dir=None, frame_batch=FRAME_BATCH,
+                  window_batch=WINDOW_BATCH, workers=DECODE_WORKERS, depth=PREFETCH, window_size=16, stride=8,
+                  merge="center", skip_threshold=SKIP_THRESHOLD, embryo_ids=None, input_size=None):
+    """
+    Scores every embryo of a stacked_frames directory or packed frame store
+    into one parquet file per embryo under `output_dir` (read them back
+    together with pd.read_parquet(output_dir)). Frames are decoded by
+    `workers` threads into a bounded prefetch queue; the backbone runs on
+    `frame_batch` frames at a time and the temporal head on `window_batch`
+    windows, both filled across embryos. Reruns skip embryos already written,
+    so an interrupted run resumes after its last completed embryo.
+    skip_threshold: see encode_batch; embryo_ids: score only these (e.g. a split's)
+    input_size: size frames are decoded at, by default the model's own (model.input_size)
+    Returns throughput stats, including embryos/hour, frames encoded and
+    unreadable frames (scored as zero frames, with a warning).
+    """
+    model.eval()
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    done = completed_embryos(output_dir)
+    wanted = set(embryo_ids) if embryo_ids is not None else None
+    todo = [e for e in list_embryo_ids(frames_root, frame_store) if e not in done and (wanted is None or e in wanted)]
+    print(f"Scoring {len(todo)} embryos ({len(done)} already scored in {output_dir})")
+
+    scorer = ArchiveScorer(model, output_dir, window_size, stride, merge, window_batch)
+    size = input_size or getattr(model, "input_size", 224)
+    embryos = (open_embryo(emb_id, frames_root, frame_store, time_dir, size) for emb_id in todo)
+    batches = iter_frame_batches((e for e in embryos if len(e["frame_nums"])), frame_batch)
+    device = next(model.parameters()).device
+    num_frames, encoded, scored, unreadable = 0, 0, 0, 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="score-decode") as pool, \
+            tqdm(total=len(todo), desc="Scoring Embryos") as progress:
+        for segments, frames in prefetch(pool, batches, depth):
+            features, count = encode_batch(model, frames, segments, skip_threshold, device)
+            num_frames += len(frames)
+            encoded += count
+            offset = 0
+            for embryo, seg_start, seg_stop in segments:
+                unreadable += sum(seg_start <= i < seg_stop for i in embryo["unreadable"])
+                completed = scorer.add_features(embryo, seg_start, seg_stop, features[offset:offset + seg_stop - seg_start])
+                offset += seg_stop - seg_start
+                scored += len(completed)
+                progress.update(len(completed))
+        completed = scorer.flush()
+        scored += len(completed)
+        progress.update(len(completed))
+
+    seconds = time.perf_counter() - start
+    stats = {"embryos": scored, "skipped": len(done), "frames": num_frames, "frames_encoded": encoded,
+             "unreadable_frames": unreadable, "seconds": seconds,
+             "embryos_per_hour": 3600 * scored / seconds if seconds else 0.0,
+             "frames_per_sec": num_frames / seconds if seconds else 0.0}
+    print(f"Scored {scored} embryos ({num_frames} frames, {encoded} through the backbone) in {seconds:.1f}s: "
+          f"{stats['embryos_per_hour']:.0f} embryos/hour, {stats['frames_per_sec']:.1f} frames/sec")
+    return stats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score a time-lapse archive into per-frame predictions")
+    parser.add_argument("--checkpoint", required=True, help="trainer state_dict (best_model.pth)")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--frames-root", help="stacked_frames directory of JPEGs")
+    source.add_argument("--frame-store", help="packed frame store")
+    parser.add_argument("--time-dir", default=None, help="directory of <EmbryoID>_timeElapsed.csv tables")
+    parser.add_argument("--output", required=True, help="directory of per-embryo parquet files")
+    parser.add_argument("--frame-batch", type=int, default=FRAME_BATCH)
+    parser.add_argument("--window-batch", type=int, default=WINDOW_BATCH)
+    parser.add_argument("--workers", type=int, default=DECODE_WORKERS)
+    parser.add_argument("--skip-threshold", type=float, default=SKIP_THRESHOLD,
+                        help="reuse features of frames that changed less than this (fraction of intensity)")
+    parser.add_argument("--model-config", default=None,
+                        help="student_config.json of a distilled checkpoint (training/distill.py)")
+    args = parser.parse_args()
+
+    model_config = json.loads(Path(args.model_config).read_text()) if args.model_config else {}
+    model = EmbryoGenModel(num_classes=17, pretrained=False, **model_config).to(DEVICE)
+    model.load_state_dict(torch.load(args.checkpoint, map_location=DEVICE, mmap=True, weights_only=True))
+    score_archive(model, args.output, frames_root=args.frames_root, frame_store=args.frame_store,
+                  time_dir=args.time_dir, frame_batch=args.frame_batch, window_batch=args.window_batch,
+                  workers=args.workers, skip_threshold=args.skip_threshold)
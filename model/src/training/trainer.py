@@ -10,101 +10,241 @@ root_path = current_file.parents[2]
 sys.path.append(str(root_path))
 sys.path.append(str(src_path))
 
+import json
+import time
+from contextlib import nullcontext
+
 import torch
 import torch.nn as nn
 import torch.optim as optim
-from torch.utils.data import DataLoader
-from torchvision import transforms
+from torch.nn.parallel import DistributedDataParallel
+from torch.utils.data import DataLoader, DistributedSampler, Subset
 from tqdm import tqdm
 
-from data.dataset import EmbryoSequenceDataset
+from data.dataset import EmbryoSequenceDataset, EmbryoFeatureDataset
+from data.sampler import EmbryoLocalityBatchSampler
+from data.transforms import WindowTransform
+from instrumentation import Instrumentation, step_profiler
 from models.hybrid_model import EmbryoGenModel
-from training.utils import seed_everything
+from training.distributed import all_reduce_sum, barrier, cleanup, init_distributed, is_main
+from training.utils import precision_settings, seed_everything
 
 # --- CONFIGURATION ---
+# Distributed: torchrun --nproc_per_node=8 src/training/trainer.py (add --nnodes/--rdzv-endpoint for several
+# machines). Each process trains on its shard of the windows with BATCH_SIZE, so the global batch grows
+# with the number of processes; torchrun sets OMP_NUM_THREADS=1 per process unless it is already set.
 EPOCHS = 20
 BATCH_SIZE = 4 
+DIST_BACKEND = "gloo"
+PRETRAINED = True  # ImageNet-initialized backbone (downloads the weights on first use)
+INIT_CHECKPOINT = None  # e.g. a global model's state_dict to fine-tune from (federated local rounds)
+MODEL_CONFIG = {}  # extra EmbryoGenModel arguments, e.g. {"backbone": "mobilenet_v3_small", "input_size": 160}
 LR = 5e-5  # Lower learning rate for Transformer stability
 DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 SAVE_DIR = Path("experiments/run_001_hybrid_sota")
 SAVE_DIR.mkdir(parents=True, exist_ok=True)
+FRAME_STORE = None  # e.g. "data/processed/frame_store" to train from the packed memmap store
+AUGMENT = True  # random crop + flips drawn once per window, identical for all of its frames
+FRAME_CACHE_MB = 256  # per-worker cache of decoded JPEG frames shared by overlapping windows (0 disables)
+NUM_WORKERS = 2
+FEATURE_STORE = None  # e.g. "data/processed/feature_store" (extract_features.py) to train only the temporal head
+INSTRUMENT = True  # per-stage timing: tqdm postfix + SAVE_DIR/timing.jsonl
+PROFILE_STEPS = None  # e.g. (10, 5): torch.profiler trace of training steps 10-14 into SAVE_DIR/profile
+PRECISION = "auto"  # "auto" (fp16 + GradScaler on CUDA, bf16 autocast on CPU), "bf16", "fp16" or "fp32"
+ACCUM_STEPS = 1  # gradient accumulation: one optimizer step per N batches (effective batch BATCH_SIZE * N)
+CHECKPOINT_CHUNK = None  # e.g. 4: recompute backbone activations during backward, 4 frames at a time (BatchNorm frozen)
+
+class FeatureHead(nn.Module):
+    """Exposes forward_features as forward, so DDP can wrap the features-only model."""
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, features, times):
+        return self.model.forward_features(features, times)
 
 def train():
+    rank, world_size = init_distributed(DIST_BACKEND)
     seed_everything(42)
     
-    transform = transforms.Compose([
-        transforms.Resize((224, 224)),
-        transforms.ToTensor(),
-        transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225])
-    ])
-
-    train_ds = EmbryoSequenceDataset("data/splits/train.csv", "data/processed/stacked_frames", transform=transform)
-    val_ds = EmbryoSequenceDataset("data/splits/val.csv", "data/processed/stacked_frames", transform=transform)
-    
-    train_loader = DataLoader(train_ds, batch_size=BATCH_SIZE, shuffle=True, num_workers=2)
-    val_loader = DataLoader(val_ds, batch_size=BATCH_SIZE, shuffle=False, num_workers=2)
+    # Whole-window uint8 pipeline: batched JPEG decode, shared augmentation, fused normalization
+    # Windows come out at the backbone's input size (224 unless MODEL_CONFIG picks a smaller one)
+    input_size = MODEL_CONFIG.get("input_size", 224)
+    train_transform = WindowTransform(input_size, train=AUGMENT)
+    val_transform = WindowTransform(input_size)
+
+    # Rank 0 builds (and caches) the window indexes first; the other ranks then load the cache
+    if not is_main():
+        barrier()
+    if FEATURE_STORE:
+        # Features-only mode: the backbone ran once offline, only the temporal head trains
+        train_ds = EmbryoFeatureDataset("data/splits/train.csv", FEATURE_STORE)
+        val_ds = EmbryoFeatureDataset("data/splits/val.csv", FEATURE_STORE)
+    else:
+        train_ds = EmbryoSequenceDataset("data/splits/train.csv", "data/processed/stacked_frames", window_transform=train_transform,
+                                         frame_store=FRAME_STORE, frame_cache_bytes=FRAME_CACHE_MB * 2**20)
+        val_ds = EmbryoSequenceDataset("data/splits/val.csv", "data/processed/stacked_frames", window_transform=val_transform,
+                                       frame_store=FRAME_STORE, frame_cache_bytes=FRAME_CACHE_MB * 2**20)
+    if is_main():
+        barrier()
+
+    if world_size > 1:
+        # Each rank trains on a disjoint shuffled shard and validates an exact (unpadded) slice
+        train_sampler = DistributedSampler(train_ds, world_size, rank, shuffle=True, seed=42)
+        train_loader = DataLoader(train_ds, batch_size=BATCH_SIZE, sampler=train_sampler, num_workers=NUM_WORKERS)
+        val_loader = DataLoader(Subset(val_ds, range(rank, len(val_ds), world_size)), batch_size=BATCH_SIZE,
+                                shuffle=False, num_workers=NUM_WORKERS)
+    else:
+        # Chunk-level shuffling keeps overlapping windows on one worker, so the frame cache decodes each frame once;
+        # each batch still takes its windows from BATCH_SIZE different chunks, so batches mix embryos
+        train_sampler = EmbryoLocalityBatchSampler(train_ds, BATCH_SIZE, NUM_WORKERS, shuffle=True, seed=42)
+        train_loader = DataLoader(train_ds, batch_sampler=train_sampler, num_workers=NUM_WORKERS)
+        val_loader = DataLoader(val_ds, batch_sampler=EmbryoLocalityBatchSampler(val_ds, BATCH_SIZE, NUM_WORKERS, shuffle=False),
+                                num_workers=NUM_WORKERS)
 
-    model = EmbryoGenModel(num_classes=17).to(DEVICE)
+    model = EmbryoGenModel(num_classes=17, pretrained=PRETRAINED and not INIT_CHECKPOINT, **MODEL_CONFIG).to(DEVICE)
+    if INIT_CHECKPOINT:
+        model.load_state_dict(torch.load(INIT_CHECKPOINT, map_location=DEVICE, weights_only=True))
+    if CHECKPOINT_CHUNK and not FEATURE_STORE:
+        model.enable_backbone_checkpointing(CHECKPOINT_CHUNK)
+    forward = model
+
+    # Stage timing: data wait, host-to-device copy, backbone, transformer, backward, optimizer
+    metrics = Instrumentation(enabled=INSTRUMENT and is_main(), cuda_sync=DEVICE.type == "cuda",
+                              record_functions=PROFILE_STEPS is not None)
+    metrics.time_module(model.feature_extractor, "backbone")
+    metrics.time_module(model.transformer, "transformer")
+    if FEATURE_STORE:
+        # Cached features came from these backbone weights, so keep them frozen
+        model.feature_extractor.requires_grad_(False)
+        forward = FeatureHead(model)
+    local_forward = forward
+    if world_size > 1:
+        # Gradients are all-reduced across ranks during backward
+        forward = DistributedDataParallel(forward)
     
     criterion = nn.CrossEntropyLoss(label_smoothing=0.1)
-    optimizer = optim.AdamW(model.parameters(), lr=LR, weight_decay=1e-2)
+    optimizer = optim.AdamW([p for p in model.parameters() if p.requires_grad], lr=LR, weight_decay=1e-2)
     
-    # --- UPDATED AMP SYNTAX ---
-    scaler = torch.amp.GradScaler('cuda') 
+    # Mixed precision for the device; a disabled scaler passes the loss and step straight through
+    amp_dtype, use_scaler = precision_settings(DEVICE, PRECISION)
+    scaler = torch.amp.GradScaler(DEVICE.type, enabled=use_scaler)
 
     best_val_acc = 0.0
+    profiler = step_profiler(SAVE_DIR / "profile" if PROFILE_STEPS and is_main() else None, *(PROFILE_STEPS or ()))
+    profiler.start()
     for epoch in range(EPOCHS):
         model.train()
         train_loss = 0
+        metrics.reset()
+        epoch_start = time.perf_counter()
+        train_sampler.set_epoch(epoch)
+        cache_stats(train_ds, reset=True)
         
-        loop = tqdm(train_loader, desc=f"Epoch {epoch+1}/{EPOCHS}")
-        for frames, times, labels in loop:
-            frames, times, labels = frames.to(DEVICE), times.to(DEVICE), labels.to(DEVICE)
-            
-            optimizer.zero_grad()
-            
-            # --- UPDATED AUTOCAST SYNTAX ---
-            with torch.amp.autocast('cuda'):
-                logits = model(frames, times) 
-                loss = criterion(logits.view(-1, 17), labels.view(-1))
+        loop = tqdm(metrics.timed_iter(train_loader), total=len(train_loader), desc=f"Epoch {epoch+1}/{EPOCHS}",
+                    disable=not is_main())
+        for step, (frames, times, labels) in enumerate(loop):
+            with metrics.span("h2d"):
+                frames, times, labels = frames.to(DEVICE), times.to(DEVICE), labels.to(DEVICE)
             
-            # 1. Scale loss and backprop
-            scaler.scale(loss).backward()
+            if step % ACCUM_STEPS == 0:
+                optimizer.zero_grad()
+            # Gradients of ACCUM_STEPS batches add up before each step; DDP only all-reduces on the last one
+            sync = (step + 1) % ACCUM_STEPS == 0 or step + 1 == len(train_loader)
             
-            # 2. UNscale for gradient clipping (Prevents NaN)
-            scaler.unscale_(optimizer)
-            torch.nn.utils.clip_grad_norm_(model.parameters(), max_norm=1.0)
+            with forward.no_sync() if world_size > 1 and not sync else nullcontext():
+                with metrics.span("forward"), torch.autocast(DEVICE.type, dtype=amp_dtype, enabled=amp_dtype is not None):
+                    logits = forward(frames, times) 
+                    loss = criterion(logits.view(-1, 17), labels.view(-1))
+                
+                # 1. Scale loss and backprop
+                with metrics.span("backward"):
+                    scaler.scale(loss / ACCUM_STEPS).backward()
             
-            # 3. Step and update
-            scaler.step(optimizer)
-            scaler.update()
+            if sync:
+                with metrics.span("optimizer"):
+                    # 2. UNscale for gradient clipping (Prevents NaN)
+                    scaler.unscale_(optimizer)
+                    torch.nn.utils.clip_grad_norm_(model.parameters(), max_norm=1.0)
+                    
+                    # 3. Step and update
+                    scaler.step(optimizer)
+                    scaler.update()
+            profiler.step()
             
             if torch.isnan(loss):
                 print(f"\n[WARNING] NaN loss detected at epoch {epoch+1}. Skipping batch...")
                 continue
                 
             train_loss += loss.item()
-            loop.set_postfix(loss=f"{loss.item():.4f}")
+            postfix = {"loss": f"{loss.item():.4f}"}
+            if INSTRUMENT:
+                postfix["stall"] = f"{100 * metrics.total('data') / (time.perf_counter() - epoch_start):.0f}%"
+            loop.set_postfix(postfix)
+        log_timing(metrics, epoch, "train", time.perf_counter() - epoch_start, cache_stats(train_ds))
 
-        val_acc = validate(model, val_loader)
-        print(f"Epoch {epoch+1} | Train Loss: {train_loss/len(train_loader):.4f} | Val Acc: {val_acc:.4f}")
+        metrics.reset()
+        val_start = time.perf_counter()
+        # Unwrapped: validation slices differ in length per rank, so no DDP collectives per step
+        val_acc = validate(model, val_loader, local_forward, metrics)
+        log_timing(metrics, epoch, "val", time.perf_counter() - val_start)
+        loss_sum, batches = all_reduce_sum([train_loss, len(train_loader)])
+        if is_main():
+            print(f"Epoch {epoch+1} | Train Loss: {loss_sum/batches:.4f} | Val Acc: {val_acc:.4f}")
         
+        # val_acc is reduced over all ranks, so every rank takes the same branch
         if val_acc > best_val_acc:
             best_val_acc = val_acc
-            torch.save(model.state_dict(), SAVE_DIR / "best_model.pth")
-            print(">>> Saved Best Model")
+            if is_main():
+                torch.save(model.state_dict(), SAVE_DIR / "best_model.pth")
+                print(">>> Saved Best Model")
+    profiler.stop()
+    cleanup()
+    return model
+
+def cache_stats(dataset, reset=False):
+    """Frame cache hits/misses of `dataset` over all loader workers (None without a cache)."""
+    cache = getattr(dataset, "frame_cache", None)
+    if cache is None:
+        return None
+    if reset:
+        cache.reset_stats()
+    return cache.stats()
+
+def log_timing(metrics, epoch, phase, seconds, frame_cache=None):
+    """Prints the per-stage breakdown of an epoch and appends it to SAVE_DIR/timing.jsonl."""
+    if not metrics.enabled:
+        return
+    record = {"epoch": epoch + 1, "phase": phase, "seconds": round(seconds, 3), **metrics.snapshot(seconds)}
+    record["data_stall_pct"] = round(100 * metrics.total("data") / seconds, 2) if seconds else 0.0
+    breakdown = " | ".join(f"{name} {span['pct']:.0f}%" for name, span in record["spans"].items())
+    if frame_cache is not None:
+        record["frame_cache"] = frame_cache
+        breakdown += f" | frame cache hit rate {100 * frame_cache['hit_rate']:.0f}%"
+    print(f"[{phase} timing] {seconds:.1f}s | {breakdown}")
+    with open(SAVE_DIR / "timing.jsonl", "a") as f:
+        f.write(json.dumps(record) + "\n")
 
-def validate(model, loader):
+def validate(model, loader, forward=None, metrics=None):
+    """
+    forward: FeatureHead(model) when the loader yields cached features.
+    Under torch.distributed the accuracy is reduced over every rank's slice.
+    """
+    forward = forward or model
+    metrics = metrics or Instrumentation(enabled=False)
     model.eval()
     correct = 0
     total = 0
     with torch.no_grad():
-        for frames, times, labels in loader:
-            frames, times, labels = frames.to(DEVICE), times.to(DEVICE), labels.to(DEVICE)
-            logits = model(frames, times)
+        for frames, times, labels in metrics.timed_iter(loader):
+            with metrics.span("h2d"):
+                frames, times, labels = frames.to(DEVICE), times.to(DEVICE), labels.to(DEVICE)
+            with metrics.span("forward"):
+                logits = forward(frames, times)
             preds = torch.argmax(logits, dim=-1)
             correct += (preds == labels).sum().item()
             total += labels.numel()
+    correct, total = all_reduce_sum([correct, total])
     return correct / total if total > 0 else 0
 
 if __name__ == "__main__":
@@ -10,4 +10,19 @@ def seed_everything(seed=42):
     torch.manual_seed(seed)
     torch.cuda.manual_seed(seed)
     torch.backends.cudnn.deterministic = True
-    torch.backends.cudnn.benchmark = False
\ No newline at end of file
+    torch.backends.cudnn.benchmark = False
+
+
+def precision_settings(device, precision="auto"):
+    """
+    Autocast dtype for `precision` ("auto", "bf16", "fp16" or "fp32") on `device`,
+    and whether the loss needs a GradScaler. Returns (dtype or None, use_scaler).
+    "auto" is fp16 on CUDA and bf16 on CPU; bf16 keeps fp32's exponent range,
+    so only fp16 needs loss scaling.
+    """
+    if precision == "auto":
+        precision = "fp16" if device.type == "cuda" else "bf16"
+    dtypes = {"bf16": torch.bfloat16, "fp16": torch.float16, "fp32": None}
+    if precision not in dtypes:
+        raise ValueError(f"Unknown precision {precision!r}; expected auto, {', '.join(dtypes)}")
+    return dtypes[precision], precision == "fp16"
@@ -0,0 +1,25 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))  # adds project root
+
+import pytest
+import torch
+
+from src.models.backends import apply_backend
+from src.models.hybrid_model import EmbryoGenModel
+
+
+@pytest.mark.parametrize("backend", ["channels_last", "dynamic_int8", "static_int8+dynamic_int8"])
+def test_backends_track_fp32(backend):
+    torch.manual_seed(0)
+    model = EmbryoGenModel(num_classes=17, pretrained=False).eval()
+    frames = torch.randn(2, 8, 3, 64, 64)
+    times = torch.arange(8, dtype=torch.float32).repeat(2, 1)
+    with torch.no_grad():
+        expected = model(frames, times)
+        optimized = apply_backend(model, backend, calibration=torch.randn(16, 3, 64, 64))
+        logits = optimized.forward_features(optimized.encode_frames(frames), times)
+
+    assert (logits.argmax(-1) == expected.argmax(-1)).float().mean() >= 0.9
+    with torch.no_grad():
+        assert torch.equal(model(frames, times), expected)
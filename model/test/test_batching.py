@@ -0,0 +1,65 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))  # adds project root
+
+import asyncio
+import threading
+
+import pytest
+import torch
+
+from src.models.hybrid_model import EmbryoGenModel
+from src.models.inference import score_sequence
+from src.serving.batching import BatcherStoppedError, MicroBatcher, QueueFullError
+
+
+@pytest.fixture(scope="module")
+def model():
+    torch.manual_seed(0)
+    return EmbryoGenModel(num_classes=17, pretrained=False).eval()
+
+
+def test_batched_results_match_individual_scoring(model):
+    # Mixed lengths: padded short sequences plus one long windowed sequence
+    sequences = [(torch.randn(n, 3, 64, 64), torch.arange(n, dtype=torch.float32)) for n in (3, 16, 9, 21)]
+    batcher = MicroBatcher(model, max_batch=8, max_wait_ms=200)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(f, t) for f, t in sequences))
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        batcher.stop()
+
+    for (frames, times), logits in zip(sequences, results):
+        expected = score_sequence(model, frames, times)
+        assert logits.shape == (len(frames), 17)
+        assert torch.allclose(logits, expected, atol=1e-4)
+    assert max(batcher.batch_sizes) > 1
+
+
+def test_submit_rejects_when_queue_is_full(model):
+    batcher = MicroBatcher(model, max_queue=0)
+    with pytest.raises(QueueFullError):
+        asyncio.run(batcher.submit(torch.randn(2, 3, 64, 64), torch.zeros(2)))
+    assert batcher.stats()["rejected"] == 1
+
+
+def test_stop_fails_requests_still_queued(model):
+    batcher = MicroBatcher(model, max_wait_ms=0)
+    release = threading.Event()
+
+    async def run():
+        # Keeps the inference thread busy while a request queues up behind it
+        busy = asyncio.ensure_future(batcher.run(release.wait, 10))
+        await asyncio.sleep(0.2)
+        pending = asyncio.ensure_future(batcher.submit(torch.randn(2, 3, 64, 64), torch.zeros(2)))
+        await asyncio.sleep(0.05)
+        await asyncio.get_running_loop().run_in_executor(None, batcher.stop, 0.1)
+        release.set()
+        with pytest.raises(BatcherStoppedError):
+            await asyncio.wait_for(pending, 5)
+        assert await asyncio.wait_for(busy, 5) is True
+
+    asyncio.run(run())
@@ -0,0 +1,96 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))  # adds project root
+
+import pytest
+import torch
+
+from benchmarks.synthetic import make_labels, make_stacked_frames
+from src.models.hybrid_model import EmbryoGenModel
+from src.serving.loading import export_torchscript, load_model
+from src.training.distill import build_student, distill_epoch, distillation_loss
+from src.training.score import score_archive
+
+STUDENT = {"backbone": "mobilenet_v3_small", "input_size": 64, "width_mult": 0.5}
+
+
+def window(batch=2, length=4, seed=0):
+    generator = torch.Generator().manual_seed(seed)
+    frames = torch.randn(batch, length, 3, 224, 224, generator=generator)
+    times = torch.arange(length, dtype=torch.float32).repeat(batch, 1)
+    return frames, times, torch.randint(0, 17, (batch, length), generator=generator)
+
+
+def test_student_reuses_the_teacher_head():
+    torch.manual_seed(0)
+    teacher = EmbryoGenModel(num_classes=17, pretrained=False).eval()
+    student = build_student(teacher, STUDENT).eval()
+    frames, times, _ = window()
+    with torch.no_grad():
+        features = teacher.encode_frames(frames)
+        assert student.encode_frames(frames).shape == features.shape == (2, 4, 512)
+        torch.testing.assert_close(student.forward_features(features, times), teacher.forward_features(features, times))
+    trainable = {name for name, p in student.named_parameters() if p.requires_grad}
+    assert trainable and all(name.startswith("feature_extractor.") for name in trainable)
+
+
+
+def test_student_refuses_a_teacher_head_that_does_not_fit():
+    teacher = EmbryoGenModel(num_classes=17, pretrained=False)
+    teacher.register_buffer("calibration", torch.zeros(1))
+    with pytest.raises(ValueError, match="calibration"):
+        build_student(teacher, STUDENT)
+
+def test_distillation_moves_the_student_towards_the_teacher():
+    torch.manual_seed(0)
+    teacher = EmbryoGenModel(num_classes=17, pretrained=False).eval()
+    student = build_student(teacher, STUDENT)
+    batch = window()
+    optimizer = torch.optim.AdamW([p for p in student.parameters() if p.requires_grad], lr=1e-2)
+
+    def loss():
+        student.eval()
+        with torch.no_grad():
+            frames, times, labels = batch
+            features, targets = student.encode_frames(frames), teacher.encode_frames(frames)
+            return distillation_loss(features, targets, student.forward_features(features, times),
+                                     teacher.forward_features(targets, times))[0].item()
+
+    before = loss()
+    for _ in range(5):
+        distill_epoch(teacher, student, [batch], optimizer)
+    assert loss() < before
+
+
+def test_load_model_builds_the_student_from_its_config(tmp_path):
+    torch.manual_seed(0)
+    student = build_student(EmbryoGenModel(num_classes=17, pretrained=False), STUDENT).eval()
+    torch.save(student.state_dict(), tmp_path / "student_model.pth")
+    loaded = load_model(checkpoint=tmp_path / "student_model.pth", model_config=STUDENT)
+    frames, times, _ = window(batch=1)
+    with torch.no_grad():
+        torch.testing.assert_close(loaded(frames, times), student(frames, times))
+
+
+def test_scoring_decodes_frames_at_the_student_input_size(tmp_path):
+    labels = make_labels(num_embryos=1, frames_per_embryo=20)
+    make_stacked_frames(tmp_path / "stacked_frames", labels)
+    student = build_student(EmbryoGenModel(num_classes=17, pretrained=False), STUDENT).eval()
+    sizes, encode_frames = set(), student.encode_frames
+    student.encode_frames = lambda frames: sizes.add(frames.shape[-1]) or encode_frames(frames)
+
+    stats = score_archive(student, tmp_path / "scores", frames_root=tmp_path / "stacked_frames", frame_batch=8)
+    assert stats["frames"] == len(labels)
+    # Decoded straight to 64 px, so encode_frames has nothing to resize
+    assert sizes == {64}
+
+
+def test_student_exports_to_torchscript(tmp_path):
+    torch.manual_seed(0)
+    student = build_student(EmbryoGenModel(num_classes=17, pretrained=False), STUDENT).eval()
+    torch.save(student.state_dict(), tmp_path / "student_model.pth")
+    export_torchscript(tmp_path / "student_model.pth", tmp_path / "student_model.ts", model_config=STUDENT)
+    frames, times, _ = window(batch=1)
+    with torch.no_grad():
+        torch.testing.assert_close(load_model(torchscript=tmp_path / "student_model.ts")(frames, times),
+                                   student(frames, times))
@@ -0,0 +1,27 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))  # adds project root
+
+import socket
+
+import torch.multiprocessing as mp
+
+
+def _worker(rank, world_size, port, results):
+    os.environ.update(RANK=str(rank), WORLD_SIZE=str(world_size), MASTER_ADDR="127.0.0.1", MASTER_PORT=str(port))
+    from src.training.distributed import all_reduce_sum, cleanup, init_distributed, is_main
+
+    assert init_distributed("gloo") == (rank, world_size)
+    # Per-rank (correct, total) as produced by validate() on uneven slices
+    results[rank] = (all_reduce_sum([rank + 1, 10 * (rank + 1)]), is_main())
+    cleanup()
+
+
+def test_all_reduce_over_gloo_ranks():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    results = mp.Manager().dict()
+    mp.spawn(_worker, args=(2, port, results), nprocs=2)
+    assert results[0] == ([3.0, 30.0], True)
+    assert results[1] == ([3.0, 30.0], False)
@@ -0,0 +1,55 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))  # adds project root
+
+import torch
+from torchvision import transforms
+
+from benchmarks.synthetic import make_labels, make_stacked_frames
+from src.data.dataset import EmbryoSequenceDataset, EmbryoFeatureDataset
+from src.data.transforms import IMAGENET_MEAN, IMAGENET_STD
+from src.models.hybrid_model import EmbryoGenModel
+from src.training.extract_features import extract_features, check_feature_parity
+
+
+def test_cached_feature_forward_matches_end_to_end(tmp_path):
+    torch.manual_seed(0)
+    labels = make_labels(num_embryos=2, frames_per_embryo=20)
+    labels.to_csv(tmp_path / "labels.csv", index=False)
+    make_stacked_frames(tmp_path / "stacked_frames", labels)
+
+    model = EmbryoGenModel(num_classes=17, pretrained=False)
+    extract_features(model, tmp_path / "feature_store", frames_root=tmp_path / "stacked_frames", batch_size=7)
+
+    transform = transforms.Compose([
+        transforms.ToTensor(),
+        transforms.Normalize(mean=IMAGENET_MEAN, std=IMAGENET_STD)
+    ])
+    frame_ds = EmbryoSequenceDataset(tmp_path / "labels.csv", tmp_path / "stacked_frames", transform=transform)
+    feature_ds = EmbryoFeatureDataset(tmp_path / "labels.csv", tmp_path / "feature_store")
+
+    assert len(frame_ds) == len(feature_ds) > 0
+    features, _, _ = feature_ds[0]
+    assert features.shape == (16, 512)
+    assert check_feature_parity(model, frame_ds, feature_ds, num_windows=len(frame_ds)) < 1e-4
+
+
+def test_cached_features_match_end_to_end_for_unreadable_and_missing_frames(tmp_path):
+    torch.manual_seed(0)
+    labels = make_labels(num_embryos=1, frames_per_embryo=24)
+    labels.to_csv(tmp_path / "labels.csv", index=False)
+    make_stacked_frames(tmp_path / "stacked_frames", labels)
+    jpegs = sorted((tmp_path / "stacked_frames").glob("*/*.jp*g"))
+    jpegs[3].write_bytes(b"not a jpeg")
+    jpegs[10].unlink()
+
+    model = EmbryoGenModel(num_classes=17, pretrained=False)
+    extract_features(model, tmp_path / "feature_store", frames_root=tmp_path / "stacked_frames", batch_size=7)
+
+    transform = transforms.Compose([
+        transforms.ToTensor(),
+        transforms.Normalize(mean=IMAGENET_MEAN, std=IMAGENET_STD)
+    ])
+    frame_ds = EmbryoSequenceDataset(tmp_path / "labels.csv", tmp_path / "stacked_frames", transform=transform)
+    feature_ds = EmbryoFeatureDataset(tmp_path / "labels.csv", tmp_path / "feature_store")
+    assert check_feature_parity(model, frame_ds, feature_ds, num_windows=len(frame_ds)) < 1e-4
@@ -0,0 +1,130 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))  # adds project root
+
+import asyncio
+import functools
+
+import httpx
+import pytest
+import torch
+import torch.nn as nn
+
+from src.federated.client import FederatedClient
+from src.federated.compression import ChunkReader, UpdateEncoder, decode_chunk
+from src.federated.server import Aggregator, create_app
+
+
+def small_model():
+    return nn.Sequential(nn.Linear(8, 16), nn.BatchNorm1d(16), nn.Linear(16, 3))
+
+
+def test_topk_int8_with_error_feedback_loses_nothing():
+    torch.manual_seed(0)
+    delta = torch.randn(1000)
+    encoder = UpdateEncoder("int8", topk=0.05, chunk_elems=256)
+    reader = ChunkReader()
+    sent = torch.zeros(1000)
+    stream = b"".join(encoder.encode("w", delta))
+    # Arbitrary network read sizes
+    for i in range(0, len(stream), 97):
+        for header, payload in reader.feed(stream[i:i + 97]):
+            _, _, offset, (indices, values) = decode_chunk(header, payload)
+            sent[offset + indices] += values
+    assert reader.pending == 0
+    assert (sent != 0).sum() == 3 * 13 + 12  # ceil(5% of 256) per full chunk, ceil(5% of 232) for the last
+    torch.testing.assert_close(sent + encoder.residuals["w"], delta)
+
+
+def test_simulated_nodes_average_into_global_model():
+    torch.manual_seed(0)
+    aggregator = Aggregator(small_model().state_dict(), min_clients=3)
+    app = create_app(aggregator)
+    initial = {k: v.clone() for k, v in aggregator.state.items()}
+
+    async def node(i, codec):
+        client = FederatedClient("http://server", small_model(), codec=codec, transport=httpx.ASGITransport(app))
+        await client.pull()
+        with torch.no_grad():
+            for p in client.model.parameters():
+                p.add_(float(i + 1))
+        client.model[1].num_batches_tracked += i + 1
+        await client.push(num_samples=i + 1)
+        return client
+
+    async def simulate(codec):
+        return await asyncio.gather(*[node(i, codec) for i in range(3)])
+
+    clients = asyncio.run(simulate("fp32"))
+    assert aggregator.round == 1 and aggregator.received == 0
+    # Weighted by samples: (1*1 + 2*2 + 3*3) / 6
+    torch.testing.assert_close(aggregator.state["0.weight"], initial["0.weight"] + 14 / 6)
+    assert aggregator.state["1.num_batches_tracked"].item() == round(14 / 6)
+    assert aggregator.history[0]["bytes_received"] < sum(c.bytes_sent for c in clients)
+
+    asyncio.run(simulate("int8"))
+    assert aggregator.round == 2
+    torch.testing.assert_close(aggregator.state["2.bias"], initial["2.bias"] + 2 * 14 / 6, atol=0.05, rtol=0)
+
+    # An update built on an old round is rejected
+    with pytest.raises(httpx.HTTPStatusError) as error:
+        asyncio.run(clients[0].push())
+    assert error.value.response.status_code == 409
+
+
+def test_broken_and_repeated_uploads_do_not_count():
+    # Small spool, so staged uploads move to disk after a few chunks
+    aggregator = Aggregator(small_model().state_dict(), min_clients=2, spool_bytes=256)
+    app = create_app(aggregator)
+    initial = {k: v.clone() for k, v in aggregator.state.items()}
+    # Several chunks per tensor, so the broken upload stops partway through "0.weight"
+    encoder = UpdateEncoder("fp32", chunk_elems=16, error_feedback=False)
+    body = b"".join(chunk for name, t in initial.items() if t.is_floating_point()
+                    for chunk in encoder.encode(name, torch.ones_like(t)))
+
+    async def post(content, node_id):
+        async with httpx.AsyncClient(base_url="http://server", transport=httpx.ASGITransport(app)) as http:
+            return await http.post("/fed/update", params={"round": 0, "node_id": node_id}, content=content)
+
+    assert asyncio.run(post(body[:len(body) // 3], "a")).status_code == 400
+    assert aggregator.received == 0 and aggregator.accumulator_bytes() == 0
+    assert asyncio.run(post(body, "a")).status_code == 200
+    assert asyncio.run(post(body, "a")).status_code == 409
+    assert aggregator.received == 1
+    assert asyncio.run(post(body, "b")).status_code == 200
+    # Both counted updates are all ones, so the average moves every weight by exactly 1
+    assert aggregator.round == 1 and aggregator.staged_bytes == 0
+    assert 0 < aggregator.history[0]["peak_staged_bytes"] <= 256
+    torch.testing.assert_close(aggregator.state["0.weight"], initial["0.weight"] + 1)
+
+
+def test_node_pushes_carry_the_previous_residual(monkeypatch):
+    from src import fl_node
+
+    aggregator = Aggregator({"w": torch.zeros(4)}, min_clients=1)
+    monkeypatch.setattr(fl_node, "SERVER_URL", "http://server")
+    monkeypatch.setattr(fl_node, "FederatedClient", functools.partial(
+        FederatedClient, transport=httpx.ASGITransport(create_app(aggregator))))
+    monkeypatch.setattr(fl_node, "push_encoders", {})
+
+    class Jobs:
+        """Two finished jobs: the first moved w by [4, 3, 2, 1], the second did not move it."""
+        def status(self, job_id):
+            return {"state": "done", "base_round": int(job_id), "num_samples": 1}
+
+        def weights(self, job_id):
+            base = {"w": aggregator.state["w"].clone()}
+            return base, {"w": base["w"] + torch.tensor([4.0, 3.0, 2.0, 1.0]) * (job_id == "0")}
+
+    monkeypatch.setattr(fl_node, "jobs", Jobs())
+
+    async def push(job_id):
+        async with httpx.AsyncClient(base_url="http://node", transport=httpx.ASGITransport(fl_node.app)) as http:
+            response = await http.post(f"/fl/jobs/{job_id}/push", params={"codec": "fp32", "topk": 0.5})
+        assert response.status_code == 200, response.text
+
+    asyncio.run(push("0"))
+    torch.testing.assert_close(aggregator.state["w"], torch.tensor([4.0, 3.0, 0.0, 0.0]))
+    # Only the residual the first push left out is left to send
+    asyncio.run(push("1"))
+    torch.testing.assert_close(aggregator.state["w"], torch.tensor([4.0, 3.0, 2.0, 1.0]))
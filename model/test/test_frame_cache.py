@@ -0,0 +1,54 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))  # adds project root
+
+import numpy as np
+import torch
+from torch.utils.data import DataLoader
+from torchvision import transforms
+
+from benchmarks.synthetic import make_labels, make_stacked_frames
+from src.data.dataset import EmbryoSequenceDataset
+from src.data.frame_cache import FrameCache
+from src.data.sampler import EmbryoLocalityBatchSampler
+
+
+def test_cache_evicts_least_recently_used_within_budget():
+    cache = FrameCache(max_bytes=300)
+    for key in range(3):
+        cache.put(key, np.zeros(100, dtype=np.uint8))
+    assert cache.get(0) is not None  # 0 is now the most recent
+    cache.put(3, np.zeros(100, dtype=np.uint8))
+    assert cache.get(1) is None and cache.get(0) is not None
+    assert cache.nbytes == 300 and len(cache) == 3
+    assert cache.stats() == {"hits": 2, "misses": 1, "hit_rate": 2 / 3}
+
+
+def test_locality_sampler_and_cache_decode_overlaps_once(tmp_path):
+    labels = make_labels(num_embryos=3, frames_per_embryo=48)
+    labels.to_csv(tmp_path / "labels.csv", index=False)
+    make_stacked_frames(tmp_path / "stacked_frames", labels, size=32)
+    transform = transforms.ToTensor()
+    plain = EmbryoSequenceDataset(tmp_path / "labels.csv", tmp_path / "stacked_frames", transform=transform)
+    cached = EmbryoSequenceDataset(tmp_path / "labels.csv", tmp_path / "stacked_frames", transform=transform,
+                                   frame_cache_bytes=2**20)
+
+    sampler = EmbryoLocalityBatchSampler(cached, batch_size=2, num_workers=2, chunk_windows=3, seed=1)
+    batches = list(sampler)
+    assert len(batches) == len(sampler)
+    assert sorted(i for batch in batches for i in batch) == list(range(len(cached)))
+    # Round-robin dispatch: every worker's batches hold whole chunks of one embryo's consecutive windows
+    for worker in range(2):
+        windows = [i for batch in batches[worker::2] for i in batch]
+        for chunk in sampler.chunks:
+            assert set(chunk.tolist()) <= set(windows) or not set(chunk.tolist()) & set(windows)
+    # ... and a batch draws its windows from different chunks
+    chunk_of = {int(i): c for c, chunk in enumerate(sampler.chunks) for i in chunk}
+    assert sum(len({chunk_of[i] for i in batch}) == len(batch) for batch in batches) >= len(batches) - 2
+
+    loader = DataLoader(cached, batch_sampler=sampler, num_workers=2)
+    for batch, (frames, times, labels_) in zip(batches, loader):
+        expected = torch.stack([plain[i][0] for i in batch])
+        assert torch.equal(frames, expected)
+    # 16-frame windows with stride 8: half of every window after the first in a chunk is a hit
+    assert cached.frame_cache.stats()["hit_rate"] > 0.3
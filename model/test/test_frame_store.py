@@ -0,0 +1,46 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))  # adds project root
+
+import numpy as np
+import torch
+from torchvision import transforms
+
+from benchmarks.synthetic import make_labels, make_stacked_frames
+from src.data.dataset import EmbryoSequenceDataset
+from src.data.frame_store import FrameStore, convert_stacked_frames, pack_embryo
+from src.data.transforms import IMAGENET_MEAN, IMAGENET_STD
+
+
+def test_packed_windows_match_jpeg_path(tmp_path):
+    labels = make_labels(num_embryos=2, frames_per_embryo=20)
+    labels.to_csv(tmp_path / "labels.csv", index=False)
+    make_stacked_frames(tmp_path / "stacked_frames", labels)
+    convert_stacked_frames(tmp_path / "stacked_frames", tmp_path / "frame_store")
+
+    transform = transforms.Compose([
+        transforms.ToTensor(),
+        transforms.Normalize(mean=IMAGENET_MEAN, std=IMAGENET_STD)
+    ])
+    jpeg_ds = EmbryoSequenceDataset(tmp_path / "labels.csv", tmp_path / "stacked_frames", transform=transform)
+    packed_ds = EmbryoSequenceDataset(tmp_path / "labels.csv", tmp_path / "stacked_frames", frame_store=tmp_path / "frame_store")
+
+    assert len(jpeg_ds) == len(packed_ds) > 0
+    for i in range(len(jpeg_ds)):
+        for a, b in zip(jpeg_ds[i], packed_ds[i]):
+            assert torch.allclose(a.float(), b.float(), atol=1e-5)
+
+
+def test_take_handles_gaps_and_missing_frames(tmp_path):
+    frames = [np.full((3, 4, 4), n, dtype=np.uint8) for n in (5, 1, 3)]
+    pack_embryo(tmp_path, "E1", [5, 1, 3], frames, shape=(3, 4, 4))
+
+    store = FrameStore(tmp_path, frame_shape=(3, 4, 4))
+    rows = store.rows("E1", [1, 2, 3, 5])
+    assert rows.tolist() == [0, -1, 1, 2]
+
+    window = store.take("E1", rows)
+    assert window[:, 0, 0, 0].tolist() == [1, 0, 3, 5]
+    # Consecutive rows are served straight from the memmap
+    assert isinstance(store.take("E1", [1, 2]), np.memmap)
+    assert store.take("missing", [-1, -1]).shape == (2, 3, 4, 4)
@@ -0,0 +1,41 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))  # adds project root
+
+import torch
+
+from src.instrumentation import Instrumentation
+
+
+def test_spans_counters_and_prometheus_histograms():
+    metrics = Instrumentation(buckets=(0.01, 1.0))
+    for _ in metrics.timed_iter(range(3)):
+        with metrics.span("work"):
+            pass
+    metrics.observe("work", 0.5)
+    metrics.count("frames", 16)
+
+    snapshot = metrics.snapshot(wall_seconds=1.0)
+    assert snapshot["spans"]["data"]["count"] == 4  # three items plus the final StopIteration wait
+    assert snapshot["spans"]["work"]["count"] == 4
+    assert snapshot["counters"] == {"frames": 16}
+
+    text = metrics.prometheus(prefix="t", gauges={"ready": 1})
+    assert 't_stage_seconds_bucket{stage="work",le="0.01"} 3' in text
+    assert 't_stage_seconds_bucket{stage="work",le="1.0"} 4' in text
+    assert 't_stage_seconds_bucket{stage="work",le="+Inf"} 4' in text
+    assert "t_frames_total 16" in text and "t_ready 1" in text
+
+
+def test_module_hooks_and_disabled_mode():
+    linear = torch.nn.Linear(4, 4)
+    metrics = Instrumentation()
+    metrics.time_module(linear, "linear")
+    linear(torch.randn(2, 4))
+    assert metrics.snapshot()["spans"]["linear"]["count"] == 1
+
+    disabled = Instrumentation(enabled=False)
+    with disabled.span("work"):
+        disabled.count("frames")
+    assert disabled.time_module(linear, "linear") == []
+    assert disabled.snapshot() == {"spans": {}, "counters": {}}
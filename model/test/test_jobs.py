@@ -0,0 +1,67 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))  # adds project root
+
+import threading
+
+import pytest
+import torch
+
+from benchmarks.synthetic import make_labels, make_stacked_frames
+from src.federated.jobs import JobBusyError, LocalTrainingJobs
+from src.models.hybrid_model import EmbryoGenModel
+
+
+def test_local_training_job_fine_tunes_a_snapshot(tmp_path):
+    labels = make_labels(num_embryos=1, frames_per_embryo=16)
+    (tmp_path / "data" / "splits").mkdir(parents=True)
+    for split in ("train", "val"):
+        labels.to_csv(tmp_path / "data" / "splits" / f"{split}.csv", index=False)
+    make_stacked_frames(tmp_path / "data" / "processed" / "stacked_frames", labels)
+
+    torch.manual_seed(0)
+    model = EmbryoGenModel(num_classes=17, pretrained=False)
+    served = {k: v.clone() for k, v in model.state_dict().items()}
+    jobs = LocalTrainingJobs(tmp_path / "jobs", threads=1, nice=0)
+    job_id = jobs.submit(model.state_dict(), base_round=3, data_root=tmp_path, batch_size=1)
+    with pytest.raises(JobBusyError):
+        jobs.submit(model.state_dict(), base_round=3, data_root=tmp_path)
+
+    status = jobs.wait(job_id, timeout=300)
+    assert status["state"] == "done", status.get("error")
+    assert status["epochs_done"] == 1 and status["base_round"] == 3 and status["num_samples"] == 16
+
+    base, final = jobs.weights(job_id)
+    # The serving model was never touched; the job trained its own copy
+    for name, tensor in model.state_dict().items():
+        assert torch.equal(tensor, served[name]) and torch.equal(base[name], served[name])
+    assert not torch.equal(final["classifier.weight"], base["classifier.weight"])
+
+
+def test_concurrent_submits_start_one_job(tmp_path):
+    started = threading.Event()
+    release = threading.Event()
+
+    class SlowProcess:
+        """Stands in for the training process: start() blocks until the test has raced a second submit."""
+        def __init__(self, **kwargs):
+            pass
+
+        def start(self):
+            started.set()
+            release.wait(10)
+
+        def is_alive(self):
+            return True
+
+    jobs = LocalTrainingJobs(tmp_path / "jobs")
+    jobs._ctx = type("Context", (), {"Process": staticmethod(SlowProcess)})
+    state = {"w": torch.zeros(2)}
+    first = threading.Thread(target=jobs.submit, args=(state, 0, tmp_path))
+    first.start()
+    assert started.wait(10)
+    with pytest.raises(JobBusyError):
+        jobs.submit(state, 0, tmp_path)
+    release.set()
+    first.join()
+    assert len(jobs._jobs) == 1
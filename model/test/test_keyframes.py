@@ -0,0 +1,77 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))  # adds project root
+
+import asyncio
+
+import pandas as pd
+import torch
+
+from benchmarks.synthetic import make_labels, make_timelapse_frames
+from src.data.keyframes import expand_keyframes, frame_signatures, select_keyframes
+from src.models.hybrid_model import EmbryoGenModel
+from src.serving.batching import MicroBatcher
+from src.serving.sessions import SessionStore
+from src.training.score import score_archive
+
+
+def repeated_frames(distinct=4, repeats=5):
+    """Each of `distinct` random frames repeated `repeats` times in a row: exact static segments."""
+    torch.manual_seed(0)
+    return torch.randn(distinct, 3, 64, 64).repeat_interleave(repeats, dim=0)
+
+
+def test_keyframes_follow_changes_and_slow_drift():
+    signatures = torch.zeros(10, 4)
+    signatures[5:] = 1.0                                      # a change at frame 5
+    signatures[6:] += torch.arange(1, 5).view(-1, 1) * 0.004  # then a slow drift of 0.004 per frame
+    keep = select_keyframes(signatures, threshold=0.01)
+    # Compared with the last keyframe, the drift crosses the threshold at frame 8
+    assert keep.nonzero().flatten().tolist() == [0, 5, 8]
+    assert not select_keyframes(signatures[6:], 0.01, reference=signatures[5])[0]
+
+    features = torch.arange(3.0).view(3, 1)
+    assert expand_keyframes(features, keep).flatten().tolist() == [0, 0, 0, 0, 0, 1, 1, 1, 2, 2]
+    assert expand_keyframes(features[:0], torch.zeros(2, dtype=torch.bool), torch.tensor([7.0])).flatten().tolist() == [7, 7]
+
+
+def test_skipping_exact_duplicates_keeps_predictions():
+    model = EmbryoGenModel(num_classes=17, pretrained=False).eval()
+    frames = repeated_frames()
+    times = torch.arange(len(frames), dtype=torch.float32)
+    assert select_keyframes(frame_signatures(frames), 0.001).sum() == 4
+
+    async def score(batcher):
+        try:
+            return await batcher.submit(frames, times)
+        finally:
+            batcher.stop()
+
+    full = asyncio.run(score(MicroBatcher(model, max_wait_ms=0)))
+    skipping = MicroBatcher(model, max_wait_ms=0, skip_threshold=0.001)
+    torch.testing.assert_close(asyncio.run(score(skipping)), full, atol=1e-5, rtol=1e-4)
+    assert skipping.stats()["frames_skipped"] == 16
+
+    # Streaming: the reference frame carries across appends (frames 3-6 straddle two of them)
+    store = SessionStore(model, skip_threshold=0.001)
+    session_id = store.create()
+    with torch.no_grad():
+        for lo, hi in [(0, 4), (4, 7), (7, 20)]:
+            store.append(session_id, frames[lo:hi], times[lo:hi])
+        torch.testing.assert_close(store.timeline(session_id), full, atol=1e-5, rtol=1e-4)
+
+
+def test_archive_scoring_with_frame_skipping(tmp_path):
+    torch.manual_seed(0)
+    labels = make_labels(num_embryos=2, frames_per_embryo=30)
+    make_timelapse_frames(tmp_path / "stacked_frames", labels, noise=1.0)
+    model = EmbryoGenModel(num_classes=17, pretrained=False).eval()
+
+    full = score_archive(model, tmp_path / "full", frames_root=tmp_path / "stacked_frames", frame_batch=8)
+    skipped = score_archive(model, tmp_path / "skip", frames_root=tmp_path / "stacked_frames", frame_batch=8,
+                            skip_threshold=0.02)
+    assert full["frames_encoded"] == len(labels)
+    # About one keyframe per stage
+    assert skipped["frames_encoded"] <= labels.groupby(["EmbryoID", "Event"]).ngroups + 2
+    a, b = pd.read_parquet(tmp_path / "full"), pd.read_parquet(tmp_path / "skip")
+    assert len(a) == len(b) and (a["time"] == b["time"]).all()
@@ -0,0 +1,22 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))  # adds project root
+
+import torch
+
+from src.models.hybrid_model import EmbryoGenModel
+from src.serving.loading import export_torchscript, load_model
+
+
+def test_checkpoint_and_torchscript_match_trained_model(tmp_path):
+    torch.manual_seed(0)
+    trained = EmbryoGenModel(num_classes=17, pretrained=False).eval()
+    torch.save(trained.state_dict(), tmp_path / "model.pth")
+    export_torchscript(tmp_path / "model.pth", tmp_path / "model.ts")
+
+    frames = torch.randn(1, 4, 3, 64, 64)
+    times = torch.arange(4, dtype=torch.float32)[None]
+    expected = trained(frames, times)
+    for model in (load_model(checkpoint=tmp_path / "model.pth"), load_model(torchscript=tmp_path / "model.ts")):
+        features = model.encode_frames(frames)
+        assert torch.allclose(model.forward_features(features, times), expected, atol=1e-5)
@@ -0,0 +1,34 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))  # adds project root
+
+import pytest
+import torch
+
+pytest.importorskip("onnxruntime")
+
+from src.models.hybrid_model import EmbryoGenModel
+from src.serving.onnx_backend import OnnxModel, export_onnx
+
+
+def test_onnx_graphs_match_pytorch(tmp_path):
+    torch.manual_seed(0)
+    model = EmbryoGenModel(num_classes=17, pretrained=False).eval()
+    export_onnx(model, tmp_path, size=64)
+    onnx_model = OnnxModel(tmp_path)
+
+    with torch.no_grad():
+        # Batch and time differ from the export shapes; T > 16 exercises the t % 16 positions
+        for b, t in [(1, 5), (3, 20)]:
+            frames = torch.randn(b, t, 3, 64, 64)
+            times = torch.arange(t, dtype=torch.float32).repeat(b, 1)
+            features = model.encode_frames(frames)
+            assert torch.allclose(onnx_model.encode_frames(frames), features, atol=1e-4)
+            assert torch.allclose(onnx_model(frames, times), model(frames, times), atol=1e-4)
+
+        # Padded batch, as built by the micro-batcher
+        mask = torch.zeros(3, 20, dtype=torch.bool)
+        mask[0, 12:] = True
+        expected = model.forward_features(features, times, mask)
+        logits = onnx_model.forward_features(features, times, mask)
+        assert torch.allclose(logits[~mask], expected[~mask], atol=1e-4)
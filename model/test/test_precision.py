@@ -0,0 +1,49 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))  # adds project root
+
+import copy
+
+import pytest
+import torch
+
+from src.models.hybrid_model import EmbryoGenModel
+from src.training.utils import precision_settings
+
+
+def test_checkpointed_backbone_matches_plain():
+    torch.manual_seed(0)
+    # float64 so chunked and whole-batch convolutions agree to rounding
+    model = EmbryoGenModel(num_classes=17, pretrained=False).double().eval()
+    checkpointed = copy.deepcopy(model)
+    checkpointed.enable_backbone_checkpointing(3)
+    # Same parameter names, so checkpoints load into either model
+    assert checkpointed.state_dict().keys() == model.state_dict().keys()
+
+    frames = torch.randn(1, 4, 3, 64, 64, dtype=torch.float64)
+    times = torch.arange(4, dtype=torch.float64).unsqueeze(0)
+    # train() leaves the checkpointed backbone's BatchNorm frozen; the plain model matches it with
+    # BatchNorm in eval by hand (dropout off in both, so only the backbone is compared)
+    checkpointed.train()
+    checkpointed.transformer.eval()
+    model.feature_extractor.train(True)
+    model.feature_extractor.apply(lambda mod: mod.eval() if isinstance(mod, torch.nn.BatchNorm2d) else None)
+    bn = [m for m in checkpointed.modules() if isinstance(m, torch.nn.BatchNorm2d)]
+    assert bn and not any(m.training for m in bn) and checkpointed.feature_extractor.training
+    running_mean = bn[0].running_mean.clone()
+
+    for m in (model, checkpointed):
+        m(frames, times).sum().backward()
+    for (name, p), q in zip(model.named_parameters(), checkpointed.parameters()):
+        if p.grad is not None:
+            torch.testing.assert_close(p.grad, q.grad, msg=name)
+    # Neither the chunked forward nor its recomputation touches the running statistics
+    torch.testing.assert_close(bn[0].running_mean, running_mean, rtol=0, atol=0)
+
+
+def test_precision_settings():
+    assert precision_settings(torch.device("cpu")) == (torch.bfloat16, False)
+    assert precision_settings(torch.device("cuda")) == (torch.float16, True)
+    assert precision_settings(torch.device("cpu"), "fp32") == (None, False)
+    with pytest.raises(ValueError):
+        precision_settings(torch.device("cpu"), "int8")
@@ -0,0 +1,25 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))  # adds project root
+
+import io
+import asyncio
+
+from PIL import Image
+
+from src.serving.preprocess import FrameDecoder
+
+
+def jpeg(size=64):
+    buffer = io.BytesIO()
+    Image.new("RGB", (size, size), color="red").save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def test_decoder_restarts_after_shutdown():
+    decoder = FrameDecoder(workers=2, size=32)
+    assert asyncio.run(decoder.decode([jpeg()] * 3)).shape == (3, 3, 32, 32)
+    # A second app startup in the same process reuses the module-level decoder
+    decoder.shutdown()
+    assert asyncio.run(decoder.decode_normalized([jpeg()])).shape == (1, 3, 32, 32)
+    decoder.shutdown()
@@ -0,0 +1,91 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))  # adds project root
+
+import asyncio
+import threading
+
+import torch
+
+from src.serving.result_cache import ResultCache, state_digest
+
+
+def test_identical_concurrent_requests_compute_once():
+    cache = ResultCache("v1")
+    key = cache.key([b"frame0", b"frame1"], torch.tensor([0.0, 0.25]))
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return torch.randn(2, 17)
+
+    async def burst():
+        return await asyncio.gather(*(cache.get_or_compute(key, compute) for _ in range(5)))
+
+    results = asyncio.run(burst())
+    assert len(calls) == 1
+    assert sorted(source for _, source in results) == ["coalesced"] * 4 + ["miss"]
+    assert all(torch.equal(logits, results[0][0]) for logits, _ in results)
+    assert asyncio.run(cache.get_or_compute(key, compute))[1] == "hit"
+    assert cache.stats()["hit_rate"] == 5 / 6
+
+
+def test_key_depends_on_bytes_times_and_version():
+    cache = ResultCache("v1")
+    times = torch.tensor([0.0, 0.25])
+    key = cache.key([b"ab", b"c"], times)
+    assert key != cache.key([b"a", b"bc"], times)
+    assert key != cache.key([b"ab", b"c"], times + 1)
+    assert key != ResultCache("v2").key([b"ab", b"c"], times)
+
+
+def test_lru_eviction_within_byte_budget():
+    entry = torch.zeros(4, 17)  # 272 bytes
+    cache = ResultCache("v1", max_bytes=2 * entry.numel() * entry.element_size())
+    for key in ("a", "b"):
+        cache.put("v1", key, entry)
+    cache.get("a")  # "b" becomes least recently used
+    cache.put("v1", "c", entry)
+    assert cache.get("b") is None and cache.get("a") is not None
+    assert cache.stats()["evictions"] == 1
+    cache.put("v0", "d", entry)  # computed by a replaced model: dropped
+    assert cache.get("d") is None
+
+
+def test_disk_tier_survives_restart_and_invalidation(tmp_path):
+    version = state_digest(torch.nn.Linear(2, 2).state_dict())
+    logits = torch.randn(3, 17)
+    first = ResultCache(version, disk_dir=tmp_path)
+    key = first.key([b"frame"], torch.zeros(1))
+
+    async def compute():
+        return logits
+
+    assert asyncio.run(first.get_or_compute(key, compute))[1] == "miss"
+    restarted = ResultCache(version, disk_dir=tmp_path)
+    cached, source = asyncio.run(restarted.get_or_compute(key, compute))
+    assert source == "disk_hit" and torch.equal(cached, logits)
+
+    restarted.invalidate("v2")
+    assert restarted.get(key) is None
+    restarted._pruner.join()
+    assert not (tmp_path / version).exists()
+    assert ResultCache(version, disk_dir=tmp_path).stats()["disk_bytes"] == 0
+
+
+def test_disk_prune_tolerates_concurrent_writes(tmp_path):
+    cache = ResultCache("v1", disk_dir=tmp_path)
+    logits = torch.randn(2, 17)
+    # A write of the old version racing the prune after a swap: serialized, and dropped once the version moved on
+    writers = [threading.Thread(target=cache._write_disk, args=("v1", f"k{i}", logits)) for i in range(20)]
+    for i, writer in enumerate(writers):
+        writer.start()
+        if i == 10:
+            cache.invalidate("v2")
+    for writer in writers:
+        writer.join()
+    cache._pruner.join()
+    assert not (tmp_path / "v1").exists() and cache.stats()["disk_bytes"] == 0
+    cache._write_disk("v2", "k", logits)
+    assert (tmp_path / "v2" / "k.pt").exists()
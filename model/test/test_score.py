@@ -0,0 +1,57 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))  # adds project root
+
+import pandas as pd
+import torch
+
+from benchmarks.synthetic import make_annotation_tree, make_labels, make_stacked_frames
+from src.data.transforms import normalize_window
+from src.models.hybrid_model import EmbryoGenModel
+from src.models.inference import score_sequence
+from src.training.score import open_embryo, score_archive
+
+
+def test_archive_scores_match_per_embryo_scoring_and_resume(tmp_path):
+    torch.manual_seed(0)
+    # Lengths that split windows and frame batches across embryo boundaries, plus one shorter than a window
+    labels = pd.concat([make_labels(num_embryos=2, frames_per_embryo=37), make_labels(num_embryos=3, frames_per_embryo=11)
+                        .assign(EmbryoID=lambda df: df["EmbryoID"] + "-short")], ignore_index=True)
+    make_stacked_frames(tmp_path / "stacked_frames", labels)
+    _, time_dir = make_annotation_tree(tmp_path / "raw", labels)
+    model = EmbryoGenModel(num_classes=17, pretrained=False).eval()
+    output = tmp_path / "scores"
+
+    stats = score_archive(model, output, frames_root=tmp_path / "stacked_frames", time_dir=time_dir,
+                          frame_batch=10, window_batch=3, workers=2, depth=2)
+    assert stats["embryos"] == 5 and stats["frames"] == len(labels)
+    scores = pd.read_parquet(output)
+    assert len(scores) == len(labels)
+
+    for emb_id, group in scores.groupby("EmbryoID", observed=True):
+        embryo = open_embryo(emb_id, frames_root=tmp_path / "stacked_frames", time_dir=time_dir)
+        expected_times = labels[labels["EmbryoID"] == emb_id]["time"].to_numpy()
+        torch.testing.assert_close(embryo["times"], torch.tensor(expected_times, dtype=torch.float32))
+        frames = torch.from_numpy(embryo["read"](0, len(embryo["frame_nums"])))
+        expected = torch.softmax(score_sequence(model, frames, embryo["times"], preprocess=normalize_window), dim=-1)
+        probs = torch.tensor(group.sort_values("Frame").filter(like="p_").to_numpy())
+        torch.testing.assert_close(probs, expected, atol=1e-5, rtol=1e-4)
+
+    # A crash mid-write leaves a temporary file; the rerun only scores what is missing
+    removed = sorted(output.glob("*.parquet"))[0]
+    removed.rename(output / f".{removed.stem}.tmp.parquet")
+    stats = score_archive(model, output, frames_root=tmp_path / "stacked_frames", time_dir=time_dir)
+    assert stats["embryos"] == 1 and stats["skipped"] == 4
+    assert len(pd.read_parquet(output)) == len(labels)
+
+
+def test_unreadable_frames_do_not_stop_the_archive(tmp_path):
+    labels = make_labels(num_embryos=2, frames_per_embryo=20)
+    make_stacked_frames(tmp_path / "stacked_frames", labels)
+    corrupt = sorted((tmp_path / "stacked_frames" / labels["EmbryoID"][0]).iterdir())[5]
+    corrupt.write_bytes(b"not a jpeg")
+    model = EmbryoGenModel(num_classes=17, pretrained=False).eval()
+
+    stats = score_archive(model, tmp_path / "scores", frames_root=tmp_path / "stacked_frames", frame_batch=8)
+    assert stats["embryos"] == 2 and stats["unreadable_frames"] == 1
+    assert len(pd.read_parquet(tmp_path / "scores")) == len(labels)
@@ -0,0 +1,33 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))  # adds project root
+
+import torch
+
+from src.models.hybrid_model import EmbryoGenModel
+from src.models.inference import score_features
+from src.serving.sessions import SessionStore, StreamSession
+
+
+def test_incremental_timeline_matches_full_rescoring():
+    torch.manual_seed(0)
+    model = EmbryoGenModel(num_classes=17, pretrained=False).eval()
+    features = torch.randn(45, 512)
+    times = torch.arange(45, dtype=torch.float32)
+
+    session = StreamSession("s", num_classes=17)
+    with torch.no_grad():
+        for lo, hi in [(0, 1), (1, 9), (9, 16), (16, 17), (17, 30), (30, 45)]:
+            session.append(model, features[lo:hi], times[lo:hi])
+            expected = score_features(model, features[:hi], times[:hi])
+            assert torch.allclose(session.timeline(model), expected, atol=1e-5)
+
+
+def test_store_evicts_least_recently_used_sessions():
+    model = EmbryoGenModel(num_classes=17, pretrained=False).eval()
+    store = SessionStore(model, max_bytes=1)
+    first = store.create()
+    second = store.create()
+    assert store.stats()["sessions"] == 1 and store.evictions == 1
+    assert store.get(second)
+    assert not store.delete(first)
@@ -0,0 +1,28 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))  # adds project root
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import frame_name
+from src.data.dataset import CLASSES
+from src.data.window_index import build_window_index
+
+
+def test_numeric_embryo_ids_index_their_own_rows(tmp_path):
+    # Numeric IDs sort differently as numbers (2 < 10) and as strings ("10" < "2")
+    labels = pd.concat([pd.DataFrame({"EmbryoID": emb_id, "Frame": np.arange(1, 21), "Event": "t2",
+                                      "time": np.arange(20) * 0.25}) for emb_id in (2, 10)], ignore_index=True)
+    for emb_id in (2, 10):
+        (tmp_path / str(emb_id)).mkdir()
+        for n in range(1, 21):
+            (tmp_path / str(emb_id) / frame_name(str(emb_id), n)).touch()
+
+    index = build_window_index(labels, tmp_path, CLASSES, window_size=16, stride=4)
+    assert list(index["embryo_ids"]) == ["10", "2"]
+    assert (np.diff(index["row_embryo"]) >= 0).all()
+    for start, code in zip(index["window_start"], index["window_embryo"]):
+        emb_id = index["embryo_ids"][code]
+        assert (index["row_embryo"][start:start + 16] == code).all()
+        assert all(f"_I{emb_id}_" in name.decode() for name in index["filename"][start:start + 16])
@@ -0,0 +1,47 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))  # adds project root
+
+import torch
+from torchvision import transforms
+
+from benchmarks.synthetic import make_labels, make_stacked_frames
+from src.data.dataset import EmbryoSequenceDataset
+from src.data.transforms import IMAGENET_MEAN, IMAGENET_STD, WindowTransform, normalize_window
+
+
+def test_decoded_windows_match_per_frame_pipeline(tmp_path):
+    labels = make_labels(num_embryos=2, frames_per_embryo=20)
+    labels.to_csv(tmp_path / "labels.csv", index=False)
+    make_stacked_frames(tmp_path / "stacked_frames", labels)
+    # A missing frame stays all-zero on both paths
+    next((tmp_path / "stacked_frames").glob("*/*.jpeg")).unlink()
+
+    per_frame = EmbryoSequenceDataset(tmp_path / "labels.csv", tmp_path / "stacked_frames", cache_index=False,
+                                      transform=transforms.Compose([
+                                          transforms.ToTensor(),
+                                          transforms.Normalize(mean=IMAGENET_MEAN, std=IMAGENET_STD)
+                                      ]))
+    batched = EmbryoSequenceDataset(tmp_path / "labels.csv", tmp_path / "stacked_frames", cache_index=False,
+                                    window_transform=WindowTransform(224), frame_cache_bytes=2**24)
+    for _ in range(2):  # second pass is served from the frame cache
+        for i in range(len(per_frame)):
+            for a, b in zip(per_frame[i], batched[i]):
+                # PIL and torchvision may use different libjpeg IDCTs: allow a couple of grey levels
+                assert torch.allclose(a.float(), b.float(), atol=3 / (255 * min(IMAGENET_STD)))
+    assert batched.frame_cache.stats()["hits"] > 0
+
+
+def test_augmentation_is_shared_by_all_frames():
+    torch.manual_seed(0)
+    frame = torch.randint(0, 256, (3, 64, 48), dtype=torch.uint8)
+    window = frame.expand(8, -1, -1, -1)
+    augment = WindowTransform(32, train=True, crop_scale=(0.3, 0.6))
+    for _ in range(5):
+        out = augment(window)
+        assert out.shape == (8, 3, 32, 32)
+        assert torch.equal(out, out[:1].expand_as(out))
+
+    flip = WindowTransform(64, train=True, crop_scale=None, hflip=1.0, vflip=0.0)
+    window = torch.randint(0, 256, (4, 3, 64, 64), dtype=torch.uint8)
+    assert torch.equal(flip(window), normalize_window(window.flip(-1)))